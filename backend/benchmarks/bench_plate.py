@@ -0,0 +1,57 @@
+"""
+차량번호 조회 micro-benchmark
+사용자 수별 plate_service.PlateIndex.match() 처리 시간 (일치 / OCR 오인식 / 미등록 번호, fuzzy=True, max_distance=1)
+
+사용법 (backend 디렉터리에서):
+    python -m benchmarks.bench_plate [--users 5000] [--number 20000]
+"""
+import argparse
+import random
+import timeit
+
+from bson import ObjectId
+
+from services.plate_service import PlateIndex
+
+HANGUL = "가나다라마거너더러머버서어저고노도로모보소오조구누두루무부수우주하허호"
+
+
+def _plate(rng: random.Random) -> str:
+    return f"{rng.randint(10, 399)}{rng.choice(HANGUL)}{rng.randint(0, 9999):04d}"
+
+
+def _misread(plate: str, rng: random.Random) -> str:
+    """숫자 하나를 다른 숫자로 바꾼 번호 (OCR 오인식)"""
+    positions = [i for i, ch in enumerate(plate) if ch.isdigit()]
+    i = rng.choice(positions)
+    return plate[:i] + str((int(plate[i]) + 1) % 10) + plate[i + 1:]
+
+
+def run(users: int, number: int):
+    rng = random.Random(0)
+    index = PlateIndex(fuzzy=True, max_distance=1)
+    plates = [_plate(rng) for _ in range(users)]
+    build = timeit.timeit(
+        lambda: [index._add(ObjectId(), {"user_id": str(i), "flag": "y", "plates": [plate]}) for i, plate in enumerate(plates)],
+        number=1,
+    )
+    print(f"users={users} index build: {build * 1000:.1f} ms {index.stats()}")
+
+    queries = {
+        "exact": [rng.choice(plates) for _ in range(1000)],
+        "misread": [_misread(rng.choice(plates), rng) for _ in range(1000)],
+        "unknown": [_plate(rng) for _ in range(1000)],
+    }
+    for name, values in queries.items():
+        matched = sum(bool(index.match(value)) for value in values)
+        seconds = timeit.timeit(lambda: [index.match(value) for value in values], number=max(number // len(values), 1))
+        per_call = seconds / (max(number // len(values), 1) * len(values))
+        print(f"  {name:8s}: {per_call * 1e6:7.2f} us/match ({1 / per_call:,.0f}/s), matched {matched}/{len(values)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000, help="등록 사용자 수 (사용자당 번호 1개)")
+    parser.add_argument("--number", type=int, default=20000, help="측정 반복 횟수")
+    args = parser.parse_args()
+    run(args.users, args.number)
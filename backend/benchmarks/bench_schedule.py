@@ -0,0 +1,87 @@
+"""
+출입 가능 시간 확인 micro-benchmark
+기존 user_service.valid_datetime(요청마다 strptime/print)과 schedule_service의 계산된 비트맵 확인 비교
+
+사용법 (backend 디렉터리에서):
+    python -m benchmarks.bench_schedule [--number 100000]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import timeit
+from datetime import datetime, timezone, timedelta
+
+from services.schedule_service import compile_schedule, schedule_for, user_can_access
+
+logger = logging.getLogger(__name__)
+
+USERS = {
+    "always": {"date_from": "0000-00-00", "date_to": "0000-00-00", "hour_from": 0, "hour_to": 0},
+    "period": {"date_from": "2024-01-01", "date_to": "2030-12-31", "hour_from": 0, "hour_to": 0},
+    "office_hours": {"date_from": "2024-01-01", "date_to": "2030-12-31", "hour_from": 9, "hour_to": 18},
+}
+
+
+def legacy_valid_datetime(date_from: str, date_to: str, hour_from: int, hour_to: int) -> bool:
+    """user_service.valid_datetime (교체 전 구현 그대로)"""
+    kst = timezone(timedelta(hours=9))
+    now = datetime.now(kst)
+    print(now)
+
+    try:
+        if date_from != "0000-00-00":
+            dt_from = datetime.strptime(f"{date_from} 00:00:00", "%Y-%m-%d %H:%M:%S")
+            dt_from = dt_from.replace(tzinfo=kst)
+            if now < dt_from:
+                return False
+
+        if date_to != "0000-00-00":
+            dt_to = datetime.strptime(f"{date_to} 23:59:59", "%Y-%m-%d %H:%M:%S")
+            dt_to = dt_to.replace(tzinfo=kst)
+            if now > dt_to:
+                return False
+
+        if hour_from + hour_to != 0:
+            current_hour = now.hour
+            print("current_hour", current_hour)
+            if current_hour < hour_from or current_hour >= hour_to:
+                return False
+
+        return True
+    except Exception as e:
+        logger.error(f"날짜/시간 검증 실패: {e}", exc_info=True)
+        return False
+
+
+def _per_call(seconds: float, number: int) -> str:
+    return f"{seconds / number * 1e6:8.3f} us/call"
+
+
+def run(number: int):
+    for name, user in USERS.items():
+        legacy_args = (user["date_from"], user["date_to"], user["hour_from"], user["hour_to"])
+        compiled = schedule_for(dict(user))
+        cached_user = dict(user, _schedule=compiled)
+
+        # 기존 함수는 print 출력을 버리는 비용까지 포함 (실서버에서는 stdout으로 출력됨)
+        with contextlib.redirect_stdout(io.StringIO()) as sink:
+            expected = legacy_valid_datetime(*legacy_args)
+            legacy = timeit.timeit(lambda: legacy_valid_datetime(*legacy_args), number=number)
+            sink.truncate(0)
+        compile_time = timeit.timeit(lambda: compile_schedule(user), number=max(number // 100, 1))
+        check = timeit.timeit(lambda: compiled.allows(), number=number)
+        via_user = timeit.timeit(lambda: user_can_access(cached_user), number=number)
+
+        assert user_can_access(cached_user) == expected, name
+        print(f"[{name}] allowed={expected}")
+        print(f"  legacy valid_datetime : {_per_call(legacy, number)}")
+        print(f"  compile (once/user)   : {_per_call(compile_time, max(number // 100, 1))}")
+        print(f"  compiled.allows()     : {_per_call(check, number)}  (x{legacy / check:.0f})")
+        print(f"  user_can_access(user) : {_per_call(via_user, number)}  (x{legacy / via_user:.0f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=100000, help="측정 반복 횟수")
+    run(parser.parse_args().number)
@@ -1,7 +1,10 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+from typing import Optional, List, Dict, Any
 from config import config_data
 from utils.logger import get_logger
+from utils.metrics import mongo_command_counter
 
 logger = get_logger()
 
@@ -9,6 +12,45 @@ logger = get_logger()
 client: Optional[AsyncIOMotorClient] = None
 database = None
 
+# 컬렉션(config.json의 MONGODB.tables 키) -> 시작 시 생성할 인덱스
+INDEXES: Dict[str, List[IndexModel]] = {
+    "user": [
+        # gate/users API마다 api_key로 사용자 조회
+        IndexModel([("api_key", 1)], name="api_key_1"),
+        # 로그인, 사용자 생성, 로그 목록 사용자 이름 조회
+        IndexModel([("user_id", 1)], name="user_id_1"),
+        # 사용자 목록 증분 동기화 (since 이후 revision 순)
+        IndexModel([("revision", 1)], name="revision_1"),
+    ],
+    "tombstones": [
+        # 삭제된 사용자 (증분 동기화)
+        IndexModel([("revision", 1)], name="revision_1"),
+        # 보관 기간 정리 (USER_SYNC.tombstone_days)
+        IndexModel([("deleted_at", 1)], name="deleted_at_1"),
+    ],
+    "log": [
+        # 로그 목록 정렬/커서 조회, 보관 기간 정리
+        IndexModel([("timestamp", -1), ("_id", -1)], name="timestamp_-1__id_-1"),
+        # 로그 검색 (/logs/search): 같음 조건 필드 + regdate 범위/정렬
+        IndexModel([("regdate", -1), ("_id", -1)], name="regdate_-1__id_-1"),
+        IndexModel([("user_id", 1), ("regdate", -1), ("_id", -1)], name="user_id_1_regdate_-1__id_-1"),
+        IndexModel([("eventinfo.mode", 1), ("regdate", -1), ("_id", -1)], name="eventinfo.mode_1_regdate_-1__id_-1"),
+        IndexModel([("cam_name", 1), ("regdate", -1), ("_id", -1)], name="cam_name_1_regdate_-1__id_-1"),
+        IndexModel([("eventinfo.ip", 1), ("regdate", -1), ("_id", -1)], name="eventinfo.ip_1_regdate_-1__id_-1"),
+    ],
+    "stats": [
+        # 출입 통계 rollup: 구간마다 문서 하나 (upsert 대상)
+        IndexModel([("bucket", 1), ("user_id", 1), ("start", 1)], name="bucket_1_user_id_1_start_1", unique=True),
+    ],
+    "blobs": [
+        # 스냅샷 중복 제거: 최근 사용 이미지 hash 로드, 보관 기간 정리
+        IndexModel([("last_used", -1)], name="last_used_-1"),
+    ],
+}
+
+# COLLSCAN 점검 대상 쿼리 (register_query_pattern으로 등록)
+QUERY_PATTERNS: List[Dict[str, Any]] = []
+
 
 async def connect_to_mongo():
     """MongoDB에 연결"""
@@ -32,7 +74,9 @@ async def connect_to_mongo():
             mongodb_url,
             maxPoolSize=pool_config.get('max_pool_size', 50),
             minPoolSize=pool_config.get('min_pool_size', 5),
-            maxIdleTimeMS=pool_config.get('max_idle_time_ms', 30000)
+            maxIdleTimeMS=pool_config.get('max_idle_time_ms', 30000),
+            # API 호출별 쿼리 수 측정 (/admin/metrics)
+            event_listeners=[mongo_command_counter]
         )
         database = client[db_name]
         # 연결 테스트
@@ -42,6 +86,67 @@ async def connect_to_mongo():
         logger.error(f"MongoDB 연결 실패: {e}", exc_info=True)
         raise
 
+    await ensure_indexes()
+
+
+def get_collection(table: str):
+    """config.json의 MONGODB.tables 키로 컬렉션 반환"""
+    tables = config_data.get('MONGODB', {}).get('tables', {})
+    defaults = {
+        "user": "user", "log": "gate_log", "stats": "gate_stats", "blobs": "snapshot_blobs",
+        "tombstones": "user_tombstones", "counters": "counters",
+    }
+    return database[tables.get(table, defaults.get(table, table))]
+
+
+async def ensure_indexes():
+    """INDEXES에 선언된 인덱스 생성 (이미 있으면 그대로, 충돌은 경고만)"""
+    if database is None:
+        return
+    for table, indexes in INDEXES.items():
+        collection = get_collection(table)
+        try:
+            names = await collection.create_indexes(indexes)
+            logger.info(f"인덱스 확인: {collection.name} {names}")
+        except OperationFailure as e:
+            logger.warning(f"인덱스 생성 실패: {collection.name} {e}")
+
+
+def register_query_pattern(name: str, table: str, filter: Dict[str, Any], sort: Optional[List] = None):
+    """explain 점검 대상 쿼리 등록 (값은 형식만 맞으면 됨)"""
+    QUERY_PATTERNS.append({"name": name, "table": table, "filter": filter, "sort": sort})
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """실행 계획 트리의 stage 이름 목록"""
+    stages = [plan.get("stage")] if plan.get("stage") else []
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            stages += _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def check_query_plans() -> List[Dict[str, Any]]:
+    """등록된 쿼리의 실행 계획을 explain으로 확인하여 COLLSCAN 여부 반환"""
+    results = []
+    for pattern in QUERY_PATTERNS:
+        collection = get_collection(pattern["table"])
+        cursor = collection.find(pattern["filter"]).limit(1)
+        if pattern["sort"]:
+            cursor = cursor.sort(pattern["sort"])
+        explain = await cursor.explain()
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(winning)
+        results.append({
+            "name": pattern["name"],
+            "collection": collection.name,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return results
+
 
 async def close_mongo_connection():
     """MongoDB 연결 종료"""
@@ -4,7 +4,22 @@ from contextlib import asynccontextmanager
 import logging
 
 from database import connect_to_mongo, close_mongo_connection
-from routers import health, api, users, gate
+from services.camera_client import init_camera_clients, start_health_probes, close_camera_clients
+from services.stream_service import close_streams
+from services.frame_buffer import start_capture_workers, stop_capture_workers
+from services.event_queue import event_queue
+from services.thumbnail_service import shutdown_thumbnail_pool
+from services.log_service import (
+    start_log_count_refresher,
+    stop_log_count_refresher,
+    start_regdate_backfill,
+    stop_regdate_backfill,
+)
+from services.retention_service import ensure_retention, start_retention, stop_retention
+from services.user_service import start_user_cache, stop_user_cache
+from services.plate_service import start_plate_index, stop_plate_index
+from services.user_sync_service import ensure_user_revisions
+from routers import health, api, users, gate, camera, admin, stats
 from config import config_data
 from utils.logger import setup_logger, get_logger
 
@@ -21,9 +36,30 @@ async def lifespan(app: FastAPI):
     # 시작 시 실행
     logger.info("애플리케이션 시작")
     await connect_to_mongo()
+    await ensure_user_revisions()
+    start_user_cache()
+    start_plate_index()
+    await ensure_retention()
+    start_log_count_refresher()
+    start_regdate_backfill()
+    start_retention()
+    init_camera_clients()
+    start_health_probes()
+    start_capture_workers()
+    await event_queue.start()
     yield
     # 종료 시 실행
     logger.info("애플리케이션 종료")
+    await event_queue.stop()
+    await stop_log_count_refresher()
+    await stop_regdate_backfill()
+    await stop_retention()
+    await stop_plate_index()
+    await stop_user_cache()
+    shutdown_thumbnail_pool()
+    await close_streams()
+    await stop_capture_workers()
+    await close_camera_clients()
     await close_mongo_connection()
 
 
@@ -48,6 +84,9 @@ app.include_router(health.router, tags=["Health"])
 app.include_router(api.router, prefix="/api/v1", tags=["API"])
 app.include_router(users.router, prefix="/api/v1", tags=["Users"])
 app.include_router(gate.router, prefix="/api/v1", tags=["Gate"])
+app.include_router(camera.router, prefix="/api/v1", tags=["Camera"])
+app.include_router(admin.router, prefix="/api/v1", tags=["Admin"])
+app.include_router(stats.router, prefix="/api/v1", tags=["Stats"])
 
 
 @app.get("/")
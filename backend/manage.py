@@ -0,0 +1,175 @@
+"""
+관리 명령 CLI
+
+사용법:
+    python manage.py migrate-snapshots [--batch-size 100] [--limit N] [--dry-run]
+    python manage.py sweep-logs
+    python manage.py convert-log-capped
+    python manage.py check-indexes
+    python manage.py backfill-regdate --batch-size 1000 [--limit N]
+    python manage.py rebuild-stats --batch-size 1000 [--since 2024-01-01] [--include-today]
+    python manage.py import-users ../config/users.json [--format json|csv] [--batch-size 500] [--dry-run]
+    python manage.py export-users [--output users.csv] [--format ndjson|json|csv] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+from database import connect_to_mongo, close_mongo_connection, ensure_indexes, check_query_plans
+from services.log_service import migrate_embedded_snapshots, backfill_regdate
+from services.stats_service import rebuild_stats
+from services.retention_service import sweep_once, convert_to_capped
+from services.user_bulk_service import import_users, export_users, IMPORT_FORMATS, EXPORT_FORMATS
+from utils.logger import setup_logger
+
+logger = setup_logger(name="gate", level=logging.INFO)
+
+
+async def migrate_snapshots(args: argparse.Namespace):
+    """로그 문서에 들어 있는 스냅샷을 blob 저장소로 이전"""
+    result = await migrate_embedded_snapshots(
+        batch_size=args.batch_size,
+        limit=args.limit,
+        dry_run=args.dry_run,
+    )
+    logger.info(f"스냅샷 이전 완료{' (dry-run)' if args.dry_run else ''}: {result}")
+
+
+async def sweep_logs(args: argparse.Namespace):
+    """보관 기간이 지난 로그/스냅샷 정리 1회 실행"""
+    result = await sweep_once()
+    logger.info(f"보관 기간 정리 완료: {result}")
+
+
+async def convert_log_capped(args: argparse.Namespace):
+    """로그 컬렉션을 capped collection으로 변환 (변환 시 삭제되는 인덱스는 다시 생성)"""
+    command = await convert_to_capped()
+    await ensure_indexes()
+    logger.info(f"capped 변환 완료: {command}")
+
+
+async def check_indexes(args: argparse.Namespace):
+    """등록된 쿼리 패턴의 실행 계획 점검 (COLLSCAN이 있으면 종료 코드 1)"""
+    results = await check_query_plans()
+    for result in results:
+        status = "COLLSCAN" if result["collscan"] else "OK"
+        logger.info(f"[{status}] {result['name']} ({result['collection']}): {' <- '.join(result['stages'])}")
+    if any(result["collscan"] for result in results):
+        logger.error("인덱스를 사용하지 않는 쿼리가 있습니다")
+        return 1
+    return 0
+
+
+async def backfill_regdate_command(args: argparse.Namespace):
+    result = await backfill_regdate(batch_size=args.batch_size, limit=args.limit)
+    logger.info(f"regdate 변환 완료: {result}")
+
+
+async def rebuild_stats_command(args: argparse.Namespace):
+    result = await rebuild_stats(batch_size=args.batch_size, since=args.since, include_today=args.include_today)
+    logger.info(f"통계 재계산 완료: {result}")
+
+
+async def _read_chunks(path: str, size: int = 1 << 16):
+    """파일(-이면 표준 입력)을 조각으로 읽음"""
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+async def import_users_command(args: argparse.Namespace):
+    """JSON/CSV 파일의 사용자를 user_id 기준으로 일괄 생성/수정 (오류가 있으면 종료 코드 1)"""
+    format = args.format or ("csv" if args.path.lower().endswith(".csv") else "json")
+    result = await import_users(_read_chunks(args.path), format=format, dry_run=args.dry_run, batch_size=args.batch_size)
+    for change in result.get("changes", []):
+        print(json.dumps(change, ensure_ascii=False, default=str))
+    for error in result["errors"]:
+        logger.error(f"레코드 {error['record']} ({error['user_id']}): {error['error']}")
+    if result.get("aborted"):
+        logger.error(f"가져오기 중단: {result['aborted']}")
+    summary = {name: result[name] for name in ("records", "created", "updated", "unchanged", "failed")}
+    logger.info(f"사용자 가져오기 완료{' (dry-run)' if args.dry_run else ''}: {summary}")
+    return 1 if result["errors"] or result.get("aborted") else 0
+
+
+async def export_users_command(args: argparse.Namespace):
+    """사용자 전체를 파일(생략하면 표준 출력)로 내보내기"""
+    format = args.format or (os.path.splitext(args.output or "")[1].lstrip(".").lower() if args.output else "") or "ndjson"
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        async for text in export_users(format=format, batch_size=args.batch_size):
+            output.write(text)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+COMMANDS = {
+    "migrate-snapshots": migrate_snapshots,
+    "sweep-logs": sweep_logs,
+    "convert-log-capped": convert_log_capped,
+    "check-indexes": check_indexes,
+    "backfill-regdate": backfill_regdate_command,
+    "rebuild-stats": rebuild_stats_command,
+    "import-users": import_users_command,
+    "export-users": export_users_command,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Gate 관리 명령")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate-snapshots", help="로그 문서의 스냅샷을 blob 저장소로 이전")
+    migrate.add_argument("--batch-size", type=int, default=100, help="한 번에 처리할 로그 수")
+    migrate.add_argument("--limit", type=int, default=None, help="최대 처리 로그 수")
+    migrate.add_argument("--dry-run", action="store_true", help="저장하지 않고 대상만 집계")
+
+    subparsers.add_parser("sweep-logs", help="보관 기간이 지난 로그/스냅샷 정리 (LOG_RETENTION)")
+    subparsers.add_parser("convert-log-capped", help="로그 컬렉션을 capped collection으로 변환 (LOG_RETENTION.capped_*)")
+    subparsers.add_parser("check-indexes", help="등록된 쿼리의 실행 계획에서 COLLSCAN 점검 (explain)")
+
+    backfill = subparsers.add_parser("backfill-regdate", help="문자열로 저장된 로그 regdate를 datetime으로 변환")
+    backfill.add_argument("--batch-size", type=int, default=1000, help="한 번에 변환할 로그 수")
+    backfill.add_argument("--limit", type=int, default=None, help="최대 처리 로그 수")
+
+    rebuild = subparsers.add_parser("rebuild-stats", help="로그에서 출입 통계(rollup)를 다시 계산")
+    rebuild.add_argument("--batch-size", type=int, default=1000, help="한 번에 읽을 로그 수")
+    rebuild.add_argument("--since", type=datetime.fromisoformat, default=None, help="이 날짜부터 다시 계산 (생략하면 전체)")
+    rebuild.add_argument("--include-today", action="store_true", help="오늘 통계도 다시 계산 (실행 중 저장된 로그는 누락될 수 있음)")
+
+    import_parser = subparsers.add_parser("import-users", help="JSON/CSV 파일의 사용자를 일괄 생성/수정 (user_id 기준 upsert)")
+    import_parser.add_argument("path", help="가져올 파일 (-이면 표준 입력)")
+    import_parser.add_argument("--format", choices=IMPORT_FORMATS, default=None, help="파일 형식 (생략하면 확장자로 판단)")
+    import_parser.add_argument("--batch-size", type=int, default=500, help="한 번에 저장할 사용자 수")
+    import_parser.add_argument("--dry-run", action="store_true", help="저장하지 않고 바뀌는 내용만 출력")
+
+    export_parser = subparsers.add_parser("export-users", help="사용자 전체를 JSON/CSV로 내보내기")
+    export_parser.add_argument("--output", default=None, help="저장할 파일 (생략하면 표준 출력)")
+    export_parser.add_argument("--format", choices=list(EXPORT_FORMATS), default=None, help="파일 형식 (생략하면 확장자로 판단, 기본 ndjson)")
+    export_parser.add_argument("--batch-size", type=int, default=500, help="한 번에 읽을 사용자 수")
+
+    return parser
+
+
+async def run(args: argparse.Namespace) -> int:
+    await connect_to_mongo()
+    try:
+        return await COMMANDS[args.command](args) or 0
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(build_parser().parse_args())))
@@ -0,0 +1,87 @@
+"""
+관리/모니터링 API 라우터
+"""
+from fastapi import APIRouter, Depends
+
+from routers.deps import validate_api_key
+from services.user_service import user_cache_stats
+from services.camera_client import camera_client_stats
+from services.camera_service import snapshot_cache
+from services.stream_service import stream_stats
+from services.frame_buffer import capture_stats
+from services.event_queue import event_queue
+from services.do_scheduler import do_scheduler_stats
+from services.retention_service import retention_stats
+from services.dedup_service import dedup_stats
+from services.plate_service import plate_stats
+from utils.metrics import query_metrics
+
+
+# 모든 관리 API는 API 키 필요
+router = APIRouter(dependencies=[Depends(validate_api_key)])
+
+
+@router.get("/admin/cameras")
+async def cameras_stats():
+    """카메라별 상태 (circuit breaker, 성공률, 지연 시간, X-Token 세션)"""
+    return camera_client_stats()
+
+
+@router.get("/admin/snapshot-cache")
+async def snapshot_cache_stats():
+    """스냅샷 캐시 적중/미스/합쳐진 요청 수 조회"""
+    return snapshot_cache.stats()
+
+
+@router.get("/admin/streams")
+async def streams_stats():
+    """카메라별 라이브 스트림 시청자/캡처 현황"""
+    return stream_stats()
+
+
+@router.get("/admin/capture")
+async def capture_workers_stats():
+    """카메라별 백그라운드 캡처 워커/링 버퍼 현황"""
+    return capture_stats()
+
+
+@router.get("/admin/event-queue")
+async def event_queue_stats():
+    """이벤트 로그 큐 적재/저장/스풀 현황"""
+    return event_queue.stats()
+
+
+@router.get("/admin/do")
+async def do_stats():
+    """출력 카메라별 DO 명령 큐 깊이/합쳐진 trigger 수/지연 시간"""
+    return do_scheduler_stats()
+
+
+@router.get("/admin/metrics")
+async def metrics():
+    """API 호출별 MongoDB 쿼리 수 (호출당 평균/최근/최대)"""
+    return query_metrics()
+
+
+@router.get("/admin/retention")
+async def retention():
+    """로그 보관 방식/기간과 정리 현황"""
+    return retention_stats()
+
+
+@router.get("/admin/dedup")
+async def snapshot_dedup_stats():
+    """스냅샷 중복 제거 현황 (고유 이미지/참조 수, 중복 비율, 절약한 용량)"""
+    return await dedup_stats()
+
+
+@router.get("/admin/user-cache")
+async def user_cache():
+    """사용자(api_key) 캐시 적중률과 무효화 방식 (change stream / ttl)"""
+    return user_cache_stats()
+
+
+@router.get("/admin/plates")
+async def plates_stats():
+    """차량번호 색인 크기/갱신 횟수와 LPR 이벤트 처리 결과별 건수"""
+    return plate_stats()
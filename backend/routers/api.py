@@ -1,10 +1,26 @@
 from fastapi import APIRouter, HTTPException, Request, Query
-from fastapi.responses import HTMLResponse
-from typing import Optional
+from fastapi.responses import HTMLResponse, Response, FileResponse, StreamingResponse
+from typing import Optional, List, AsyncIterator
 from datetime import datetime
+import csv
+import io
+import json
 from models import LoginRequest
-from services.user_service import authenticate_user
-from services.log_service import get_logs, get_log_count
+from config import config_data
+from services.user_service import authenticate_user, get_user_by_api_key
+from services.log_service import (
+    get_logs,
+    get_log_count,
+    get_embedded_snapshot,
+    encode_cursor,
+    search_logs,
+    iter_logs,
+    encode_search_cursor,
+    format_regdate,
+)
+from services.blob_store import blob_store, is_valid_key
+from services.thumbnail_service import pick_thumbnail
+from utils.metrics import track_queries
 
 
 router = APIRouter()
@@ -12,32 +28,232 @@ router = APIRouter()
 
 
 
+# blob key는 내용의 sha256이므로 같은 URL의 이미지는 바뀌지 않음
+_IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def _snapshot_url(request: Request, log: dict, thumbnail: bool = False) -> Optional[str]:
+    """로그의 스냅샷 이미지 URL (thumbnail이면 썸네일 우선, 이미지가 없으면 None)"""
+    snapshot_ref = (pick_thumbnail(log.get("thumbnails")) if thumbnail else None) or log.get("snapshot_ref")
+    if snapshot_ref:
+        return request.url_for("get_snapshot_blob", key=snapshot_ref["key"]).path
+    if log.get("has_snapshot"):
+        return request.url_for("get_log_snapshot", log_id=str(log["_id"])).path
+    return None
+
+
+def _log_item(request: Request, log: dict, full: bool = False) -> dict:
+    """로그 목록/검색 응답 항목"""
+    return {
+        "regdate": format_regdate(log.get("regdate")),
+        "user_id": log.get("user_id"),
+        "user_name": log.get("user_name"),
+        "eventinfo": log.get("eventinfo", {}),
+        "snapshot": _snapshot_url(request, log, thumbnail=not full),
+        "snapshot_full": _snapshot_url(request, log),
+        "user_agent": log.get("user_agent"),
+        "cam_name": log.get("cam_name"),
+        "cam_no": log.get("cam_no", 0)
+    }
+
+
+async def _validate_api_key(api_key: str):
+    """API 키 검증 헬퍼 함수"""
+    if not api_key:
+        raise HTTPException(status_code=401, detail="API key is required")
+
+    user = await get_user_by_api_key(api_key)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return user
+
+
+def _local_datetime(value: Optional[datetime]) -> Optional[datetime]:
+    """시간대가 없는 입력은 서버 로컬 시각으로 해석"""
+    if value is not None and value.tzinfo is None:
+        return value.astimezone()
+    return value
+
+
 @router.get("/logs")
 async def list_log(
+    request: Request,
     page: int = Query(1, ge=1),
     offset: int = Query(20, ge=1, le=100),
-    api_key: Optional[str] = Query(None)
+    api_key: Optional[str] = Query(None),
+    full: bool = Query(False, description="snapshot에 썸네일 대신 원본 이미지 URL 사용"),
+    before: Optional[str] = Query(None, description="이 커서보다 오래된 로그 (next_cursor)"),
+    after: Optional[str] = Query(None, description="이 커서보다 최근 로그 (prev_cursor)")
 ):
-    """로그 목록 조회"""
-    logs = await get_logs(page=page, offset=offset)
-    total = await get_log_count()
+    """로그 목록 조회 (snapshot은 기본적으로 썸네일 URL, snapshot_full은 원본 URL)
+
+    before/after 커서를 쓰면 페이지 깊이와 관계없이 같은 비용으로 조회 (page는 기존 호환용)
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+
+    with track_queries("/logs"):
+        try:
+            logs = await get_logs(page=page, offset=offset, before=before, after=after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        total = await get_log_count()
+
+    full_page = len(logs) == offset
+    has_older = full_page if not after else True
+    has_newer = full_page if after else (before is not None or page > 1)
     
     return {
-        "logs": [{
-            "regdate": log.get("regdate").isoformat() if isinstance(log.get("regdate"), datetime) else log.get("regdate"),
-            "user_id": log.get("user_id"),
-            "user_name": log.get("user_name"),
-            "eventinfo": log.get("eventinfo", {}),
-            "snapshot": log.get("snapshot"),
-            "user_agent": log.get("user_agent"),
-            "cam_no": log.get("cam_no", 0)
-        } for log in logs],
+        "logs": [_log_item(request, log, full) for log in logs],
         "page": page,
         "offset": offset,
-        "total": total
+        "total": total,
+        # 다음(오래된) / 이전(최근) 페이지 커서
+        "next_cursor": encode_cursor(logs[-1]) if logs and has_older else None,
+        "prev_cursor": encode_cursor(logs[0]) if logs and has_newer else None
+    }
+
+
+@router.get("/logs/search")
+async def search_log(
+    request: Request,
+    api_key: Optional[str] = Query(None),
+    user_id: Optional[str] = Query(None),
+    mode: Optional[str] = Query(None, description="eventinfo.mode (open/exit/snapshot)"),
+    cam_name: Optional[str] = Query(None),
+    ip: Optional[str] = Query(None, description="eventinfo.ip"),
+    since: Optional[datetime] = Query(None, description="이 시각 이후 (ISO 8601, 시간대가 없으면 서버 시각)"),
+    until: Optional[datetime] = Query(None, description="이 시각 이전 (포함하지 않음)"),
+    limit: int = Query(50, ge=1, le=500),
+    full: bool = Query(False, description="snapshot에 썸네일 대신 원본 이미지 URL 사용"),
+    before: Optional[str] = Query(None, description="이 커서보다 오래된 로그 (next_cursor)")
+):
+    """조건으로 로그 검색 (최신순, 조건별 복합 인덱스 사용)"""
+    await _validate_api_key(api_key)
+    since, until = _local_datetime(since), _local_datetime(until)
+    if since and until and since >= until:
+        raise HTTPException(status_code=400, detail="since must be earlier than until")
+
+    filters = {"user_id": user_id, "mode": mode, "cam_name": cam_name, "ip": ip}
+    with track_queries("/logs/search"):
+        try:
+            logs = await search_logs(filters, since=since, until=until, limit=limit, before=before)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "logs": [_log_item(request, log, full) for log in logs],
+        "limit": limit,
+        "next_cursor": encode_search_cursor(logs[-1]) if len(logs) == limit else None
     }
 
 
+# CSV 내보내기 열 (snapshots=true이면 snapshot 열 추가)
+_EXPORT_COLUMNS = ["regdate", "user_id", "user_name", "mode", "ip", "cam_name", "user_agent"]
+_EXPORT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _export_record(request: Request, log: dict, snapshots: bool) -> dict:
+    eventinfo = log.get("eventinfo") or {}
+    record = {
+        "regdate": format_regdate(log.get("regdate")),
+        "user_id": log.get("user_id"),
+        "user_name": log.get("user_name"),
+        "mode": eventinfo.get("mode"),
+        "ip": eventinfo.get("ip"),
+        "cam_name": log.get("cam_name"),
+        "user_agent": log.get("user_agent"),
+    }
+    if snapshots:
+        record["snapshot"] = _snapshot_url(request, log)
+    return record
+
+
+def _csv_text(rows: List[list]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def _export_stream(request: Request, batches: AsyncIterator[List[dict]], format: str, snapshots: bool):
+    """배치 단위로 직렬화하여 전송 (StreamingResponse가 보낸 뒤에야 다음 배치를 읽음)"""
+    columns = _EXPORT_COLUMNS + (["snapshot"] if snapshots else [])
+    if format == "csv":
+        # Excel에서 한글이 깨지지 않도록 BOM 추가
+        yield "\ufeff" + _csv_text([columns])
+    async for batch in batches:
+        records = [_export_record(request, log, snapshots) for log in batch]
+        if format == "csv":
+            yield _csv_text([[record[column] for column in columns] for record in records])
+        else:
+            yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+
+@router.get("/logs/export")
+async def export_log(
+    request: Request,
+    api_key: Optional[str] = Query(None),
+    format: str = Query("ndjson", description="ndjson 또는 csv"),
+    user_id: Optional[str] = Query(None),
+    mode: Optional[str] = Query(None, description="eventinfo.mode (open/exit/snapshot)"),
+    cam_name: Optional[str] = Query(None),
+    ip: Optional[str] = Query(None, description="eventinfo.ip"),
+    since: Optional[datetime] = Query(None, description="이 시각 이후 (ISO 8601, 시간대가 없으면 서버 시각)"),
+    until: Optional[datetime] = Query(None, description="이 시각 이전 (포함하지 않음)"),
+    snapshots: bool = Query(False, description="스냅샷 원본 이미지 URL 포함")
+):
+    """검색 조건에 맞는 로그 전체를 NDJSON/CSV로 내려받기 (커서에서 배치 단위로 스트리밍)"""
+    await _validate_api_key(api_key)
+    if format not in _EXPORT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Invalid format: {format}. Supported: ndjson, csv")
+    since, until = _local_datetime(since), _local_datetime(until)
+    if since and until and since >= until:
+        raise HTTPException(status_code=400, detail="since must be earlier than until")
+
+    filters = {"user_id": user_id, "mode": mode, "cam_name": cam_name, "ip": ip}
+    batch_size = config_data.get('LOG_EXPORT', {}).get('batch_size', 500)
+    batches = iter_logs(filters, since=since, until=until, batch_size=batch_size)
+    filename = f"gate_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        _export_stream(request, batches, format, snapshots),
+        media_type=_EXPORT_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/snapshots/{key}", name="get_snapshot_blob")
+async def get_snapshot_blob(key: str):
+    """blob 저장소의 스냅샷 이미지 (disk 저장소는 파일을 그대로 전송)"""
+    if not is_valid_key(key):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+
+    headers = {"ETag": f'"{key}"', "Cache-Control": _IMMUTABLE_CACHE}
+    path = blob_store.path(key)
+    if path is not None:
+        accel_prefix = config_data.get('BLOB_STORE', {}).get('accel_redirect')
+        if accel_prefix:
+            # nginx가 파일을 직접 sendfile로 전송 (X-Accel-Redirect)
+            relative = path.relative_to(blob_store.root).as_posix()
+            headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{relative}"
+            return Response(media_type="image/jpeg", headers=headers)
+        return FileResponse(path, media_type="image/jpeg", headers=headers)
+
+    stream = await blob_store.stream(key)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return StreamingResponse(stream, media_type="image/jpeg", headers=headers)
+
+
+@router.get("/logs/{log_id}/snapshot", name="get_log_snapshot")
+async def get_log_snapshot(log_id: str):
+    """blob 저장소로 옮기기 전 로그 문서에 들어 있는 스냅샷 이미지"""
+    data = await get_embedded_snapshot(log_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return Response(content=data, media_type="image/jpeg", headers={"Cache-Control": "private, max-age=3600"})
+
+
 @router.post("/login")
 async def login(body: LoginRequest):
     """사용자 ID와 password로 로그인하여 API 키 반환"""
@@ -0,0 +1,83 @@
+"""
+카메라 영상 API 라우터
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional
+from email.utils import parsedate_to_datetime
+
+from config import config_data
+from routers.deps import validate_api_key
+from services.camera_service import get_frame
+from services.snapshot_cache import Frame
+from services.stream_service import mjpeg_frames, viewer_fps, BOUNDARY
+
+
+router = APIRouter()
+
+
+def _validate_camera(cam_name: str):
+    if cam_name not in config_data.get("CAMERAS", {}):
+        raise HTTPException(status_code=404, detail=f"Unknown camera: {cam_name}")
+
+
+def _not_modified(request: Request, frame: Frame) -> bool:
+    """If-None-Match / If-Modified-Since 조건부 요청 확인"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or frame.etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # Last-Modified는 초 단위이므로 같은 초 안의 프레임은 변경 없음으로 판단
+        return int(frame.captured_at) <= since
+
+    return False
+
+
+@router.get("/cameras/{cam_name}/snapshot.jpg", dependencies=[Depends(validate_api_key)])
+async def camera_snapshot(
+    cam_name: str,
+    request: Request
+):
+    """JPEG 스냅샷 (ETag / Last-Modified 조건부 GET 지원)"""
+    _validate_camera(cam_name)
+
+    frame = await get_frame(cam_name)
+    if frame is None:
+        raise HTTPException(status_code=503, detail=f"Snapshot unavailable: {cam_name}")
+
+    headers = {
+        "ETag": frame.etag,
+        "Last-Modified": frame.last_modified,
+        # 캐시는 허용하되 매번 재검증
+        "Cache-Control": "private, no-cache",
+    }
+    if _not_modified(request, frame):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=frame.data, media_type="image/jpeg", headers=headers)
+
+
+@router.get("/cameras/{cam_name}/stream", dependencies=[Depends(validate_api_key)])
+async def camera_stream(
+    cam_name: str,
+    fps: Optional[float] = Query(None, gt=0, description="시청자별 최대 프레임 수 (초당)")
+):
+    """MJPEG(multipart/x-mixed-replace) 라이브 스트림"""
+    _validate_camera(cam_name)
+
+    return StreamingResponse(
+        mjpeg_frames(cam_name, viewer_fps(fps)),
+        media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+        headers={
+            "Cache-Control": "no-cache, no-store",
+            # nginx 프록시 버퍼링 비활성화
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -0,0 +1,18 @@
+"""
+라우터 공통 의존성
+"""
+from fastapi import HTTPException, Query
+
+from services.user_service import get_user_by_api_key
+
+
+async def validate_api_key(api_key: str = Query(..., description="API 키")) -> dict:
+    """API 키 검증 (Depends로 사용, 키에 해당하는 사용자 반환)"""
+    if not api_key:
+        raise HTTPException(status_code=401, detail="API key is required")
+
+    user = await get_user_by_api_key(api_key)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return user
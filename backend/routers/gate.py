@@ -2,18 +2,22 @@
 Gate 관련 API 라우터
 """
 from fastapi import APIRouter, HTTPException, Request, Query
-from typing import Optional
-import base64
+from typing import Optional, List, Tuple
+import hmac
+import math
+import time
 from urllib.parse import unquote, parse_qs
 from models import OpenDoorRequest, SnapshotRequest
-from services.user_service import (
-    get_user_by_api_key,
-    valid_datetime
-)
-from services.camera_service import get_snapshot, put_do
-from services.log_service import update_log
+from services.user_service import get_user_by_api_key
+from services.schedule_service import user_can_access
+from services.camera_service import get_snapshot, get_gallery, put_do
+from services.camera_client import is_camera_available
+from services.event_queue import submit_event
+from services.plate_service import plate_index, plate_cooldown, lpr_counters
 from config import config_data
+from utils.logger import get_logger
 
+logger = get_logger()
 
 router = APIRouter()
 
@@ -30,20 +34,12 @@ async def gate_handler(request: Request, body: dict):
     
     # action에 따라 적절한 함수 호출
     if action == "ready":
-        user = await get_user_by_api_key(api_key)
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid API key")
-
+        # 검증에서 조회한 사용자 그대로 사용
         user_valid = True
         if user.get("flag") != "y":
             user_valid = False
 
-        if not valid_datetime(
-                user.get("date_from", "0000-00-00"), 
-                user.get("date_to", "0000-00-00"), 
-                user.get("hour_from", 0), 
-                user.get("hour_to", 0)
-            ):
+        if not user_can_access(user):
             user_valid = False
 
         print ("user_valid", user_valid)
@@ -51,14 +47,19 @@ async def gate_handler(request: Request, body: dict):
             "user_id": user.get("user_id"),
             "user_name": user.get("name"),
             "valid": user_valid,
-            "camera_list": [name for name in config_data.get("CAMERAS", {}).keys()]
+            # circuit이 열린(응답 없는) 카메라는 목록에서 제외
+            "camera_list": [name for name in config_data.get("CAMERAS", {}).keys() if is_camera_available(name)]
         }        
 
     elif action == "open":
+        trigger_ts = time.time()
         ret = await open_action(api_key, user)
 
+        if ret and _is_duplicate(ret, user):
+            # 같은 사용자의 연속 요청이 진행 중인 펄스에 합쳐진 경우 로그 중복 기록 안 함
+            return {"message": "opened OK"}
+
         if ret: 
-            snapshot = await get_snapshot(cam_name="main")
             # 서버에서 가져온 정보
             client_ip = request.client.host if request and request.client else "unknown"
             server_user_agent = request.headers.get("user-agent", "unknown") if request else "unknown"
@@ -81,7 +82,9 @@ async def gate_handler(request: Request, body: dict):
             }
             print(eventinfo)        
 
-            await update_log(user_id=user.get("user_id"), eventinfo=eventinfo, snapshot=snapshot, user_agent=client_user_agent)
+            # 스냅샷과 로그 저장은 응답 이후 이벤트 큐에서 처리
+            submit_event(user_id=user.get("user_id"), eventinfo=eventinfo, user_agent=client_user_agent,
+                         cam_name="main", timestamp=trigger_ts)
             return {"message": "opened OK"}
 
         return {"message": "Fail to open"}
@@ -92,6 +95,10 @@ async def gate_handler(request: Request, body: dict):
         cam_name = data.get("cam_name", "main")
         return await get_snapshot(cam_name=cam_name)
     
+    elif action == "gallery":
+        # 여러 카메라 스냅샷을 동시에 (cam_names 생략 시 전체)
+        cam_names, timeout = _gallery_params(data)
+        return await get_gallery(cam_names=cam_names, timeout=timeout)
 
     
     elif action == "exit":
@@ -100,7 +107,7 @@ async def gate_handler(request: Request, body: dict):
     else:
         raise HTTPException(
             status_code=400, 
-            detail=f"Invalid action: {action}. Supported actions: 'ready', 'open', 'snapshot', 'exit'"
+            detail=f"Invalid action: {action}. Supported actions: 'ready', 'open', 'snapshot', 'gallery', 'exit'"
         )
 
 
@@ -120,16 +127,19 @@ async def exit(
     if not user or user_id != "vivasejin":
         raise HTTPException(status_code=401, detail="check api_key")
 
+    trigger_ts = time.time()
     ret = await open_action(api_key, user)
     # ret = True
+    if ret and _is_duplicate(ret, user):
+        return {"message": "opened"}
     if ret:
-        snapshot = await get_snapshot(cam_name="sub1")
         eventinfo = {
             "ip": "external",
             "mode": mode or "exit",
             "api_key": api_key
         }
-        await update_log(user_id=user_id, eventinfo=eventinfo, snapshot=snapshot, user_agent="external_camera")
+        submit_event(user_id=user_id, eventinfo=eventinfo, user_agent="external_camera",
+                     cam_name="sub1", timestamp=trigger_ts)
         return {"message": "opened"}
     
     else:
@@ -148,49 +158,90 @@ async def _validate_api_key(api_key: str):
     return user
 
 
+def _gallery_params(data: dict) -> Tuple[Optional[List[str]], Optional[float]]:
+    """gallery action의 cam_names/timeout 검증 (cam_names는 문자열 하나도 허용)"""
+    cam_names = data.get("cam_names")
+    if isinstance(cam_names, str):
+        cam_names = [cam_names]
+    if cam_names is not None and (
+        not isinstance(cam_names, list) or not all(isinstance(name, str) for name in cam_names)
+    ):
+        raise HTTPException(status_code=400, detail="cam_names must be a list of camera names")
+
+    timeout = data.get("timeout")
+    if timeout is not None:
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not math.isfinite(timeout):
+            raise HTTPException(status_code=400, detail="timeout must be a number of seconds")
+        # 범위(0 ~ GALLERY.max_timeout)는 get_gallery에서 제한
+        timeout = float(timeout)
+    return cam_names, timeout
+
+
 async def open_action(api_key: str, user: dict):
     print ("open_action: ", user, api_key)
     """문 열기"""
     if user.get("flag") != "y":
         raise HTTPException(status_code=403, detail="Not valid auth, contact admin")
     
-    if not valid_datetime(user.get("date_from", "0000-00-00"), user.get("date_to", "0000-00-00"), 
-                          user.get("hour_from", 0), user.get("hour_to", 0)):
+    if not user_can_access(user):
         raise HTTPException(status_code=403, detail="Not valid datetime, contact admin")
     
-    # 문 열기 (1초)
-    ret = await put_do(cam_name="main", secs=1)
+    # 문 열기 (1초), 동작 중인 펄스가 있으면 그 결과를 공유
+    ret = await put_do(cam_name="main", secs=1, requester=user.get("user_id"))
     if ret:
-        return True
+        return ret
     
     return False
 
 
+def _is_duplicate(ret, user: dict) -> bool:
+    """같은 사용자의 요청이 이미 보낸 펄스에 합쳐졌는지 확인"""
+    return ret.coalesced and ret.requester == user.get("user_id")
+
+
 async def exit_action(request: Optional[Request], api_key: str, user: dict):
     """외부 카메라에서 문 열기"""
     user_id = user.get("user_id") if user else None
     if not user or user_id != "vivasejin":
         raise HTTPException(status_code=401, detail="check api_key")
     
-    ret = await put_do(cam_name="main", secs=1)
+    trigger_ts = time.time()
+    ret = await put_do(cam_name="main", secs=1, requester=user_id)
+    if ret and _is_duplicate(ret, user):
+        return {"message": "opened"}
     if ret:
-        # 로그 기록
-        snapshot = await get_snapshot(cam_name="sub1")
+        # 로그 기록 (이벤트 큐)
         eventinfo = {
             "ip": "external",
             "mode": "exit",
             "api_key": api_key
         }
-        await update_log(
+        submit_event(
             user_id=user_id,
             eventinfo=eventinfo,
             user_agent="external_camera",
-            snapshot=snapshot,
+            cam_name="sub1",
+            timestamp=trigger_ts,
         )
         return {"message": "opened"}
     else:
         raise HTTPException(status_code=500, detail="Failed to open")
 
+
+async def _read_snapshot(request: Request) -> Optional[bytes]:
+    """multipart로 함께 보낸 snapshot 파일 (없으면 None, /snapshot과 /lpr에서 사용)"""
+    if not request.headers.get("content-type", "").startswith("multipart/"):
+        return None
+    try:
+        form = await request.form()
+        snapshot_file = form.get("snapshot")
+        return await snapshot_file.read() if snapshot_file else None
+    except Exception as e:
+        # Form data가 없거나 파일이 없는 경우 정상적으로 처리
+        logger.warning(f"Form data 처리 오류 (무시 가능): {e!r}")
+        return None
+
+
 @router.post("/snapshot")
 async def store_snapshot(request: Request):
     """스냅샷 저장 API (POST 방식으로 eventinfo와 snapshot 파일 받기)"""
@@ -206,22 +257,93 @@ async def store_snapshot(request: Request):
         # parse_qs는 리스트를 반환하므로 첫 번째 값 사용
         eventinfo[key] = value_list[0] if value_list else ""
 
-    # Snapshot 파일 처리
-    snapshot_data = ""
-    try:
-        form = await request.form()
-        snapshot_file = form.get("snapshot")
-        if snapshot_file:
-            # 파일 읽기
-            file_content = await snapshot_file.read()
-            # Base64 인코딩 및 data URI 형식으로 변환
-            snapshot_base64 = base64.b64encode(file_content).decode('utf-8')
-            snapshot_data = f"data:image/jpg;base64,{snapshot_base64}"
-    except Exception as e:
-        # Form data가 없거나 파일이 없는 경우 정상적으로 처리
-        print(f"Form data 처리 오류 (무시 가능): {e}")
-    
-    # 로그 업데이트
-    await update_log(user_id="snapshot", eventinfo=eventinfo, snapshot=snapshot_data, user_agent='snapshot')
+    # Snapshot 파일 처리 (이미지는 이벤트 큐에서 blob 저장소에 저장)
+    snapshot_data = await _read_snapshot(request)
+
+    # 로그 업데이트 (이벤트 큐)
+    submit_event(user_id="snapshot", eventinfo=eventinfo, snapshot=snapshot_data, user_agent='snapshot')
     return {"message": "snapshot stored OK"}
 
+
+
+def _validate_lpr_token(token: Optional[str]):
+    """LPR 카메라 토큰 검증 (LPR.token이 비어 있으면 사용 불가)"""
+    expected = config_data.get('LPR', {}).get('token')
+    if not expected:
+        raise HTTPException(status_code=403, detail="LPR is not configured")
+    if not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=401, detail="Invalid LPR token")
+
+
+@router.post("/lpr")
+async def lpr_event(
+    request: Request,
+    plate: str = Query(..., description="인식된 차량번호"),
+    token: Optional[str] = Query(None, description="LPR.token"),
+    cam_name: Optional[str] = Query(None, description="번호를 인식한 카메라 (로그 스냅샷용)"),
+    confidence: Optional[float] = Query(None, description="인식 신뢰도")
+):
+    """LPR 카메라의 차량번호 인식 이벤트 (등록된 차량이면 출입 가능 시간 확인 후 문 열기)
+
+    snapshot 파일을 multipart로 함께 보내면 로그 스냅샷으로 저장 (없으면 cam_name 카메라 프레임)
+    같은 사용자는 LPR.cooldown초 동안 한 번만 문을 열고 로그를 남김
+    """
+    _validate_lpr_token(token)
+    lpr = config_data.get('LPR', {})
+    cam_name = cam_name or lpr.get('snapshot_camera', 'main')
+    if cam_name not in config_data.get("CAMERAS", {}):
+        raise HTTPException(status_code=400, detail=f"Invalid cam_name: {cam_name}")
+
+    trigger_ts = time.time()
+    lpr_counters["events"] += 1
+    result = plate_index.match(plate)
+    if not result:
+        reason = "ambiguous" if result.ambiguous else "unknown"
+        lpr_counters[reason] += 1
+        if plate_cooldown.acquire((reason, result.plate)):
+            logger.info(f"LPR {reason}: {plate} ({result.plate})")
+        return {"result": reason, "plate": result.plate}
+
+    user = result.user
+    user_id = user.get("user_id")
+    response = {"plate": result.plate, "matched": result.matched, "distance": result.distance, "user_id": user_id}
+    if result.distance:
+        # 편집 거리로 찾은 번호는 미등록 차량일 수 있으므로 기록만 하고 열지 않음
+        lpr_counters["fuzzy"] += 1
+        if plate_cooldown.acquire(("fuzzy", result.plate)):
+            logger.warning(f"LPR fuzzy (열지 않음): {plate} -> {result.matched} ({user_id})")
+        return {"result": "fuzzy", **response}
+    if user.get("flag") != "y" or not user_can_access(user):
+        lpr_counters["denied"] += 1
+        if plate_cooldown.acquire(("denied", user_id)):
+            logger.info(f"LPR denied: {plate} -> {user_id}")
+        return {"result": "denied", **response}
+
+    # 같은 차량이 여러 프레임에서 인식되어도 한 번만 처리
+    cooldown_key = ("open", user_id)
+    if not plate_cooldown.acquire(cooldown_key):
+        lpr_counters["duplicate"] += 1
+        return {"result": "duplicate", **response}
+
+    ret = await put_do(cam_name=lpr.get('gate_camera', 'main'), secs=lpr.get('pulse_secs', 1), requester=user_id)
+    if not ret:
+        plate_cooldown.release(cooldown_key)
+        lpr_counters["failed"] += 1
+        logger.warning(f"LPR 문 열기 실패: {plate} -> {user_id}")
+        raise HTTPException(status_code=500, detail="Failed to open")
+
+    lpr_counters["opened"] += 1
+    logger.info(f"LPR opened: {plate} -> {user_id}")
+    if not _is_duplicate(ret, user):
+        eventinfo = {
+            "ip": request.client.host if request.client else "unknown",
+            "mode": "open",
+            "source": "lpr",
+            "plate": result.plate,
+            "matched": result.matched,
+            "distance": result.distance,
+            "confidence": confidence
+        }
+        submit_event(user_id=user_id, eventinfo=eventinfo, user_agent="lpr",
+                     snapshot=await _read_snapshot(request), cam_name=cam_name, timestamp=trigger_ts)
+    return {"result": "opened", **response}
@@ -0,0 +1,66 @@
+"""
+출입 통계 API 라우터 (rollup 조회)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from datetime import datetime, timedelta
+
+from routers.deps import validate_api_key
+from services.user_service import get_user_names
+from services.stats_service import (
+    HOUR,
+    DAY,
+    BUCKETS,
+    MAX_POINTS,
+    get_stats,
+    get_user_stats,
+    points_between,
+)
+
+
+router = APIRouter()
+
+# 기간을 생략했을 때 조회 범위
+_DEFAULT_RANGE = {HOUR: timedelta(hours=24), DAY: timedelta(days=30)}
+
+
+def _format(value: datetime) -> str:
+    return value.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+
+
+@router.get("/stats", dependencies=[Depends(validate_api_key)])
+async def access_stats(
+    bucket: str = Query(HOUR, description="구간 단위 (hour/day)"),
+    since: Optional[datetime] = Query(None, description="이 시각 이후 (ISO 8601, 시간대가 없으면 서버 시각)"),
+    until: Optional[datetime] = Query(None, description="이 시각 이전 (포함하지 않음, 기본값: 현재)"),
+    user_id: Optional[str] = Query(None, description="특정 사용자 (생략하면 전체)"),
+    by_user: bool = Query(False, description="기간 내 사용자별 합계 (일 단위 기준)")
+):
+    """구간별 open/exit/snapshot 횟수와 open 대비 exit 비율 (rollup에서 조회)"""
+    if bucket not in BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Invalid bucket: {bucket}. Supported: {', '.join(BUCKETS)}")
+
+    until = (until or datetime.now()).astimezone()
+    since = (since or until - _DEFAULT_RANGE[bucket]).astimezone()
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be earlier than until")
+    if points_between(since, until, bucket) > MAX_POINTS[bucket]:
+        raise HTTPException(status_code=400, detail=f"Range too large: up to {MAX_POINTS[bucket]} {bucket} buckets")
+
+    if by_user:
+        users = await get_user_stats(since, until)
+        names = await get_user_names(user["user_id"] for user in users)
+        for user in users:
+            user["user_name"] = names.get(user["user_id"], "-")
+        return {"bucket": DAY, "since": _format(since), "until": _format(until), "users": users}
+
+    result = await get_stats(bucket, since, until, user_id=user_id)
+    for point in result["series"]:
+        point["start"] = _format(point["start"])
+    return {
+        "bucket": bucket,
+        "since": _format(since),
+        "until": _format(until),
+        "user_id": user_id,
+        **result,
+    }
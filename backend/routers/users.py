@@ -1,7 +1,9 @@
 """
 사용자 관련 API 라우터
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from typing import Optional
 from bson import ObjectId
 from datetime import datetime
@@ -11,8 +13,25 @@ from config import config_data
 from services.user_service import (
     get_user_by_api_key,
     get_all_users,
-    generate_api_key
+    generate_api_key,
+    invalidate_user_cache
 )
+from services.schedule_service import validate_schedule, SCHEDULE_FIELDS
+from services.user_bulk_service import import_users, export_users, IMPORT_FORMATS, EXPORT_FORMATS
+from services.user_sync_service import (
+    user_revisions,
+    ensure_user_revisions,
+    add_tombstone,
+    parse_fields,
+    user_list_item,
+    list_etag,
+    list_user_changes,
+    tombstone_horizon
+)
+
+
+# 출입 가능 시간 추가 설정 (요일별 시간대, 시간대, 휴일 출입 여부)
+_SCHEDULE_FIELDS = ("schedule", "timezone", "holiday_access")
 
 
 router = APIRouter()
@@ -50,6 +69,98 @@ async def users_handler(body: dict):
         )
 
 
+def _not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match 조건부 요청 확인"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+@router.get("/users")
+async def list_users_handler(
+    request: Request,
+    api_key: Optional[str] = Query(None),
+    since: int = Query(0, ge=0, description="이 revision 이후 변경만 (이전 응답의 revision, 0이면 전체)"),
+    limit: int = Query(200, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="응답 필드 (쉼표 구분, 생략하면 전체)")
+):
+    """사용자 목록 증분 조회 (revision 순, ETag/304 지원)
+
+    since=0이면 전체 목록을 limit명씩, 이후에는 since 이후 바뀐 사용자(users)와 삭제된 사용자(deleted)만 반환
+    has_more이면 응답의 revision을 since로 다시 요청
+    """
+    await _validate_api_key(api_key)
+    try:
+        field_list = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        if since == 0:
+            # 다른 경로로 추가되어 revision이 없는 사용자가 전체 목록에서 빠지지 않도록
+            await ensure_user_revisions()
+        watermark = await user_revisions.watermark()
+        horizon = await tombstone_horizon()
+        headers = {
+            "ETag": list_etag(watermark, since, limit, field_list, horizon),
+            "Cache-Control": "private, no-cache",
+        }
+        if _not_modified(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        result = await list_user_changes(
+            since=since, limit=limit, fields=field_list, watermark=watermark, horizon=horizon
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"List error: {str(e)}")
+    return JSONResponse(content=jsonable_encoder(result), headers=headers)
+
+
+def _bulk_batch_size() -> int:
+    return config_data.get('USER_IMPORT', {}).get('batch_size', 500)
+
+
+@router.post("/users/import")
+async def import_users_handler(
+    request: Request,
+    api_key: Optional[str] = Query(None),
+    format: str = Query("json", description="json (배열 또는 한 줄에 하나씩) 또는 csv"),
+    dry_run: bool = Query(False, description="저장하지 않고 바뀌는 내용만 확인")
+):
+    """요청 본문의 사용자 레코드를 user_id 기준으로 일괄 생성/수정 (본문은 스트림으로 읽어 batch 단위로 저장)
+
+    레코드별 오류는 errors로 보고하며, 형식 오류로 중단되면 400 (그 전 batch는 저장됨)
+    """
+    await _validate_api_key(api_key)
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format: {format}. Supported: {', '.join(IMPORT_FORMATS)}")
+
+    try:
+        result = await import_users(request.stream(), format=format, dry_run=dry_run, batch_size=_bulk_batch_size())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
+    return JSONResponse(content=jsonable_encoder(result), status_code=400 if result.get("aborted") else 200)
+
+
+@router.get("/users/export")
+async def export_users_handler(
+    api_key: Optional[str] = Query(None),
+    format: str = Query("ndjson", description="ndjson, json 또는 csv")
+):
+    """사용자 전체를 user_id 순으로 내려받기 (/users/import로 그대로 가져올 수 있음)"""
+    await _validate_api_key(api_key)
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format: {format}. Supported: {', '.join(EXPORT_FORMATS)}")
+
+    filename = f"users_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        export_users(format=format, batch_size=_bulk_batch_size()),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 async def _validate_api_key(api_key: str):
     """API 키 검증 헬퍼 함수"""
     if not api_key:
@@ -73,19 +184,7 @@ def _convert_flag(flag_value) -> str:
 async def list_users() -> list:
     """사용자 목록 조회"""
     users = await get_all_users()
-    return [{
-        "_id": str(user.get("_id")),
-        "user_id": user.get("user_id"),  # MongoDB의 "user_id" 필드
-        "regdate": user.get("regdate"),
-        "api_key": user.get("api_key"),
-        "date_from": user.get("date_from", "0000-00-00"),
-        "hour_from": user.get("hour_from", 0),
-        "date_to": user.get("date_to", "0000-00-00"),
-        "hour_to": user.get("hour_to", 0),
-        "flag": user.get("flag", "y"),
-        "name": user.get("name"),
-        "plates": user.get("plates") or user.get("plate") or []
-    } for user in users]
+    return [user_list_item(user) for user in users]
 
 
 async def create_user(data: dict) -> dict:
@@ -130,9 +229,18 @@ async def create_user(data: dict) -> dict:
             "plates": data.get("plates", []),
             "name": data.get("name")
         }
+        for field in _SCHEDULE_FIELDS:
+            if data.get(field) is not None:
+                user_doc[field] = data[field]
+        schedule_error = validate_schedule(user_doc)
+        if schedule_error:
+            raise HTTPException(status_code=400, detail=f"Invalid schedule: {schedule_error}")
         
         # MongoDB에 삽입
-        result = await collection.insert_one(user_doc)
+        async with user_revisions.allocate() as revision:
+            user_doc["revision"] = revision
+            result = await collection.insert_one(user_doc)
+        invalidate_user_cache(result.inserted_id)
         user_doc["_id"] = result.inserted_id
         
         # plate 필드도 추가 (일부 데이터와의 호환성)
@@ -198,22 +306,34 @@ async def modify_user(data: dict) -> dict:
             update_data["name"] = data.get("name")
         if "plates" in data:
             update_data["plates"] = data.get("plates", [])
+        for field in _SCHEDULE_FIELDS:
+            if field in data:
+                update_data[field] = data.get(field)
+        
+        schedule_changed = any(field in update_data for field in SCHEDULE_FIELDS)
+        schedule_error = validate_schedule({**existing_user_doc, **update_data}) if schedule_changed else None
+        if schedule_error:
+            raise HTTPException(status_code=400, detail=f"Invalid schedule: {schedule_error}")
         
         if not update_data:
             return {"message": "OK", "data": existing_user_doc}
         
         # 사용자 업데이트
-        result = await collection.find_one_and_update(
-            {"_id": ObjectId(_id)},
-            {"$set": update_data},
-            return_document=True
-        )
+        async with user_revisions.allocate() as revision:
+            result = await collection.find_one_and_update(
+                {"_id": ObjectId(_id)},
+                {"$set": {**update_data, "revision": revision}},
+                return_document=True
+            )
+        invalidate_user_cache(ObjectId(_id))
         
         if not result:
             raise HTTPException(status_code=500, detail="Update failed")
         
         return {"message": "OK"}
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid user ID format: {str(e)}")
     except Exception as e:
@@ -240,8 +360,12 @@ async def remove_user(data: dict) -> dict:
         if not existing_user_doc:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # 사용자 삭제
-        result = await collection.delete_one({"_id": ObjectId(_id)})
+        # 사용자 삭제 (증분 목록에 전달할 tombstone 기록)
+        async with user_revisions.allocate() as revision:
+            result = await collection.delete_one({"_id": ObjectId(_id)})
+            if result.deleted_count:
+                await add_tombstone(existing_user_doc, revision)
+        invalidate_user_cache(ObjectId(_id))
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=500, detail="Delete failed")
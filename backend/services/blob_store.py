@@ -0,0 +1,265 @@
+"""
+스냅샷 blob 저장소 모듈
+스냅샷 이미지를 로그 문서 밖에 저장하고, 로그에는 참조(key/size/hash)만 남김
+- disk: sha256 기반 content-addressed 로컬 파일 저장소 (sendfile로 바로 전송 가능)
+- gridfs: MongoDB GridFS 버킷
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import re
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, AsyncIterator
+
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+from config import config_data
+from database import get_database
+from utils.logger import get_logger
+
+logger = get_logger()
+
+_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def is_valid_key(key: str) -> bool:
+    """blob key 형식 확인 (sha256 hex)"""
+    return bool(_KEY_PATTERN.match(key or ''))
+
+
+def decode_data_uri(snapshot: Optional[str]) -> Optional[bytes]:
+    """'data:image/jpg;base64,...' 형식의 스냅샷을 바이트로 변환 (빈 값/형식 오류는 None)"""
+    if not snapshot:
+        return None
+    _, sep, payload = snapshot.partition(',')
+    try:
+        data = base64.b64decode(payload if sep else snapshot)
+    except (ValueError, TypeError):
+        return None
+    return data or None
+
+
+def make_ref(key: str, data: bytes, content_type: str = "image/jpeg") -> Dict[str, Any]:
+    """로그 문서에 저장할 스냅샷 참조"""
+    return {"key": key, "size": len(data), "hash": f"sha256:{key}", "content_type": content_type}
+
+
+class DiskBlobStore:
+    """content-addressed 로컬 파일 저장소 (<root>/ab/cd/<sha256>.jpg)"""
+
+    kind = "disk"
+
+    def __init__(self, root: str = "data/snapshots"):
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / f"{key}.jpg"
+
+    def _write(self, key: str, data: bytes):
+        path = self.path_for(key)
+        if path.exists():
+            # 같은 이미지는 다시 쓰지 않고 수정 시각만 갱신 (보관 기간 정리 기준)
+            os.utime(path)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 임시 파일에 쓴 뒤 rename하여 읽는 쪽에서 쓰다 만 파일을 보지 않도록 함
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    async def put(self, data: bytes) -> Dict[str, Any]:
+        key = hashlib.sha256(data).hexdigest()
+        await asyncio.to_thread(self._write, key, data)
+        return make_ref(key, data)
+
+    def path(self, key: str) -> Optional[Path]:
+        """파일 경로 반환 (없으면 None)"""
+        if not is_valid_key(key):
+            return None
+        path = self.path_for(key)
+        return path if path.is_file() else None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        if path is None:
+            return None
+        return await asyncio.to_thread(path.read_bytes)
+
+    async def stream(self, key: str) -> Optional[AsyncIterator[bytes]]:
+        """파일 전체를 한 번에 반환 (응답은 보통 path()로 파일을 직접 전송)"""
+        data = await self.get(key)
+        if data is None:
+            return None
+
+        async def chunks():
+            yield data
+
+        return chunks()
+
+    def _touch(self, key: str) -> bool:
+        try:
+            os.utime(self.path_for(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def touch(self, key: str) -> bool:
+        """수정 시각 갱신 (다시 저장하지 않고 재사용하는 이미지가 보관 기간 정리로 지워지지 않도록)"""
+        if not is_valid_key(key):
+            return False
+        return await asyncio.to_thread(self._touch, key)
+
+    async def delete(self, key: str) -> bool:
+        path = self.path(key)
+        if path is None:
+            return False
+        await asyncio.to_thread(path.unlink, True)
+        return True
+
+    def _prune(self, cutoff: float) -> int:
+        deleted = 0
+        if not self.root.exists():
+            return 0
+        for path in self.root.glob("*/*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    deleted += 1
+            except FileNotFoundError:
+                continue
+        return deleted
+
+    async def prune(self, cutoff: float) -> int:
+        """cutoff(epoch 초) 이후로 저장되지 않은 파일 삭제"""
+        return await asyncio.to_thread(self._prune, cutoff)
+
+
+class GridFSBlobStore:
+    """MongoDB GridFS 저장소 (파일 이름 = sha256)"""
+
+    kind = "gridfs"
+
+    def __init__(self, bucket: str = "snapshots", chunk_size: int = 255 * 1024):
+        self.bucket_name = bucket
+        self.chunk_size = chunk_size
+        self._bucket: Optional[AsyncIOMotorGridFSBucket] = None
+
+    @property
+    def bucket(self) -> AsyncIOMotorGridFSBucket:
+        if self._bucket is None:
+            db = get_database()
+            if db is None:
+                raise Exception("데이터베이스 연결이 없습니다")
+            self._bucket = AsyncIOMotorGridFSBucket(
+                db, bucket_name=self.bucket_name, chunk_size_bytes=self.chunk_size
+            )
+        return self._bucket
+
+    async def _find(self, key: str) -> Optional[Dict[str, Any]]:
+        cursor = self.bucket.find({"filename": key}, limit=1)
+        async for file_doc in cursor:
+            return file_doc
+        return None
+
+    @property
+    def _files(self):
+        return get_database()[f"{self.bucket_name}.files"]
+
+    async def put(self, data: bytes) -> Dict[str, Any]:
+        key = hashlib.sha256(data).hexdigest()
+        now = datetime.now(timezone.utc)
+        file_doc = await self._find(key)
+        if file_doc is None:
+            await self.bucket.upload_from_stream(
+                key, data, metadata={"content_type": "image/jpeg", "last_used": now}
+            )
+        else:
+            # 같은 이미지는 다시 올리지 않고 사용 시각만 갱신 (보관 기간 정리 기준)
+            await self._files.update_one({"_id": file_doc["_id"]}, {"$set": {"metadata.last_used": now}})
+        return make_ref(key, data)
+
+    def path(self, key: str) -> Optional[Path]:
+        # GridFS는 로컬 파일이 없음
+        return None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not is_valid_key(key):
+            return None
+        try:
+            stream = await self.bucket.open_download_stream_by_name(key)
+        except Exception:
+            return None
+        return await stream.read()
+
+    async def stream(self, key: str) -> Optional[AsyncIterator[bytes]]:
+        """청크 단위로 읽는 async iterator 반환 (없으면 None)"""
+        if not is_valid_key(key):
+            return None
+        try:
+            grid_out = await self.bucket.open_download_stream_by_name(key)
+        except Exception:
+            return None
+
+        async def chunks():
+            while True:
+                chunk = await grid_out.readchunk()
+                if not chunk:
+                    break
+                yield chunk
+
+        return chunks()
+
+    async def touch(self, key: str) -> bool:
+        """사용 시각 갱신 (다시 저장하지 않고 재사용하는 이미지가 보관 기간 정리로 지워지지 않도록)"""
+        result = await self._files.update_one(
+            {"filename": key}, {"$set": {"metadata.last_used": datetime.now(timezone.utc)}}
+        )
+        return result.matched_count > 0
+
+    async def delete(self, key: str) -> bool:
+        file_doc = await self._find(key)
+        if file_doc is None:
+            return False
+        await self.bucket.delete(file_doc["_id"])
+        return True
+
+    async def prune(self, cutoff: float) -> int:
+        """cutoff(epoch 초) 이후로 저장되지 않은 파일 삭제"""
+        cutoff_dt = datetime.fromtimestamp(cutoff, tz=timezone.utc)
+        deleted = 0
+        cursor = self._files.find({"metadata.last_used": {"$lt": cutoff_dt}}, {"_id": 1})
+        async for file_doc in cursor:
+            await self.bucket.delete(file_doc["_id"])
+            deleted += 1
+        return deleted
+
+
+def create_blob_store():
+    """config.json의 BLOB_STORE 설정으로 저장소 생성"""
+    store_config = config_data.get('BLOB_STORE', {})
+    kind = store_config.get('type', 'disk')
+    if kind == 'gridfs':
+        return GridFSBlobStore(bucket=store_config.get('bucket', 'snapshots'))
+    if kind != 'disk':
+        logger.warning(f"알 수 없는 BLOB_STORE.type: {kind} (disk 사용)")
+    return DiskBlobStore(root=store_config.get('path', 'data/snapshots'))
+
+
+blob_store = create_blob_store()
+
+
+async def store_snapshot(data: bytes) -> Optional[Dict[str, Any]]:
+    """스냅샷을 저장소에 넣고 참조 반환 (실패 시 None)"""
+    try:
+        return await blob_store.put(data)
+    except Exception as e:
+        logger.error(f"스냅샷 저장 실패 ({blob_store.kind}): {e!r}")
+        return None
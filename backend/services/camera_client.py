@@ -0,0 +1,293 @@
+"""
+카메라 HTTP 클라이언트 모듈
+카메라별 keep-alive 연결 풀을 유지하는 비동기 클라이언트 제공
+"""
+import asyncio
+import base64
+import time
+from typing import Optional, Dict, Any, Tuple
+
+import httpx
+
+from config import config_data
+from services.camera_health import CameraHealth
+from services.token_manager import XTokenSession
+from utils.logger import get_logger
+
+logger = get_logger()
+
+DEFAULT_SNAPSHOT_CGI = '/nvc-cgi/operator/snapshot.fcgi'
+
+
+def _normalize_path(cgi_str: str) -> str:
+    """CGI 경로를 '/'로 시작하는 형태로 정리"""
+    cgi_str = (cgi_str or '').strip()
+    while '//' in cgi_str:
+        cgi_str = cgi_str.replace('//', '/')
+    return '/' + cgi_str.lstrip('/')
+
+
+def _json_body(r: httpx.Response) -> Optional[dict]:
+    """JSON 객체 응답 본문 (HTML/빈 본문 등 JSON 객체가 아니면 None)"""
+    try:
+        body = r.json()
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+class CameraClient:
+    """카메라 1대에 대한 비동기 HTTP 클라이언트 (연결 풀 재사용)"""
+
+    def __init__(
+        self,
+        name: str,
+        camera: Dict[str, Any],
+        client_config: Dict[str, Any],
+        health_config: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.address = camera.get('address', '')
+        self.port = camera.get('port', 80)
+        self.userid = camera.get('userid', '')
+        self.userpw = camera.get('userpw', '')
+        self.base_url = f"http://{self.address}:{self.port}"
+
+        # 요청마다 문자열을 다시 만들지 않도록 경로를 미리 구성
+        self.snapshot_path = _normalize_path(camera.get('snapshot_cgi', DEFAULT_SNAPSHOT_CGI))
+        self.do_paths = {
+            key: _normalize_path(value)
+            for key, value in (camera.get('DO_cgi') or {}).items()
+        }
+
+        # 카메라별 설정이 있으면 전역 설정을 덮어씀
+        options = {**client_config, **(camera.get('client') or {})}
+
+        # header 블록이 있는 카메라는 api/v1 (X-Token) 방식
+        header = camera.get('header')
+        self.headers = dict(header) if isinstance(header, dict) and header else None
+        self.use_token = self.headers is not None
+        self.token_session: Optional[XTokenSession] = None
+        if self.use_token:
+            # 토큰은 요청마다 세션에서 가져오므로 기본 헤더에서는 제외
+            seed_token = self.headers.pop('X-Token', None)
+            self.token_session = XTokenSession(
+                name,
+                self._login,
+                token=seed_token,
+                ttl=options.get('token_ttl', 3600.0),
+                refresh_margin=options.get('token_refresh_margin', 60.0),
+            )
+
+        health_config = health_config or {}
+        self.health = CameraHealth(
+            name,
+            window=health_config.get('window', 100),
+            failure_threshold=health_config.get('failure_threshold', 5),
+            open_timeout=health_config.get('open_timeout', 30.0),
+        )
+
+        self.timeout = httpx.Timeout(
+            connect=options.get('connect_timeout', 3.0),
+            read=options.get('read_timeout', 10.0),
+            write=options.get('write_timeout', 5.0),
+            pool=options.get('pool_timeout', 5.0),
+        )
+        self.limits = httpx.Limits(
+            max_connections=options.get('max_connections', 4),
+            max_keepalive_connections=options.get('max_keepalive_connections', 2),
+            keepalive_expiry=options.get('keepalive_expiry', 30.0),
+        )
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            auth=httpx.BasicAuth(self.userid, self.userpw),
+            headers=self.headers,
+            timeout=self.timeout,
+            limits=self.limits,
+        )
+
+    @property
+    def has_do(self) -> bool:
+        return bool(self.do_paths)
+
+    async def _send(self, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """요청 전송 (circuit open이면 즉시 None, 연결/타임아웃 오류 시 None)"""
+        if not self.health.allow_request():
+            return None
+
+        started = time.monotonic()
+        try:
+            r = await self._client.request(method, path, **kwargs)
+        except asyncio.CancelledError:
+            self.health.release()
+            raise
+        except Exception as e:
+            self.health.record(False, time.monotonic() - started, error=repr(e))
+            logger.error(f"{self.base_url}{path}: {e!r}")
+            return None
+
+        # 4xx는 카메라가 응답한 것이므로 성공으로 기록
+        ok = r.status_code < 500
+        self.health.record(ok, time.monotonic() - started, error=None if ok else f"HTTP {r.status_code}")
+        return r
+
+    async def _get(self, path: str, headers: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+        return await self._send('GET', path, headers=headers)
+
+    async def probe(self) -> bool:
+        """half-open probe 요청"""
+        return await self._get(self.snapshot_path) is not None
+
+    async def request(self, path: str) -> Optional[bytes]:
+        """CGI GET 요청을 보내고 응답 본문을 반환 (실패 시 None)"""
+        r = await self._get(path)
+        if r is None:
+            return None
+        if not r.is_success:
+            logger.error(f"{self.base_url}{path}: HTTP {r.status_code}")
+            return None
+        return r.content
+
+    async def _login(self) -> Tuple[Optional[str], Optional[float]]:
+        """api/v1 카메라에 로그인하여 X-Token 발급"""
+        r = await self._send(
+            'POST',
+            '/api/v1/user/login',
+            json={'username': self.userid, 'password': self.userpw},
+        )
+        if r is None:
+            return None, None
+        if not r.is_success:
+            logger.error(f"[{self.name}] X-Token 발급 실패: HTTP {r.status_code}")
+            return None, None
+        body = _json_body(r)
+        data = body.get('data') if body else None
+        if not isinstance(data, dict):
+            logger.error(f"[{self.name}] X-Token 발급 실패: 응답 형식 오류")
+            return None, None
+        return data.get('token'), data.get('expires_in')
+
+    async def request_with_token(self, path: str) -> Optional[dict]:
+        """X-Token이 필요한 api/v1 요청 (토큰 만료 시 갱신 후 1회 재시도)"""
+        for attempt in range(2):
+            token = await self.token_session.get_token()
+            if not token:
+                return None
+            r = await self._get(path, headers={'X-Token': token})
+            if r is None:
+                return None
+            if r.is_success:
+                body = _json_body(r)
+                if body is None:
+                    logger.error(f"{self.base_url}{path}: JSON이 아닌 응답")
+                    return None
+                if body.get('data'):
+                    return body
+            elif r.status_code not in (401, 403):
+                logger.error(f"{self.base_url}{path}: HTTP {r.status_code}")
+                return None
+            # 만료된 토큰 (401/403 또는 빈 data): 같은 토큰을 본 요청들은 로그인 1회를 공유
+            await self.token_session.refresh(stale_token=token)
+        return None
+
+    async def fetch_snapshot(self) -> Optional[bytes]:
+        """스냅샷을 JPEG 바이트로 가져옴"""
+        if not self.use_token:
+            return await self.request(self.snapshot_path)
+
+        # api/v1 카메라는 JSON 안에 base64 이미지가 들어 있음
+        body = await self.request_with_token(self.snapshot_path)
+        if body is None:
+            return None
+        try:
+            return base64.b64decode(body['data'])
+        except (TypeError, ValueError) as e:
+            logger.error(f"[{self.name}] 스냅샷 디코딩 실패: {e!r}")
+            return None
+
+    def do_path(self, secs: int) -> Optional[str]:
+        """DO 명령 경로 반환 (0: on, -1: off, 그 외: secs 동안 trigger)"""
+        if secs == 0:
+            return self.do_paths.get('on')
+        if secs == -1:
+            return self.do_paths.get('off')
+        trig = self.do_paths.get('trig')
+        return f"{trig}{secs}" if trig else None
+
+    async def trigger_do(self, secs: int) -> bool:
+        """디지털 출력 제어"""
+        path = self.do_path(secs)
+        if not path:
+            logger.error(f"[{self.name}] DO_cgi 설정 없음")
+            return False
+        return bool(await self.request(path))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"base_url": self.base_url, "has_do": self.has_do, "health": self.health.stats()}
+        if self.token_session is not None:
+            stats["token"] = self.token_session.stats()
+        return stats
+
+    async def close(self):
+        if self.token_session is not None:
+            await self.token_session.close()
+        await self._client.aclose()
+
+
+# 카메라 이름 -> CameraClient
+_clients: Dict[str, CameraClient] = {}
+_probe_task: Optional[asyncio.Task] = None
+
+
+def init_camera_clients() -> Dict[str, CameraClient]:
+    """config.json의 CAMERAS 항목마다 클라이언트를 생성"""
+    client_config = config_data.get('CAMERA_CLIENT', {})
+    health_config = config_data.get('CAMERA_HEALTH', {})
+    for name, camera in config_data.get('CAMERAS', {}).items():
+        if name not in _clients:
+            _clients[name] = CameraClient(name, camera, client_config, health_config)
+    return _clients
+
+
+async def _probe_loop(interval: float):
+    """circuit이 열린 카메라에 주기적으로 probe 요청 (요청이 없어도 복구 감지)"""
+    while True:
+        await asyncio.sleep(interval)
+        due = [client for client in _clients.values() if client.health.probe_due]
+        if due:
+            await asyncio.gather(*(client.probe() for client in due), return_exceptions=True)
+
+
+def start_health_probes():
+    global _probe_task
+    interval = config_data.get('CAMERA_HEALTH', {}).get('probe_interval', 10.0)
+    if _probe_task is None or _probe_task.done():
+        _probe_task = asyncio.create_task(_probe_loop(interval))
+
+
+def is_camera_available(cam_name: str) -> bool:
+    """circuit이 열려 있지 않은 카메라인지 확인"""
+    client = get_camera_client(cam_name)
+    return client is not None and client.health.available
+
+
+def get_camera_client(cam_name: str) -> Optional[CameraClient]:
+    """카메라 이름으로 클라이언트 조회"""
+    if not _clients:
+        init_camera_clients()
+    return _clients.get(cam_name)
+
+
+def camera_client_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: client.stats() for name, client in _clients.items()}
+
+
+async def close_camera_clients():
+    """모든 카메라 연결 풀 종료"""
+    global _probe_task
+    if _probe_task is not None:
+        _probe_task.cancel()
+        _probe_task = None
+    for client in _clients.values():
+        await client.close()
+    _clients.clear()
@@ -0,0 +1,114 @@
+"""
+카메라 상태 추적 모듈
+카메라별 성공률/지연 시간/연속 실패를 기록하고 circuit breaker로 죽은 카메라 요청을 즉시 실패 처리
+"""
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Deque, Tuple
+
+from utils.logger import get_logger
+from utils.metrics import percentile
+
+logger = get_logger()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CameraHealth:
+    """카메라 1대의 상태 및 circuit breaker"""
+
+    def __init__(
+        self,
+        cam_name: str,
+        window: int = 100,
+        failure_threshold: int = 5,
+        open_timeout: float = 30.0,
+    ):
+        self.cam_name = cam_name
+        self.failure_threshold = failure_threshold
+        self.open_timeout = open_timeout
+        # (성공 여부, 지연 시간 초) 최근 window개
+        self._samples: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probe_inflight = False
+        self.consecutive_failures = 0
+        self.total_requests = 0
+        self.total_failures = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        """circuit이 열려 있지 않으면 사용 가능"""
+        return self.state != OPEN
+
+    @property
+    def probe_due(self) -> bool:
+        return self.state == OPEN and time.monotonic() - self.opened_at >= self.open_timeout
+
+    def allow_request(self) -> bool:
+        """요청 허용 여부 (open 상태에서 open_timeout이 지나면 probe 1건만 허용)"""
+        if self.state == CLOSED:
+            return True
+        if self.probe_due:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probe_inflight:
+            self._probe_inflight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self):
+        """결과 없이 끝난 요청 (취소 등): half-open probe 자리를 반환"""
+        self._probe_inflight = False
+
+    def record(self, ok: bool, latency: float, error: Optional[str] = None):
+        self._samples.append((ok, latency))
+        self.total_requests += 1
+        self._probe_inflight = False
+
+        if ok:
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info(f"[{self.cam_name}] 카메라 복구 (circuit closed)")
+            self.state = CLOSED
+            return
+
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(
+                    f"[{self.cam_name}] 카메라 응답 없음, circuit open "
+                    f"(연속 실패 {self.consecutive_failures}회): {error}"
+                )
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(latency for ok, latency in self._samples if ok)
+        successes = sum(1 for ok, _ in self._samples if ok)
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "state": self.state,
+            "available": self.available,
+            "success_rate": round(successes / len(self._samples), 3) if self._samples else None,
+            "latency_ms": {
+                "p50": ms(percentile(latencies, 50)),
+                "p95": ms(percentile(latencies, 95)),
+                "p99": ms(percentile(latencies, 99)),
+            },
+            "consecutive_failures": self.consecutive_failures,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+            "rejected": self.rejected,
+            "open_for": round(time.monotonic() - self.opened_at, 1) if self.state != CLOSED else None,
+            "last_error": self.last_error,
+        }
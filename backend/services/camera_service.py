@@ -1,127 +1,146 @@
-import base64, json
 import asyncio
-import requests
-from requests.auth import HTTPBasicAuth, HTTPDigestAuth
-from urllib.error import URLError
-from typing import Optional
-from config import config_data, update_config, load_config_json
+import base64
+import time
+from typing import Optional, List, Dict, Any
+from config import config_data
+from services.camera_client import get_camera_client, is_camera_available
+from services.do_scheduler import DOResult, get_do_scheduler
+from services.snapshot_cache import SnapshotCache, Frame
 from utils.logger import get_logger
 
 logger = get_logger()
 
-def active_cgi(dev_ip, header = None, authkey='',cgi_str='', port=80):
-    """장치에 CGI 명령을 실행하는 함수"""
-    url = f'{dev_ip}:{port}/{cgi_str}'
-    url = 'http://' + url.replace("//", "/").strip()
-    # logger.debug(f"CGI request: {url}")
 
-    try:
-        # header가 딕셔너리가 아니거나 빈 문자열이면 None으로 설정
-        headers = header if isinstance(header, dict) and header else None
-        r = requests.get(url, headers=headers, auth=authkey, timeout=20)
-    except Exception as e:
-        logger.error(f"{url}: {str(e)}")
-        return False
-        
-    return r.content
-
-async def get_x_token(ip_addr, port=80, userid='admin', userpw='admin'):
-    url = f'http://{ip_addr}:{port}/api/v1/user/login'
-    data = {
-        'username': userid,
-        'password': userpw,
+async def _fetch_snapshot(cam_name: str) -> Optional[bytes]:
+    """캐시 미스 시 카메라에서 JPEG 바이트를 가져옴"""
+    client = get_camera_client(cam_name)
+    if client is None:
+        return None
+    return await client.fetch_snapshot()
+
+
+def _create_snapshot_cache() -> SnapshotCache:
+    cache_config = config_data.get('SNAPSHOT_CACHE', {})
+    camera_ttl = {
+        name: camera['snapshot_ttl']
+        for name, camera in config_data.get('CAMERAS', {}).items()
+        if 'snapshot_ttl' in camera
     }
-    r = requests.post(url, json=data, timeout=20)
-    # print (r.json())
-    return r.json().get('data').get('token')
+    return SnapshotCache(
+        _fetch_snapshot,
+        ttl=cache_config.get('ttl', 1.0),
+        camera_ttl=camera_ttl,
+        idle_timeout=cache_config.get('idle_timeout', 60.0),
+    )
+
+
+snapshot_cache = _create_snapshot_cache()
+
+
+async def get_frame(cam_name: str = 'main', max_age: Optional[float] = None) -> Optional[Frame]:
+    """스냅샷 캐시를 거쳐 프레임을 가져옴 (동시 요청은 하나로 합쳐짐)"""
+    if get_camera_client(cam_name) is None:
+        logger.error(f"카메라 이름 오류: {cam_name}")
+        return None
+    return await snapshot_cache.get(cam_name, max_age=max_age)
+
+
+def to_data_uri(data: bytes) -> str:
+    """JPEG 바이트를 data URI 문자열로 변환"""
+    img_data = base64.b64encode(data).decode('utf-8')
+    return f"data:image/jpg;base64,{img_data}"
+
 
 async def get_snapshot(cam_name: str = 'main') -> Optional[str]:
     """카메라에서 스냅샷을 가져옴"""
-    global config_data
     try:
-        cameras = config_data.get('CAMERAS', [])
-        # print ("camera_config: ", cameras)
-        if cam_name not in cameras:
-            logger.error(f"카메라 이름 오류: {cam_name}")
-            return None
-        
-        camera = cameras[cam_name]
-        # print ("camera: ", camera)
-        port = camera.get('port', 80)
-        userid = camera.get('userid', '')
-        userpw = camera.get('userpw', '')
-        address = camera.get('address', '')
-        snapshot_cgi = camera.get('snapshot_cgi', '/nvc-cgi/operator/snapshot.fcgi')
-        header = camera.get('header', '')
-        
-        # url = f"http://{userid}:{userpw}@{address}{snapshot_cgi}"
-        # logger.info(f"카메라 주소: {url}")
-
-        rs = active_cgi(address, header=header, authkey=HTTPBasicAuth(userid, userpw), cgi_str=snapshot_cgi, port=port)
-        if not rs:
-            logger.error(f"카메라 스냅샷 가져오기 실패: {rs}")
+        frame = await get_frame(cam_name)
+        if frame is None:
+            logger.error(f"카메라 스냅샷 가져오기 실패: {cam_name}")
             return None
 
-
-        if header:
-            rs = rs.decode('utf-8')
-            rs = json.loads(rs)
-        #     print (rs['data'][:100])
-            img_data =rs.get('data')
-            if not img_data:
-                x_token = await get_x_token(address, port=port, userid=userid, userpw=userpw)
-                print("x_token: ", x_token)
-                update_config(f"CAMERAS.{cam_name}.header.X-Token", x_token)
-                config_data = load_config_json()
-
-            return f"data:image/jpg;base64,{img_data}"
-        
-        img_data = base64.b64encode(rs).decode('utf-8')
-        return f"data:image/jpg;base64,{img_data}"
-        
+        return to_data_uri(frame.data)
 
     except Exception as e:
         logger.error(f"스냅샷 가져오기 실패: {e}", exc_info=True)
         return None
 
 
-async def put_do(cam_name: str = 'main', secs: int = 0 ) -> bool:
-    """디지털 출력 제어 (문 열기, 문 닫기)"""
-    cameras = config_data.get('CAMERAS', [])
-    # print ("camera_config: ", cameras)
-    if cam_name not in cameras:
-        logger.error(f"카메라 이름 오류: {cam_name}")
-        return None    
-
-    camera = cameras[cam_name]
-    port = camera.get('port', 80)
-    userid = camera.get('userid', '')
-    userpw = camera.get('userpw', '')
-    address = camera.get('address', '')
-    do_cgi = camera.get('DO_cgi', {})
-
-    if secs == 0:
-        cgi = do_cgi.get('on', '')
-    elif secs == -1:
-        cgi = do_cgi.get('off', '')
-    else:
-        cgi = do_cgi.get('trig', '')
-        cgi = f"{cgi}{secs}"
-
-    # url = f"http://{userid}:{userpw}@{address}/{cgi}"
-    # print ("url: ", url)
+async def get_gallery(cam_names: Optional[List[str]] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """여러 카메라의 스냅샷을 동시에 가져옴 (timeout까지 도착한 프레임만 반환)
 
-    try:
-        header = camera.get('header', '')
-        ret = active_cgi(address, header=header, authkey=HTTPBasicAuth(userid, userpw), cgi_str=cgi, port=port)
-        if not ret:
-            logger.error(f"DO 제어 실패: {ret}")
-            return False
-        return True
+    전체 소요 시간은 카메라 수와 관계없이 가장 느린 카메라(최대 timeout)만큼만 걸림.
+    timeout을 넘긴 요청은 취소하지 않고 계속 진행되어 다음 요청 때 캐시에서 사용됨
+    """
+    gallery_config = config_data.get('GALLERY', {})
+    if timeout is None:
+        timeout = gallery_config.get('timeout', 3.0)
+    timeout = max(0.0, min(float(timeout), gallery_config.get('max_timeout', 10.0)))
+    cameras = config_data.get('CAMERAS', {})
+    if not cam_names:
+        cam_names = list(cameras.keys())
 
-    except Exception as e:
-        logger.error(f"DO 제어 실패: {address} {cgi} {e}", exc_info=True)
-        return False
+    started = time.monotonic()
+    results: Dict[str, Dict[str, Any]] = {}
+    tasks: Dict[asyncio.Task, str] = {}
+
+    async def fetch(cam_name: str):
+        fetch_started = time.monotonic()
+        frame = await snapshot_cache.get(cam_name)
+        return frame, time.monotonic() - fetch_started
+
+    for cam_name in dict.fromkeys(cam_names):
+        if cam_name not in cameras:
+            results[cam_name] = {"status": "unknown", "latency_ms": None, "snapshot": None}
+        elif not is_camera_available(cam_name):
+            # circuit이 열린 카메라는 기다리지 않음
+            results[cam_name] = {"status": "unavailable", "latency_ms": None, "snapshot": None}
+        else:
+            tasks[asyncio.ensure_future(fetch(cam_name))] = cam_name
+
+    if tasks:
+        done, pending = await asyncio.wait(tasks.keys(), timeout=timeout)
+        for task in done:
+            cam_name = tasks[task]
+            try:
+                frame, latency = task.result()
+            except Exception as e:
+                logger.error(f"갤러리 스냅샷 실패: {cam_name} {e!r}")
+                frame, latency = None, None
+            results[cam_name] = {
+                "status": "ok" if frame is not None else "error",
+                "latency_ms": round(latency * 1000, 1) if latency is not None else None,
+                "snapshot": to_data_uri(frame.data) if frame is not None else None,
+                "captured_at": frame.captured_at if frame is not None else None,
+            }
+        for task in pending:
+            # 대기만 중단 (업스트림 요청은 캐시 안에서 계속 진행)
+            task.cancel()
+            results[tasks[task]] = {"status": "timeout", "latency_ms": None, "snapshot": None}
+
+    return {
+        "cameras": {cam_name: results[cam_name] for cam_name in dict.fromkeys(cam_names)},
+        "timeout": timeout,
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+async def put_do(cam_name: str = 'main', secs: int = 0, requester: Optional[str] = None) -> Optional[DOResult]:
+    """디지털 출력 제어 (문 열기, 문 닫기)
 
+    같은 출력의 명령은 순서대로 보내고, 펄스 동작 중 들어온 trigger는 진행 중인 펄스의 결과를 공유함
+    """
+    scheduler = get_do_scheduler(cam_name)
+    if scheduler is None:
+        logger.error(f"카메라 이름 오류 또는 DO_cgi 없음: {cam_name}")
+        return None
 
+    try:
+        ret = await scheduler.command(secs, requester=requester)
+        if not ret:
+            logger.error(f"DO 제어 실패: {cam_name} secs={secs}")
+        return ret
 
+    except Exception as e:
+        logger.error(f"DO 제어 실패: {cam_name} secs={secs} {e}", exc_info=True)
+        return DOResult(ok=False, requester=requester)
@@ -0,0 +1,268 @@
+"""
+스냅샷 중복 제거 모듈
+같은 이미지는 blob 저장소에 한 번만 저장하고 로그는 같은 참조(snapshot_ref)를 가리킴
+- 완전히 같은 이미지: sha256(blob key)이 같으면 저장/썸네일 생성을 건너뛰고 기존 참조 재사용
+- 거의 같은 이미지 (SNAPSHOT_DEDUP.perceptual): 최근 이미지들과 dHash 거리가 threshold 이하이면 기존 참조 재사용
+blob 컬렉션(MONGODB.tables.blobs)에는 이미지별 hash/썸네일과 마지막 사용 시각(last_used)만 저장
+(TTL/capped 모드에서는 MongoDB가 로그를 지우므로 참조 수를 유지할 수 없음, 현황은 남아 있는 로그에서 계산)
+"""
+import asyncio
+import hashlib
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Deque, Tuple
+
+from pymongo import UpdateOne
+
+from config import config_data
+from database import get_database, get_collection
+from services.blob_store import blob_store, store_snapshot
+from services.thumbnail_service import create_thumbnails, perceptual_hash
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# (참조, 썸네일 참조)
+Stored = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Dict[str, Any]]]]
+
+
+def _dedup_config() -> Dict[str, Any]:
+    dedup = config_data.get('SNAPSHOT_DEDUP', {})
+    return {
+        "enabled": dedup.get('enabled', True),
+        "perceptual": dedup.get('perceptual', False),
+        "threshold": dedup.get('threshold', 4),
+        "window": dedup.get('window', 32),
+    }
+
+
+def _blob_collection():
+    db = get_database()
+    if db is None:
+        return None
+    return db[config_data.get('MONGODB', {}).get('tables', {}).get('blobs', 'snapshot_blobs')]
+
+
+def hamming(a: str, b: str) -> int:
+    """두 perceptual hash(hex)의 다른 비트 수"""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+class SnapshotDeduplicator:
+    """최근 저장한 이미지의 perceptual hash를 기억해 두고 비슷한 이미지는 기존 참조로 대체"""
+
+    def __init__(self, perceptual: bool = False, threshold: int = 4, window: int = 32, enabled: bool = True):
+        self.enabled = enabled
+        self.perceptual = perceptual
+        self.threshold = threshold
+        # (phash, 참조, 썸네일 참조), 최근 것이 오른쪽
+        self._recent: Deque[Tuple[str, Dict[str, Any], Optional[Dict[str, Dict[str, Any]]]]] = deque(maxlen=window)
+        self._loaded = False
+        self.stored = 0
+        self.exact_hits = 0
+        self.perceptual_hits = 0
+        self.bytes_saved = 0
+
+    @classmethod
+    def from_config(cls) -> "SnapshotDeduplicator":
+        return cls(**_dedup_config())
+
+    async def _load_recent(self):
+        """재시작 후에도 비교할 수 있도록 최근 사용한 이미지의 hash를 불러옴"""
+        self._loaded = True
+        collection = _blob_collection()
+        if collection is None or not self._recent.maxlen:
+            return
+        cursor = collection.find(
+            {"phash": {"$ne": None}}, {"phash": 1, "ref": 1, "thumbnails": 1}
+        ).sort("last_used", -1).limit(self._recent.maxlen)
+        docs = await cursor.to_list(self._recent.maxlen)
+        for doc in reversed(docs):
+            self._recent.append((doc["phash"], doc["ref"], doc.get("thumbnails")))
+
+    async def _find_exact(self, key: str) -> Optional[Stored]:
+        for _, ref, thumbnails in self._recent:
+            if ref["key"] == key:
+                return ref, thumbnails
+        collection = _blob_collection()
+        if collection is None:
+            return None
+        doc = await collection.find_one({"_id": key, "ref": {"$exists": True}}, {"ref": 1, "thumbnails": 1})
+        return (doc["ref"], doc.get("thumbnails")) if doc else None
+
+    def _find_similar(self, phash: str) -> Optional[Stored]:
+        best = None
+        for recent_hash, ref, thumbnails in reversed(self._recent):
+            distance = hamming(phash, recent_hash)
+            if distance <= self.threshold and (best is None or distance < best[0]):
+                best = (distance, ref, thumbnails)
+        return (best[1], best[2]) if best else None
+
+    def _forget(self, key: str):
+        """보관 기간 정리로 삭제된 이미지를 최근 목록에서 제거"""
+        for entry in [entry for entry in self._recent if entry[1]["key"] == key]:
+            self._recent.remove(entry)
+
+    async def _reuse(self, stored: Stored) -> Optional[Stored]:
+        """기존 참조 재사용 (blob이 이미 삭제되었으면 None)"""
+        ref, thumbnails = stored
+        # 다시 저장하지 않으므로 보관 기간 정리 기준 시각만 갱신 (파일이 없으면 False)
+        if not await blob_store.touch(ref["key"]):
+            self._forget(ref["key"])
+            return None
+        if thumbnails:
+            # 지워진 썸네일은 빼고 사용 (목록은 원본 URL로 대체됨)
+            thumbnails = {
+                name: thumbnail for name, thumbnail in thumbnails.items() if await blob_store.touch(thumbnail["key"])
+            } or None
+        return ref, thumbnails
+
+    async def save(self, data: bytes) -> Stored:
+        """스냅샷과 썸네일을 저장하고 참조 반환 (중복이면 기존 참조)"""
+        if not self.enabled:
+            return await self._store(data, None)
+        if not self._loaded:
+            await self._load_recent()
+
+        key = hashlib.sha256(data).hexdigest()
+        try:
+            exact = await self._find_exact(key)
+            reused = await self._reuse(exact) if exact is not None else None
+            if reused is not None:
+                self.exact_hits += 1
+                self.bytes_saved += len(data)
+                return reused
+
+            phash = await perceptual_hash(data) if self.perceptual else None
+            if phash is not None:
+                similar = self._find_similar(phash)
+                reused = await self._reuse(similar) if similar is not None else None
+                if reused is not None:
+                    self.perceptual_hits += 1
+                    self.bytes_saved += len(data)
+                    return reused
+        except Exception as e:
+            logger.warning(f"스냅샷 중복 확인 실패 (그대로 저장): {e!r}")
+            phash = None
+
+        return await self._store(data, phash)
+
+    async def _store(self, data: bytes, phash: Optional[str]) -> Stored:
+        # 원본 저장과 썸네일 생성(프로세스 풀)을 동시에 진행
+        ref, thumbnails = await asyncio.gather(store_snapshot(data), create_thumbnails(data))
+        if ref is None or not self.enabled:
+            return ref, thumbnails
+
+        self.stored += 1
+        if phash is not None:
+            self._recent.append((phash, ref, thumbnails))
+        collection = _blob_collection()
+        if collection is not None:
+            try:
+                await collection.update_one(
+                    {"_id": ref["key"]},
+                    {
+                        "$set": {"ref": ref, "thumbnails": thumbnails, "phash": phash},
+                        "$setOnInsert": {"size": ref["size"], "first_seen": datetime.now(timezone.utc)},
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.warning(f"스냅샷 참조 정보 저장 실패: {e!r}")
+        return ref, thumbnails
+
+    def stats(self) -> Dict[str, Any]:
+        saves = self.stored + self.exact_hits + self.perceptual_hits
+        return {
+            "enabled": self.enabled,
+            "perceptual": self.perceptual,
+            "threshold": self.threshold,
+            "window": self._recent.maxlen,
+            "stored": self.stored,
+            "exact_hits": self.exact_hits,
+            "perceptual_hits": self.perceptual_hits,
+            "hit_ratio": round((self.exact_hits + self.perceptual_hits) / saves, 3) if saves else None,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+deduplicator = SnapshotDeduplicator.from_config()
+
+
+async def save_snapshot(data: bytes) -> Stored:
+    """스냅샷 원본/썸네일 저장 (중복 제거 포함), 실패 시 (None, None)"""
+    return await deduplicator.save(data)
+
+
+async def mark_used(docs: List[Dict[str, Any]]):
+    """저장한 로그 문서가 가리키는 스냅샷의 마지막 사용 시각 갱신 (보관 기간 정리 기준)"""
+    sizes = {}
+    for doc in docs:
+        ref = doc.get("snapshot_ref") or {}
+        if ref.get("key"):
+            sizes[ref["key"]] = ref.get("size", 0)
+    collection = _blob_collection()
+    if not sizes or collection is None:
+        return
+    now = datetime.now(timezone.utc)
+    await collection.bulk_write([
+        UpdateOne({"_id": key}, {"$set": {"last_used": now}, "$setOnInsert": {"size": size}}, upsert=True)
+        for key, size in sizes.items()
+    ], ordered=False)
+
+
+async def forget_blobs(cutoff: float) -> int:
+    """보관 기간 정리로 blob이 삭제된 이미지의 참조 정보 삭제"""
+    collection = _blob_collection()
+    if collection is None:
+        return 0
+    cutoff_dt = datetime.fromtimestamp(cutoff, tz=timezone.utc)
+    result = await collection.delete_many({"$or": [
+        {"last_used": {"$lt": cutoff_dt}},
+        # 로그에 한 번도 쓰이지 않은 이미지
+        {"last_used": {"$exists": False}, "first_seen": {"$lt": cutoff_dt}},
+    ]})
+    return result.deleted_count
+
+
+# 로그 컬렉션에서 집계한 이미지 사용 현황 (SNAPSHOT_DEDUP.stats_interval초마다 다시 집계)
+_usage: Dict[str, Any] = {"value": None, "updated_at": 0.0}
+_usage_lock = asyncio.Lock()
+
+
+async def refresh_dedup_usage() -> Dict[str, Any]:
+    """남아 있는 로그가 참조하는 고유 이미지 수/참조 수, 참조 대비 실제 저장 용량
+
+    보관 방식과 관계없이 맞도록 로그 컬렉션에서 집계 (로그 전체를 읽으므로 캐시하여 사용)
+    """
+    summary = {"blobs": 0, "refs": 0, "stored_bytes": 0, "referenced_bytes": 0}
+    if get_database() is not None:
+        cursor = get_collection("log").aggregate([
+            {"$match": {"snapshot_ref.key": {"$type": "string"}}},
+            {"$group": {"_id": "$snapshot_ref.key", "refs": {"$sum": 1}, "size": {"$first": "$snapshot_ref.size"}}},
+            {"$group": {
+                "_id": None,
+                "blobs": {"$sum": 1},
+                "refs": {"$sum": "$refs"},
+                "stored_bytes": {"$sum": "$size"},
+                "referenced_bytes": {"$sum": {"$multiply": [{"$ifNull": ["$size", 0]}, "$refs"]}},
+            }},
+        ], allowDiskUse=True)
+        async for doc in cursor:
+            summary.update({name: doc.get(name, 0) for name in summary})
+
+    summary["bytes_saved"] = max(summary["referenced_bytes"] - summary["stored_bytes"], 0)
+    summary["dedup_ratio"] = round(summary["refs"] / summary["blobs"], 3) if summary["blobs"] else None
+    _usage["value"] = summary
+    _usage["updated_at"] = time.time()
+    return summary
+
+
+async def dedup_stats() -> Dict[str, Any]:
+    """중복 제거 현황 (이미지 사용 현황은 stats_interval 동안 캐시, 동시 요청은 집계 1회를 공유)"""
+    interval = config_data.get('SNAPSHOT_DEDUP', {}).get('stats_interval', 600.0)
+    async with _usage_lock:
+        if _usage["value"] is None or time.time() - _usage["updated_at"] >= interval:
+            await refresh_dedup_usage()
+    return {**_usage["value"], "updated_at": _usage["updated_at"], "runtime": deduplicator.stats()}
@@ -0,0 +1,130 @@
+"""
+DO(디지털 출력) 명령 스케줄러 모듈
+출력 카메라별로 명령을 직렬화하고, 펄스 동작 중 들어온 trigger는 진행 중인 펄스에 합침
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Optional, Dict, Any, Deque
+
+from config import config_data
+from services.camera_client import get_camera_client
+from utils.metrics import percentile
+from utils.logger import get_logger
+
+logger = get_logger()
+
+
+@dataclass(frozen=True)
+class DOResult:
+    """DO 명령 결과 (bool로 평가하면 성공 여부)"""
+    ok: bool
+    coalesced: bool = False
+    requester: Optional[str] = None  # 실제 명령을 보낸 요청자
+    latency: float = 0.0
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+
+class DOScheduler:
+    """출력 카메라 1대의 DO 명령 큐"""
+
+    def __init__(self, cam_name: str, pulse_margin: float = 0.0):
+        self.cam_name = cam_name
+        self.pulse_margin = pulse_margin
+        self._lock = asyncio.Lock()
+        self._pulse: Optional[asyncio.Future] = None
+        self._pulse_until = 0.0
+        self._latencies: Deque[float] = deque(maxlen=200)
+        self.pending = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    @property
+    def pulse_active(self) -> bool:
+        return self._pulse is not None and (not self._pulse.done() or time.monotonic() < self._pulse_until)
+
+    async def trigger(self, secs: int, requester: Optional[str] = None) -> DOResult:
+        """secs초 펄스 (동작 중인 펄스가 있으면 같은 결과를 공유)"""
+        if self.pulse_active:
+            self.coalesced += 1
+            logger.info(f"[{self.cam_name}] 동작 중인 DO 펄스에 합침 (requester={requester})")
+            result = await asyncio.shield(self._pulse)
+            return replace(result, coalesced=True)
+
+        # 요청자가 끊겨도 합쳐진 요청이 결과를 받도록 별도 태스크로 실행
+        self._pulse = asyncio.ensure_future(self._send(secs, requester, pulse=True))
+        return await asyncio.shield(self._pulse)
+
+    async def command(self, secs: int, requester: Optional[str] = None) -> DOResult:
+        """on(0) / off(-1) / trigger(secs) 명령"""
+        if secs > 0:
+            return await self.trigger(secs, requester)
+        # on/off는 합치지 않고 순서대로 실행하며, 진행 중인 펄스 창을 끝냄
+        self._pulse_until = 0.0
+        return await self._send(secs, requester, pulse=False)
+
+    async def _send(self, secs: int, requester: Optional[str], pulse: bool) -> DOResult:
+        queued_at = time.monotonic()
+        self.pending += 1
+        try:
+            async with self._lock:
+                client = get_camera_client(self.cam_name)
+                ok = await client.trigger_do(secs) if client is not None else False
+                sent_at = time.monotonic()
+        finally:
+            self.pending -= 1
+
+        latency = sent_at - queued_at
+        self._latencies.append(latency)
+        self.sent += 1
+        if ok and pulse:
+            self._pulse_until = sent_at + secs + self.pulse_margin
+        if not ok:
+            self.failed += 1
+            self._pulse_until = 0.0
+        return DOResult(ok=ok, requester=requester, latency=latency)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "queue_depth": self.pending,
+            "pulse_active": self.pulse_active,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "trigger_latency_ms": {
+                "p50": ms(percentile(latencies, 50)),
+                "p95": ms(percentile(latencies, 95)),
+                "max": ms(latencies[-1] if latencies else None),
+            },
+        }
+
+
+# 카메라 이름 -> DOScheduler (DO_cgi가 있는 카메라만)
+_schedulers: Dict[str, DOScheduler] = {}
+
+
+def get_do_scheduler(cam_name: str) -> Optional[DOScheduler]:
+    scheduler = _schedulers.get(cam_name)
+    if scheduler is None:
+        client = get_camera_client(cam_name)
+        if client is None or not client.has_do:
+            return None
+        scheduler = DOScheduler(
+            cam_name,
+            pulse_margin=config_data.get('DO_SCHEDULER', {}).get('pulse_margin', 0.0),
+        )
+        _schedulers[cam_name] = scheduler
+    return scheduler
+
+
+def do_scheduler_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: scheduler.stats() for name, scheduler in _schedulers.items()}
@@ -0,0 +1,304 @@
+"""
+Gate 이벤트 로그 큐 모듈
+문 열기/출차 이벤트를 응답 경로 밖에서 배치로 저장 (MongoDB 장애 시 로컬 스풀 파일에 보관)
+"""
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set, Union
+
+from config import config_data
+from services.log_service import build_log_doc, write_logs
+from services.frame_buffer import get_event_frame
+from services.camera_service import to_data_uri
+from services.dedup_service import save_snapshot
+from utils.logger import get_logger
+
+logger = get_logger()
+
+
+class GateEventQueue:
+    """bounded 큐 + 워커 풀 + 배치 저장 + 스풀 파일"""
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        workers: int = 2,
+        batch_size: int = 50,
+        batch_interval: float = 0.5,
+        retries: int = 3,
+        retry_delay: float = 1.0,
+        spool_file: str = "logs/event_spool.jsonl",
+        spool_replay_interval: float = 30.0,
+    ):
+        self.max_size = max_size
+        self.worker_count = workers
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.spool_path = Path(spool_file)
+        self.spool_replay_interval = spool_replay_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._background: Set[asyncio.Task] = set()
+        self._spool_lock = asyncio.Lock()
+        self.submitted = 0
+        self.written = 0
+        self.failed_batches = 0
+        self.spooled = 0
+        self.replayed = 0
+
+    @classmethod
+    def from_config(cls) -> "GateEventQueue":
+        return cls(**config_data.get('EVENT_QUEUE', {}))
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        self._tasks.append(asyncio.create_task(self._spool_replayer()))
+        logger.info(f"이벤트 로그 큐 시작 (workers={self.worker_count}, batch={self.batch_size})")
+
+    async def stop(self, timeout: float = 10.0):
+        """큐를 비우고 워커 종료 (남은 이벤트는 스풀 파일에 보관)"""
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"이벤트 로그 큐 종료 대기 시간 초과 (남은 이벤트 {self.depth}개)")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        if leftover:
+            await self._spool([self._to_doc(event) for event in leftover])
+        self._queue = None
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """이벤트를 큐에 넣음 (가득 차면 스풀 파일로 보냄)"""
+        self.submitted += 1
+        if self._queue is None:
+            # 큐가 시작되지 않은 경우 (스크립트 등): 바로 저장
+            self._run_background(self._persist([self._to_doc(event)]))
+            return False
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            logger.warning("이벤트 로그 큐가 가득 찼습니다. 스풀 파일에 저장합니다.")
+            self._run_background(self._resolve_and_spool(event))
+            return False
+
+    def _run_background(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _resolve_and_spool(self, event: Dict[str, Any]):
+        await self._resolve_snapshots([event])
+        await self._spool([self._to_doc(event)])
+
+    async def _resolve_snapshots(self, events: List[Dict[str, Any]]):
+        """이벤트별로 스냅샷 처리 (실패한 이벤트는 snapshot_ref 없이 저장하도록 두고 로그만 남김)"""
+        results = await asyncio.gather(*(self._resolve_snapshot(event) for event in events), return_exceptions=True)
+        for event, result in zip(events, results):
+            if isinstance(result, Exception):
+                # blob 저장소에 넣지 못한 이미지는 _to_doc에서 data URI로 보관
+                logger.error(f"이벤트 스냅샷 처리 실패 ({event.get('user_id')}, {event.get('cam_name')}): {result!r}")
+
+    async def _worker(self, index: int):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._resolve_snapshots(batch)
+                await self._persist([self._to_doc(event) for event in batch])
+            except Exception as e:
+                logger.error(f"이벤트 로그 처리 실패: {e}", exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _resolve_snapshot(self, event: Dict[str, Any]):
+        """스냅샷이 없는 이벤트는 이벤트 시점의 프레임으로 채우고, 이미지는 blob 저장소에 넣음"""
+        if event.get("snapshot") is None and event.get("cam_name"):
+            frame = await get_event_frame(event["cam_name"], event["timestamp"])
+            if frame is None:
+                logger.error(f"이벤트 스냅샷 가져오기 실패: {event['cam_name']}")
+            event["snapshot"] = frame.data if frame is not None else None
+
+        data = event.get("snapshot")
+        if isinstance(data, bytes) and data:
+            # 이미 저장된 것과 같은(또는 비슷한) 이미지면 기존 참조 재사용
+            snapshot_ref, thumbnails = await save_snapshot(data)
+            if snapshot_ref is not None:
+                event["snapshot_ref"] = snapshot_ref
+                event["thumbnails"] = thumbnails
+                event["snapshot"] = None
+
+    @staticmethod
+    def _to_doc(event: Dict[str, Any]) -> Dict[str, Any]:
+        snapshot = event.get("snapshot")
+        if isinstance(snapshot, bytes):
+            # blob 저장소에 넣지 못한 이미지는 이전처럼 문서에 data URI로 보관
+            snapshot = to_data_uri(snapshot) if snapshot else None
+        return build_log_doc(
+            user_id=event.get("user_id"),
+            eventinfo=event.get("eventinfo", {}),
+            snapshot=snapshot,
+            user_agent=event.get("user_agent"),
+            timestamp=event.get("timestamp"),
+            snapshot_ref=event.get("snapshot_ref"),
+            thumbnails=event.get("thumbnails"),
+            cam_name=event.get("cam_name") or event.get("eventinfo", {}).get("cam_name"),
+        )
+
+    async def _persist(self, docs: List[Dict[str, Any]]) -> bool:
+        """저장하지 못한 문서만 재시도하고, 그래도 실패하면 스풀 파일에 보관
+
+        문서의 _id는 build_log_doc에서 정해지므로 저장 후 응답만 실패한 문서를 다시 보내도 중복 저장되지 않음
+        """
+        for attempt in range(1, self.retries + 1):
+            try:
+                written, docs = await write_logs(docs)
+                self.written += written
+                if not docs:
+                    return True
+                logger.warning(f"이벤트 로그 {len(docs)}개 저장 실패 ({attempt}/{self.retries})")
+            except Exception as e:
+                logger.warning(f"이벤트 로그 저장 실패 ({attempt}/{self.retries}): {e}")
+            if attempt < self.retries:
+                await asyncio.sleep(self.retry_delay * (2 ** (attempt - 1)))
+
+        self.failed_batches += 1
+        await self._spool(docs)
+        return False
+
+    async def _spool(self, docs: List[Dict[str, Any]]):
+        async with self._spool_lock:
+            await asyncio.to_thread(self._append_spool, docs)
+        self.spooled += len(docs)
+        logger.warning(f"이벤트 로그 {len(docs)}개를 스풀 파일에 보관: {self.spool_path}")
+
+    def _append_spool(self, docs: List[Dict[str, Any]]):
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spool_path, 'a', encoding='utf-8') as f:
+            for doc in docs:
+                f.write(json.dumps(doc, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @property
+    def _replaying_path(self) -> Path:
+        return self.spool_path.with_suffix(".replaying")
+
+    def _take_spool(self) -> List[Dict[str, Any]]:
+        """스풀 파일을 재저장용 파일로 옮기고 읽음 (재저장이 끝나면 삭제)"""
+        replaying = self._replaying_path
+        # 이전 재저장 도중 중단된 파일이 있으면 그것부터 처리
+        if not replaying.exists():
+            if not self.spool_path.exists():
+                return []
+            os.replace(self.spool_path, replaying)
+        docs = []
+        with open(replaying, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    docs.append(json.loads(line))
+        return docs
+
+    async def replay_spool(self) -> int:
+        """스풀 파일의 이벤트를 다시 저장 (저장하지 못한 문서만 스풀 파일로 되돌아감)"""
+        async with self._spool_lock:
+            docs = await asyncio.to_thread(self._take_spool)
+        if not docs:
+            return 0
+
+        logger.info(f"스풀 파일의 이벤트 로그 {len(docs)}개 재저장")
+        replayed = 0
+        failed: List[Dict[str, Any]] = []
+        for i in range(0, len(docs), self.batch_size):
+            batch = docs[i:i + self.batch_size]
+            try:
+                written, batch_failed = await write_logs(batch)
+                replayed += written
+                failed.extend(batch_failed)
+            except Exception as e:
+                logger.warning(f"스풀 재저장 실패: {e}")
+                failed.extend(docs[i:])
+                break
+        async with self._spool_lock:
+            if failed:
+                await asyncio.to_thread(self._append_spool, failed)
+            self._replaying_path.unlink(missing_ok=True)
+        self.replayed += replayed
+        return replayed
+
+    async def _spool_replayer(self):
+        while True:
+            try:
+                await self.replay_spool()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"스풀 파일 처리 실패: {e}", exc_info=True)
+            await asyncio.sleep(self.spool_replay_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "max_size": self.max_size,
+            "submitted": self.submitted,
+            "written": self.written,
+            "failed_batches": self.failed_batches,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "spool_file": str(self.spool_path),
+            "spool_pending": self.spool_path.exists(),
+        }
+
+
+event_queue = GateEventQueue.from_config()
+
+
+def submit_event(
+    user_id: Optional[str],
+    eventinfo: dict,
+    user_agent: Optional[str],
+    snapshot: Optional[Union[bytes, str]] = None,
+    cam_name: Optional[str] = None,
+    timestamp: Optional[float] = None,
+) -> bool:
+    """gate 이벤트 로그를 큐에 넣음 (snapshot이 없으면 cam_name 카메라의 이벤트 시점 프레임 사용)
+
+    snapshot은 JPEG 바이트 (blob 저장소에 저장) 또는 data URI
+    """
+    return event_queue.submit({
+        "user_id": user_id,
+        "eventinfo": eventinfo,
+        "user_agent": user_agent,
+        "snapshot": snapshot,
+        "cam_name": cam_name,
+        "timestamp": timestamp or time.time(),
+    })
@@ -0,0 +1,156 @@
+"""
+카메라 프레임 링 버퍼 모듈
+설정된 카메라마다 백그라운드 캡처 워커가 최근 N개 프레임을 메모리에 유지
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Optional, Dict, Deque
+
+from config import config_data
+from services.camera_service import get_frame, to_data_uri
+from services.snapshot_cache import Frame
+from utils.logger import get_logger
+
+logger = get_logger()
+
+
+class FrameRingBuffer:
+    """최근 프레임을 depth개까지 보관하는 링 버퍼"""
+
+    def __init__(self, depth: int):
+        self._frames: Deque[Frame] = deque(maxlen=depth)
+        self._arrived = asyncio.Event()
+
+    @property
+    def depth(self) -> int:
+        return self._frames.maxlen
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def latest(self) -> Optional[Frame]:
+        return self._frames[-1] if self._frames else None
+
+    def append(self, frame: Frame):
+        latest = self.latest
+        if latest is not None and latest.captured_at >= frame.captured_at:
+            return
+        self._frames.append(frame)
+        # 대기 중인 nearest() 호출을 깨움
+        self._arrived.set()
+        self._arrived = asyncio.Event()
+
+    def nearest_to(self, ts: float) -> Optional[Frame]:
+        if not self._frames:
+            return None
+        return min(self._frames, key=lambda frame: abs(frame.captured_at - ts))
+
+    async def nearest(self, ts: float, wait: float) -> Optional[Frame]:
+        """ts 시점에 가장 가까운 프레임 반환 (ts 이후 프레임을 최대 wait초 기다림)"""
+        deadline = time.monotonic() + wait
+        while self.latest is None or self.latest.captured_at < ts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return self.nearest_to(ts)
+
+
+class CaptureWorker:
+    """카메라 1대의 백그라운드 캡처 워커"""
+
+    def __init__(self, cam_name: str, depth: int, fps: float):
+        self.cam_name = cam_name
+        self.fps = fps
+        self.buffer = FrameRingBuffer(depth)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        interval = 1.0 / self.fps
+        logger.info(f"[{self.cam_name}] 프레임 캡처 워커 시작 ({self.fps} fps, {self.buffer.depth} frames)")
+        while True:
+            started = time.monotonic()
+            try:
+                # 스냅샷 캐시를 거치므로 같은 시점의 폴링/스트림 요청과 업스트림 요청을 공유
+                frame = await get_frame(self.cam_name, max_age=interval / 2)
+                if frame is not None:
+                    self.buffer.append(frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[{self.cam_name}] 프레임 캡처 실패: {e}")
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 카메라 이름 -> CaptureWorker
+_workers: Dict[str, CaptureWorker] = {}
+
+
+def start_capture_workers():
+    """CAMERAS 항목 중 capture.enabled인 카메라의 워커 시작"""
+    for name, camera in config_data.get('CAMERAS', {}).items():
+        capture = camera.get('capture') or {}
+        if not capture.get('enabled'):
+            continue
+        worker = _workers.get(name)
+        if worker is None:
+            worker = CaptureWorker(name, depth=capture.get('depth', 10), fps=capture.get('fps', 2.0))
+            _workers[name] = worker
+        worker.start()
+
+
+async def stop_capture_workers():
+    for worker in _workers.values():
+        await worker.stop()
+    _workers.clear()
+
+
+async def get_event_frame(cam_name: str, trigger_ts: float) -> Optional[Frame]:
+    """이벤트 시점(trigger_ts)에 가장 가까운 프레임 반환 (버퍼가 없거나 멀면 바로 가져옴)"""
+    worker = _workers.get(cam_name)
+    if worker is not None:
+        capture = config_data.get('CAMERAS', {}).get(cam_name, {}).get('capture') or {}
+        frame = await worker.buffer.nearest(trigger_ts, wait=capture.get('event_wait', 1.0))
+        # 캡처가 멈춘 경우 오래된 프레임이 선택되지 않도록 허용 범위 확인
+        if frame is not None and abs(frame.captured_at - trigger_ts) <= capture.get('event_tolerance', 2.0):
+            return frame
+    return await get_frame(cam_name)
+
+
+async def get_event_snapshot(cam_name: str, trigger_ts: float) -> Optional[str]:
+    """이벤트 시점의 스냅샷을 data URI로 반환"""
+    frame = await get_event_frame(cam_name, trigger_ts)
+    if frame is None:
+        logger.error(f"이벤트 스냅샷 가져오기 실패: {cam_name}")
+        return None
+    return to_data_uri(frame.data)
+
+
+def capture_stats() -> Dict[str, dict]:
+    return {
+        name: {
+            "fps": worker.fps,
+            "depth": worker.buffer.depth,
+            "buffered": len(worker.buffer),
+            "latest_age": round(worker.buffer.latest.age(), 3) if worker.buffer.latest else None,
+        }
+        for name, worker in _workers.items()
+    }
@@ -1,60 +1,144 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator
+import asyncio
+import base64
+import json
 import time
 from datetime import datetime, timedelta, timezone
-from database import get_database
+from database import get_database, register_query_pattern
 from config import config_data
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from services.blob_store import decode_data_uri
+from services.dedup_service import save_snapshot, mark_used
+from services.user_service import get_user_names
+from services.retention_service import stamp_expiry
+from services.stats_service import record_events
+from utils.logger import get_logger
 
+logger = get_logger()
 
-async def update_log(
+
+def _regdate(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def format_regdate(value: Any) -> Optional[str]:
+    """regdate를 기존 문자열 형식("2023-07-18 20:13:56", 서버 로컬 시각)으로 변환"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            # MongoDB에서 읽은 datetime은 UTC 기준 naive
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def build_log_doc(
     user_id: Optional[str],
-    eventinfo: dict, 
-    snapshot: str, 
+    eventinfo: dict,
+    snapshot: Optional[str],
     user_agent: Optional[str],
+    timestamp: Optional[float] = None,
+    snapshot_ref: Optional[Dict[str, Any]] = None,
+    thumbnails: Optional[Dict[str, Dict[str, Any]]] = None,
+    cam_name: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """로그 업데이트"""
-    db = get_database()
-    if db is None:
-        raise Exception("데이터베이스 연결이 없습니다")
-    
-    collection_name = config_data.get('MONGODB', {}).get('tables', {}).get('log', 'user_log')
-    collection = db[collection_name]
-    
-    timestamp = time.time()
-    regdate = time.strftime("%Y-%m-%d %H:%M:%S")
-    
-    log_doc = {
-        "regdate": regdate,
+    """로그 문서 생성 (timestamp가 없으면 현재 시각)
+
+    regdate는 검색 범위 조건에 인덱스를 쓸 수 있도록 datetime으로 저장 (응답에서는 format_regdate로 기존 문자열 형식)
+    스냅샷은 blob 저장소의 참조(snapshot_ref)로 저장하고, 저장소에 넣지 못한 경우에만 data URI(snapshot)를 넣음
+    _id는 여기서 정하여 재시도/스풀 파일 재저장에서도 같은 값을 사용 (이미 저장된 문서는 중복 키로 구분)
+    """
+    timestamp = timestamp or time.time()
+    doc = {
+        "_id": ObjectId(),
+        "regdate": _regdate(timestamp),
         "timestamp": timestamp,
         "user_id": user_id,
         "eventinfo": eventinfo,
         "user_agent": user_agent,
-        "snapshot": snapshot,
     }
-    
-    # 30일 이전의 오래된 로그 찾기
-    old_timestamp = timestamp - (3600*24*30)  # 30일
-    old_log = await collection.find_one(
-        {"timestamp": {"$lt": old_timestamp}},
-        sort=[("timestamp", 1)]
-    )
-    
-    if old_log:
-        # 기존 로그 업데이트
-        await collection.update_one(
-            {"_id": old_log["_id"]},
-            {"$set": log_doc}
-        )
-        log_doc["_id"] = old_log["_id"]
-    else:
-        # 새 로그 생성
-        result = await collection.insert_one(log_doc)
-        log_doc["_id"] = result.inserted_id
-    
-    # _id를 문자열로 변환
-    if "_id" in log_doc:
-        log_doc["id"] = str(log_doc["_id"])
+    if cam_name:
+        doc["cam_name"] = cam_name
+    if snapshot_ref:
+        doc["snapshot_ref"] = snapshot_ref
+        if thumbnails:
+            doc["thumbnails"] = thumbnails
+    elif snapshot:
+        doc["snapshot"] = snapshot
+    return doc
+
+
+def _prepare_log_doc(log_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """저장할 복사본 (원본에는 _id만 채움, 스풀 파일에서 다시 읽은 문서는 _id/regdate 복원)"""
+    if isinstance(log_doc.get("_id"), str) and ObjectId.is_valid(log_doc["_id"]):
+        log_doc["_id"] = ObjectId(log_doc["_id"])
+    log_doc.setdefault("_id", ObjectId())
+    doc = stamp_expiry(dict(log_doc))
+    if not isinstance(doc.get("regdate"), datetime) and isinstance(doc.get("timestamp"), (int, float)):
+        # 스풀 파일에서 다시 읽은 문서는 regdate가 문자열이므로 timestamp로 복원
+        doc["regdate"] = _regdate(doc["timestamp"])
+    return doc
+
+
+async def write_logs(log_docs: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+    """로그 문서 여러 개를 한 번의 insert_many로 저장하고 저장한 문서의 출입 통계 카운터 증가/스냅샷 사용 시각 갱신
+
+    반환: (저장한 문서 수, 저장하지 못한 원본 문서 - 이것만 다시 시도)
+    _id가 같은 문서가 이미 있으면(중복 키) 저장한 것으로 봄. 일부 실패 시에는 실패한 문서만 다시 보내므로,
+    중복 키는 insert_many가 결과 없이 예외로 끝난(저장 후 응답 시간 초과 등) 시도에서만 생기며 그 시도에서는 카운터를 늘리지 않았음
+    오래된 로그 정리는 retention_service에서 처리
+    """
+    db = get_database()
+    if db is None:
+        raise Exception("데이터베이스 연결이 없습니다")
+    if not log_docs:
+        return 0, []
+
+    collection_name = config_data.get('MONGODB', {}).get('tables', {}).get('log', 'user_log')
+    collection = db[collection_name]
 
+    docs = [_prepare_log_doc(log_doc) for log_doc in log_docs]
+    failed_index = set()
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = [error for error in e.details.get("writeErrors", []) if error.get("code") != 11000]
+        failed_index = {error["index"] for error in errors}
+        if errors:
+            logger.warning(f"로그 {len(errors)}개 저장 실패: {errors[0].get('errmsg')}")
+    failed = [log_docs[i] for i in sorted(failed_index)]
+    inserted = [doc for i, doc in enumerate(docs) if i not in failed_index]
+
+    if _log_count["value"] is not None:
+        # 다음 갱신 전까지 새로 추가된 로그 수 반영
+        _log_count["value"] += len(inserted)
+    if inserted:
+        try:
+            await record_events(inserted)
+        except Exception as e:
+            # 로그는 이미 저장되었으므로 다시 시도하지 않음 (manage.py rebuild-stats로 보정)
+            logger.warning(f"출입 통계 갱신 실패: {e}")
+        try:
+            await mark_used(inserted)
+        except Exception as e:
+            logger.warning(f"스냅샷 사용 시각 갱신 실패: {e}")
+    return len(inserted), failed
+
+
+async def update_log(
+    user_id: Optional[str],
+    eventinfo: dict, 
+    snapshot: str, 
+    user_agent: Optional[str],
+) -> Dict[str, Any]:
+    """로그 업데이트"""
+    data = decode_data_uri(snapshot)
+    snapshot_ref, thumbnails = None, None
+    if data:
+        snapshot_ref, thumbnails = await save_snapshot(data)
+    log_doc = build_log_doc(user_id, eventinfo, snapshot, user_agent, snapshot_ref=snapshot_ref, thumbnails=thumbnails)
+    await write_logs([log_doc])
     return log_doc
 
 
@@ -113,39 +197,419 @@ async def update_log(
 #     return log_doc
 
 
-async def get_logs(page: int = 1, offset: int = 20) -> List[Dict[str, Any]]:
-    """로그 목록 조회 (페이지네이션)"""
+register_query_pattern("log.list", "log", {}, sort=[("timestamp", -1), ("_id", -1)])
+register_query_pattern(
+    "log.keyset",
+    "log",
+    {"$or": [{"timestamp": {"$lt": 0.0}}, {"timestamp": 0.0, "_id": {"$lt": ObjectId()}}]},
+    sort=[("timestamp", -1), ("_id", -1)],
+)
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """(timestamp, _id)로 만든 불투명 페이지 커서"""
+    raw = json.dumps([doc["timestamp"], str(doc["_id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, ObjectId]:
+    """페이지 커서 해석 (형식 오류는 ValueError)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, log_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(timestamp), ObjectId(log_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+# 목록 응답용 단계: 이미지 본문은 빼고 기존 문서의 data URI는 has_snapshot으로만 표시
+_LIST_STAGES = [
+    {"$addFields": {"has_snapshot": {"$gt": [{"$strLenBytes": {"$ifNull": ["$snapshot", ""]}}, 0]}}},
+    {"$project": {"snapshot": 0}},
+]
+
+
+async def _fill_user_names(logs: List[Dict[str, Any]]):
+    """사용자 이름은 페이지 전체를 한 번에 조회 (캐시에 있으면 쿼리 없음)"""
+    user_names = await get_user_names(doc.get("user_id") for doc in logs)
+    for doc in logs:
+        doc["user_name"] = user_names.get(doc.get("user_id"), "-")
+
+
+async def get_logs(
+    page: int = 1,
+    offset: int = 20,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """로그 목록 조회 (최신순)
+
+    before/after 커서가 있으면 (timestamp, _id) 인덱스로 바로 이어서 읽음 (페이지 깊이와 관계없이 같은 비용)
+    - before: 커서보다 오래된 로그, after: 커서보다 최근 로그
+    - 커서가 없으면 page 사용 (기존 호환)
+    목록에는 이미지 본문을 포함하지 않음 (기존 문서의 data URI는 has_snapshot으로만 표시)
+    """
     db = get_database()
     if db is None:
         return []
     
-    collection_name = config_data.get('MONGODB', {}).get('tables', {}).get('log', 'gate_log')
     collection_log  = db[config_data.get('MONGODB', {}).get('tables', {}).get('log', 'gate_log')]
-    collection_user = db[config_data.get('MONGODB', {}).get('tables', {}).get('user', 'user')]
-    
-    skip = (page - 1) * offset
     
-    cursor = collection_log.find().sort("timestamp", -1).skip(skip).limit(offset)
-    logs = []
-    async for doc in cursor:
-        user_doc = await collection_user.find_one({"user_id": doc["user_id"]})
-        # print ("user_doc", user_doc)
-        if user_doc:
-            doc["user_name"] = user_doc.get("name")
-        else:
-            doc["user_name"] = "-"
-        logs.append(doc)
+    if before or after:
+        timestamp, log_id = decode_cursor(before or after)
+        op = "$lt" if before else "$gt"
+        order = -1 if before else 1
+        pipeline = [
+            {"$match": {"$or": [
+                {"timestamp": {op: timestamp}},
+                {"timestamp": timestamp, "_id": {op: log_id}},
+            ]}},
+            {"$sort": {"timestamp": order, "_id": order}},
+            {"$limit": offset},
+        ]
+    else:
+        pipeline = [
+            {"$sort": {"timestamp": -1, "_id": -1}},
+            {"$skip": (page - 1) * offset},
+            {"$limit": offset},
+        ]
+
+    cursor = collection_log.aggregate(pipeline + _LIST_STAGES)
+    logs = [doc async for doc in cursor]
+    if after:
+        # 최근 방향으로 읽었으므로 최신순으로 되돌림
+        logs.reverse()
+
+    await _fill_user_names(logs)
     return logs
 
 
-async def get_log_count() -> int:
-    """전체 로그 개수 조회"""
+# 검색 조건 이름 -> 로그 문서 필드 (각각 (필드, regdate, _id) 복합 인덱스 사용)
+SEARCH_FIELDS = {
+    "user_id": "user_id",
+    "mode": "eventinfo.mode",
+    "cam_name": "cam_name",
+    "ip": "eventinfo.ip",
+}
+
+# regdate 범위 조건의 하한 (문자열 regdate는 타입이 달라 제외됨)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+for _name, _field in SEARCH_FIELDS.items():
+    register_query_pattern(
+        f"log.search.{_name}", "log", {_field: "", "regdate": {"$gte": _EPOCH}},
+        sort=[("regdate", -1), ("_id", -1)],
+    )
+register_query_pattern("log.search.range", "log", {"regdate": {"$gte": _EPOCH}}, sort=[("regdate", -1), ("_id", -1)])
+
+
+def encode_search_cursor(doc: Dict[str, Any]) -> str:
+    """(regdate, _id)로 만든 검색 결과 페이지 커서"""
+    regdate = doc["regdate"]
+    if regdate.tzinfo is None:
+        regdate = regdate.replace(tzinfo=timezone.utc)
+    # MongoDB Date는 밀리초 단위이므로 같은 방식으로 자름
+    millis = int(regdate.replace(microsecond=0).timestamp()) * 1000 + regdate.microsecond // 1000
+    raw = json.dumps([millis, str(doc["_id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """검색 결과 페이지 커서 해석 (형식 오류는 ValueError)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        millis, log_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc), ObjectId(log_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def build_search_query(
+    filters: Dict[str, Optional[str]],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """검색 조건으로 MongoDB 쿼리 생성 (since 이상, until 미만)"""
+    query: Dict[str, Any] = {
+        SEARCH_FIELDS[name]: value for name, value in filters.items() if value is not None
+    }
+    regdate = {"$gte": since or _EPOCH}
+    if until is not None:
+        regdate["$lt"] = until
+    query["regdate"] = regdate
+    return query
+
+
+async def search_logs(
+    filters: Dict[str, Optional[str]],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 50,
+    before: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """조건에 맞는 로그 검색 (최신순, before 커서로 다음 페이지)
+
+    regdate가 아직 문자열인 기존 로그는 backfill_regdate로 변환된 뒤부터 검색됨
+    """
+    db = get_database()
+    if db is None:
+        return []
+
+    collection = db[config_data.get('MONGODB', {}).get('tables', {}).get('log', 'gate_log')]
+    query = build_search_query(filters, since, until)
+    if before:
+        regdate, log_id = decode_search_cursor(before)
+        query = {"$and": [query, {"$or": [
+            {"regdate": {"$lt": regdate}},
+            {"regdate": regdate, "_id": {"$lt": log_id}},
+        ]}]}
+
+    cursor = collection.aggregate([
+        {"$match": query},
+        {"$sort": {"regdate": -1, "_id": -1}},
+        {"$limit": limit},
+    ] + _LIST_STAGES)
+    logs = [doc async for doc in cursor]
+
+    await _fill_user_names(logs)
+    return logs
+
+
+async def iter_logs(
+    filters: Dict[str, Optional[str]],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = 500,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """검색 조건에 맞는 로그 전체를 batch_size개씩 차례로 반환 (내보내기용, 최신순)
+
+    커서에서 한 배치씩만 읽으므로 로그 수와 관계없이 메모리 사용량이 일정하고,
+    받는 쪽이 다음 배치를 요청할 때까지 더 읽지 않음
+    """
+    db = get_database()
+    if db is None:
+        return
+
+    collection = db[config_data.get('MONGODB', {}).get('tables', {}).get('log', 'gate_log')]
+    cursor = collection.aggregate([
+        {"$match": build_search_query(filters, since, until)},
+        {"$sort": {"regdate": -1, "_id": -1}},
+    ] + _LIST_STAGES, batchSize=batch_size)
+
+    batch: List[Dict[str, Any]] = []
+    try:
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                await _fill_user_names(batch)
+                yield batch
+                batch = []
+        if batch:
+            await _fill_user_names(batch)
+            yield batch
+    finally:
+        # 클라이언트가 중간에 끊은 경우에도 서버 커서 정리
+        await cursor.close()
+
+
+async def backfill_regdate(batch_size: int = 1000, limit: Optional[int] = None, pause: float = 0.0) -> Dict[str, int]:
+    """문자열로 저장된 기존 로그의 regdate를 datetime으로 변환 (batch_size개씩)
+
+    timestamp가 있으면 timestamp로, 없으면 문자열을 서버 로컬 시각으로 해석
+    """
+    db = get_database()
+    if db is None:
+        raise Exception("데이터베이스 연결이 없습니다")
+
+    collection = db[config_data.get('MONGODB', {}).get('tables', {}).get('log', 'gate_log')]
+    query = {"regdate": {"$type": "string"}}
+    converted = {"$cond": [
+        {"$isNumber": "$timestamp"},
+        {"$toDate": {"$multiply": ["$timestamp", 1000]}},
+        {"$dateFromString": {
+            "dateString": "$regdate",
+            "format": "%Y-%m-%d %H:%M:%S",
+            "timezone": time.strftime("%z"),
+            # 해석할 수 없는 값은 그대로 둠
+            "onError": "$regdate",
+        }},
+    ]}
+    result = {"scanned": 0, "converted": 0, "skipped": 0}
+    # 변환하지 못한 문서를 다시 읽지 않도록 _id 기준으로 진행
+    last_id = None
+
+    while limit is None or result["scanned"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - result["scanned"])
+        batch_query = dict(query, _id={"$gt": last_id}) if last_id is not None else query
+        ids = [doc["_id"] for doc in await collection.find(batch_query, {"_id": 1}).sort("_id", 1).limit(size).to_list(size)]
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        update = await collection.update_many(
+            {"_id": {"$in": ids}, "regdate": {"$type": "string"}},
+            [{"$set": {"regdate": converted}}],
+        )
+        result["scanned"] += len(ids)
+        result["converted"] += update.modified_count
+        result["skipped"] += len(ids) - update.modified_count
+        if pause:
+            await asyncio.sleep(pause)
+
+    if result["scanned"]:
+        logger.info(f"regdate 변환: {result}")
+    return result
+
+
+_backfill_task: Optional[asyncio.Task] = None
+
+
+async def _regdate_backfill_job(batch_size: int, pause: float):
+    try:
+        await backfill_regdate(batch_size=batch_size, pause=pause)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"regdate 변환 실패: {e}", exc_info=True)
+
+
+def start_regdate_backfill():
+    """시작 시 문자열 regdate를 백그라운드에서 변환 (LOG_SEARCH.backfill)"""
+    global _backfill_task
+    settings = config_data.get('LOG_SEARCH', {})
+    if not settings.get('backfill', True):
+        return
+    if _backfill_task is None or _backfill_task.done():
+        _backfill_task = asyncio.create_task(_regdate_backfill_job(
+            settings.get('backfill_batch', 1000),
+            settings.get('backfill_pause', 0.1),
+        ))
+
+
+async def stop_regdate_backfill():
+    global _backfill_task
+    if _backfill_task is not None:
+        _backfill_task.cancel()
+        try:
+            await _backfill_task
+        except asyncio.CancelledError:
+            pass
+        _backfill_task = None
+
+
+async def get_embedded_snapshot(log_id: str) -> Optional[bytes]:
+    """blob 저장소로 옮기기 전 로그 문서에 들어 있는 스냅샷 조회"""
+    db = get_database()
+    if db is None or not ObjectId.is_valid(log_id):
+        return None
+
+    collection = db[config_data.get('MONGODB', {}).get('tables', {}).get('log', 'gate_log')]
+    doc = await collection.find_one({"_id": ObjectId(log_id)}, {"snapshot": 1})
+    return decode_data_uri(doc.get("snapshot")) if doc else None
+
+
+async def migrate_embedded_snapshots(batch_size: int = 100, limit: Optional[int] = None, dry_run: bool = False) -> Dict[str, int]:
+    """로그 문서에 들어 있는 data URI 스냅샷을 blob 저장소로 옮김 (batch_size개씩)"""
+    db = get_database()
+    if db is None:
+        raise Exception("데이터베이스 연결이 없습니다")
+
+    collection = db[config_data.get('MONGODB', {}).get('tables', {}).get('log', 'gate_log')]
+    query = {"snapshot": {"$exists": True}}
+    result = {"scanned": 0, "migrated": 0, "emptied": 0, "failed": 0, "bytes": 0}
+    # 실패한 문서는 남아 있으므로 다음 배치에서 다시 읽지 않도록 _id 기준으로 진행
+    last_id = None
+
+    while limit is None or result["scanned"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - result["scanned"])
+        batch_query = dict(query, _id={"$gt": last_id}) if last_id is not None else query
+        docs = await collection.find(batch_query, {"snapshot": 1}).sort("_id", 1).limit(size).to_list(size)
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+
+        operations = []
+        for doc in docs:
+            result["scanned"] += 1
+            data = decode_data_uri(doc.get("snapshot"))
+            if data is None:
+                # 빈 문자열 등은 필드만 제거
+                result["emptied"] += 1
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$unset": {"snapshot": ""}}))
+                continue
+            if dry_run:
+                result["migrated"] += 1
+                result["bytes"] += len(data)
+                continue
+            snapshot_ref, thumbnails = await save_snapshot(data)
+            if snapshot_ref is None:
+                result["failed"] += 1
+                continue
+            result["migrated"] += 1
+            result["bytes"] += len(data)
+            update = {"snapshot_ref": snapshot_ref}
+            if thumbnails:
+                update["thumbnails"] = thumbnails
+            operations.append(UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": update, "$unset": {"snapshot": ""}},
+            ))
+
+        if operations and not dry_run:
+            await collection.bulk_write(operations, ordered=False)
+        logger.info(f"스냅샷 이전 진행: {result}")
+
+    return result
+
+
+# 전체 로그 개수 (요청마다 세지 않고 백그라운드에서 주기적으로 갱신)
+_log_count: Dict[str, Any] = {"value": None, "updated_at": 0.0}
+_log_count_task: Optional[asyncio.Task] = None
+
+
+async def refresh_log_count() -> int:
+    """컬렉션 메타데이터로 로그 개수 갱신 (estimated_document_count)"""
     db = get_database()
     if db is None:
         return 0
-    
+
     collection_name = config_data.get('MONGODB', {}).get('tables', {}).get('log', 'user_log')
-    collection = db[collection_name]
-    
-    return await collection.count_documents({})
+    _log_count["value"] = await db[collection_name].estimated_document_count()
+    _log_count["updated_at"] = time.time()
+    return _log_count["value"]
 
+
+async def _log_count_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_log_count()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"로그 개수 갱신 실패: {e}")
+
+
+def start_log_count_refresher():
+    global _log_count_task
+    interval = config_data.get('LOG_LIST', {}).get('count_refresh_interval', 60.0)
+    if _log_count_task is None or _log_count_task.done():
+        _log_count_task = asyncio.create_task(_log_count_loop(interval))
+
+
+async def stop_log_count_refresher():
+    global _log_count_task
+    if _log_count_task is not None:
+        _log_count_task.cancel()
+        try:
+            await _log_count_task
+        except asyncio.CancelledError:
+            pass
+        _log_count_task = None
+
+
+async def get_log_count() -> int:
+    """전체 로그 개수 조회 (캐시된 추정값)"""
+    if _log_count["value"] is None:
+        return await refresh_log_count()
+    return _log_count["value"]
@@ -0,0 +1,346 @@
+"""
+차량번호(LPR) 조회 모듈
+사용자의 plates(이전 데이터는 plate)를 정규화한 번호 -> 사용자 색인으로 메모리에 두고 LPR 이벤트마다 조회 (DB 조회 없음)
+- 정규화: 공백/하이픈 등 기호 제거, 대문자
+- OCR 혼동 문자(O/0, I/1, B/8 등)는 같은 문자로 바꿔 비교 (LPR.confusions로 추가)
+- 퍼지 매칭(LPR.fuzzy, 기본 꺼짐): 삭제 이웃(deletion neighborhood) 색인으로 max_distance 이내 후보를 찾고 편집 거리로 확인
+  가장 가까운 후보가 여러 사용자이면 매칭하지 않음. 편집 거리로 찾은 사용자는 확인용이며 문을 열지 않음 (/lpr)
+사용자 생성/수정/삭제 시 바뀐 사용자만 다시 조회하여 색인 갱신 (change stream을 쓸 수 없으면 refresh_interval마다 전체 재구성)
+"""
+import asyncio
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Set, Tuple, Iterable
+
+from bson import ObjectId
+
+from config import config_data
+from database import get_database
+from services.schedule_service import SCHEDULE_FIELDS, attach_schedule
+from services.user_service import on_user_change, user_cache
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# OCR에서 자주 혼동하는 문자 -> 비교용 문자
+DEFAULT_CONFUSIONS = {"O": "0", "Q": "0", "D": "0", "I": "1", "L": "1", "Z": "2", "S": "5", "B": "8", "G": "6"}
+
+# 색인에 필요한 사용자 필드 (출입 가능 여부 확인 포함)
+_PROJECTION = {"user_id": 1, "name": 1, "flag": 1, "plates": 1, "plate": 1, **dict.fromkeys(SCHEDULE_FIELDS, 1)}
+
+
+def _lpr_config() -> Dict[str, Any]:
+    lpr = config_data.get('LPR', {})
+    return {
+        "fuzzy": lpr.get('fuzzy', False),
+        "max_distance": lpr.get('max_distance', 0),
+        "min_fuzzy_length": lpr.get('min_fuzzy_length', 6),
+        "confusions": {**DEFAULT_CONFUSIONS, **lpr.get('confusions', {})},
+        "refresh_interval": lpr.get('refresh_interval', 300.0),
+    }
+
+
+def _user_collection():
+    db = get_database()
+    if db is None:
+        return None
+    return db[config_data.get('MONGODB', {}).get('tables', {}).get('user', 'user')]
+
+
+def normalize_plate(value: Any) -> str:
+    """차량번호 정규화 (NFKC, 대문자, 글자/숫자만 남김): "12가 3456" -> "12가3456" """
+    text = unicodedata.normalize("NFKC", str(value or "")).upper()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def user_plates(user: Dict[str, Any]) -> List[str]:
+    """사용자 문서의 차량번호 목록 (plates가 없으면 이전 plate 필드, 문자열 하나도 허용)"""
+    plates = user.get("plates") or user.get("plate") or []
+    if isinstance(plates, str):
+        plates = [plates]
+    return [plate for plate in plates if isinstance(plate, str)]
+
+
+def _deletions(text: str, distance: int) -> Set[str]:
+    """text에서 글자를 distance개 이하로 뺀 문자열 전체 (자기 자신 포함)"""
+    found = {text}
+    frontier = {text}
+    for _ in range(distance):
+        frontier = {item[:i] + item[i + 1:] for item in frontier for i in range(len(item))}
+        found |= frontier
+    return found
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """편집 거리 (Levenshtein), limit를 넘으면 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+@dataclass(frozen=True)
+class PlateMatch:
+    """차량번호 조회 결과 (bool로 평가하면 사용자를 찾았는지 여부)"""
+    plate: str  # 정규화한 입력 번호
+    user: Optional[Dict[str, Any]] = None
+    matched: Optional[str] = None  # 사용자에게 등록된 번호
+    distance: int = 0
+    ambiguous: bool = False  # 같은 거리의 후보가 여러 사용자
+
+    def __bool__(self) -> bool:
+        return self.user is not None
+
+
+class PlateIndex:
+    """정규화한 차량번호 -> 사용자 색인 (match()는 dict 조회만 수행)"""
+
+    def __init__(
+        self,
+        fuzzy: bool = False,
+        max_distance: int = 0,
+        min_fuzzy_length: int = 6,
+        confusions: Optional[Dict[str, str]] = None,
+        refresh_interval: float = 300.0,
+    ):
+        self.fuzzy = fuzzy
+        self.max_distance = max_distance if fuzzy else 0
+        self.min_fuzzy_length = min_fuzzy_length
+        self.refresh_interval = refresh_interval
+        self._table = str.maketrans({
+            normalize_plate(key): normalize_plate(value)
+            for key, value in (confusions if confusions is not None else DEFAULT_CONFUSIONS).items()
+            if len(normalize_plate(key)) == 1
+        })
+        # 사용자 _id -> (색인용 사용자 문서, 비교용 번호 -> 등록된 번호)
+        self._users: Dict[ObjectId, Tuple[Dict[str, Any], Dict[str, str]]] = {}
+        # 비교용 번호 -> 사용자 _id
+        self._exact: Dict[str, Set[ObjectId]] = {}
+        # 비교용 번호에서 글자를 뺀 문자열 -> 비교용 번호 (퍼지 매칭 후보)
+        self._neighbors: Dict[str, Set[str]] = {}
+
+        self.loaded = False
+        self.rebuilds = 0
+        self.updates = 0
+        self._full = False
+        self._pending: Set[ObjectId] = set()
+        self._updater: Optional[asyncio.Task] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls) -> "PlateIndex":
+        return cls(**_lpr_config())
+
+    def canonical(self, plate: str) -> str:
+        """비교용 번호 (정규화 후 OCR 혼동 문자 치환)"""
+        return normalize_plate(plate).translate(self._table)
+
+    def _add(self, oid: ObjectId, user: Dict[str, Any]):
+        plates = {}
+        for plate in user_plates(user):
+            key = self.canonical(plate)
+            if key:
+                plates.setdefault(key, normalize_plate(plate))
+        if not plates:
+            return
+        self._users[oid] = (attach_schedule(user), plates)
+        for key in plates:
+            owners = self._exact.setdefault(key, set())
+            if not owners and self.max_distance:
+                for variant in _deletions(key, self.max_distance):
+                    self._neighbors.setdefault(variant, set()).add(key)
+            owners.add(oid)
+
+    def _remove(self, oid: ObjectId):
+        entry = self._users.pop(oid, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            owners = self._exact.get(key)
+            if owners is None:
+                continue
+            owners.discard(oid)
+            if owners:
+                continue
+            del self._exact[key]
+            if self.max_distance:
+                for variant in _deletions(key, self.max_distance):
+                    keys = self._neighbors.get(variant)
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del self._neighbors[variant]
+
+    def _candidates(self, key: str) -> Dict[str, int]:
+        """비교용 번호 -> 편집 거리 (일치하는 번호가 있으면 그것만)"""
+        if key in self._exact:
+            return {key: 0}
+        if not self.max_distance or len(key) < self.min_fuzzy_length:
+            return {}
+        candidates: Dict[str, int] = {}
+        for variant in _deletions(key, self.max_distance):
+            for plate_key in self._neighbors.get(variant, ()):
+                if plate_key not in candidates:
+                    candidates[plate_key] = edit_distance(key, plate_key, self.max_distance)
+        return {plate_key: distance for plate_key, distance in candidates.items() if distance <= self.max_distance}
+
+    def match(self, plate: str) -> PlateMatch:
+        """인식된 번호로 사용자 조회"""
+        normalized = normalize_plate(plate)
+        candidates = self._candidates(normalized.translate(self._table)) if normalized else {}
+        if not candidates:
+            return PlateMatch(plate=normalized)
+
+        distance = min(candidates.values())
+        closest = [plate_key for plate_key, value in candidates.items() if value == distance]
+        owners = set().union(*(self._exact[plate_key] for plate_key in closest))
+        if len(owners) != 1:
+            return PlateMatch(plate=normalized, distance=distance, ambiguous=True)
+
+        user, plates = self._users[owners.pop()]
+        matched = next(plates[plate_key] for plate_key in closest if plate_key in plates)
+        return PlateMatch(plate=normalized, user=user, matched=matched, distance=distance)
+
+    async def rebuild(self) -> int:
+        """user 컬렉션 전체로 색인을 다시 만듦 (완성된 뒤 교체하므로 조회는 이전 색인 사용)"""
+        collection = _user_collection()
+        if collection is None:
+            raise RuntimeError("데이터베이스 연결이 없습니다")
+        fresh = PlateIndex(self.fuzzy, self.max_distance, self.min_fuzzy_length, {}, self.refresh_interval)
+        fresh._table = self._table
+        async for doc in collection.find({}, _PROJECTION):
+            fresh._add(doc["_id"], doc)
+        self._users, self._exact, self._neighbors = fresh._users, fresh._exact, fresh._neighbors
+        self.loaded = True
+        self.rebuilds += 1
+        logger.info(f"차량번호 색인 재구성: 사용자 {len(self._users)}명, 번호 {len(self._exact)}개")
+        return len(self._users)
+
+    async def refresh_users(self, oids: Iterable[ObjectId]):
+        """바뀐 사용자만 다시 조회하여 색인 갱신 (삭제된 사용자는 제거)"""
+        oids = list(oids)
+        collection = _user_collection()
+        if collection is None:
+            raise RuntimeError("데이터베이스 연결이 없습니다")
+        docs = await collection.find({"_id": {"$in": oids}}, _PROJECTION).to_list(len(oids))
+        for oid in oids:
+            self._remove(oid)
+        for doc in docs:
+            self._add(doc["_id"], doc)
+        self.updates += len(oids)
+
+    def mark_changed(self, user_oid: Optional[ObjectId]):
+        """사용자 변경 알림 (None이면 전체 재구성), 백그라운드에서 순서대로 반영"""
+        if user_oid is None or not isinstance(user_oid, ObjectId):
+            self._full = True
+        else:
+            self._pending.add(user_oid)
+        if self._updater is None or self._updater.done():
+            try:
+                self._updater = asyncio.get_running_loop().create_task(self._apply_changes())
+            except RuntimeError:
+                # 이벤트 루프 밖 (manage.py 등): 다음 시작 시 전체 재구성
+                self._full = True
+
+    async def _apply_changes(self):
+        while self._full or self._pending:
+            try:
+                if self._full:
+                    self._full = False
+                    self._pending.clear()
+                    await self.rebuild()
+                else:
+                    oids, self._pending = self._pending, set()
+                    await self.refresh_users(oids)
+            except Exception as e:
+                # 다음 변경 알림이나 주기적 재구성에서 다시 시도
+                logger.warning(f"차량번호 색인 갱신 실패: {e!r}")
+                self._full = True
+                return
+
+    async def _refresh_loop(self):
+        """change stream을 쓸 수 없으면(다른 경로의 변경을 알 수 없음) 주기적으로 전체 재구성"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            if not user_cache.watching or not self.loaded:
+                self.mark_changed(None)
+
+    def start(self):
+        self.mark_changed(None)
+        if self.refresh_interval and (self._refresher is None or self._refresher.done()):
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        for task in (self._refresher, self._updater):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._refresher = self._updater = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "users": len(self._users),
+            "plates": len(self._exact),
+            "neighbors": len(self._neighbors),
+            "fuzzy": bool(self.max_distance),
+            "max_distance": self.max_distance,
+            "rebuilds": self.rebuilds,
+            "updates": self.updates,
+            "pending": len(self._pending) + (1 if self._full else 0),
+        }
+
+
+class PlateCooldown:
+    """같은 차량의 연속 인식(프레임마다 들어오는 이벤트)을 cooldown초 동안 한 번만 처리"""
+
+    def __init__(self, cooldown: float = 10.0, max_size: int = 4096):
+        self.cooldown = cooldown
+        self.max_size = max_size
+        self._until: Dict[Any, float] = {}
+
+    def acquire(self, key: Any, now: Optional[float] = None) -> bool:
+        """처리할 차례이면 True (cooldown 시작), cooldown 중이면 False"""
+        now = time.monotonic() if now is None else now
+        if self._until.get(key, 0.0) > now:
+            return False
+        if len(self._until) >= self.max_size:
+            self._until = {k: until for k, until in self._until.items() if until > now}
+        self._until[key] = now + self.cooldown
+        return True
+
+    def release(self, key: Any):
+        """처리에 실패한 경우 다음 인식에서 다시 시도하도록 cooldown 해제"""
+        self._until.pop(key, None)
+
+
+plate_index = PlateIndex.from_config()
+plate_cooldown = PlateCooldown(config_data.get('LPR', {}).get('cooldown', 10.0))
+
+# LPR 이벤트 처리 결과별 건수
+lpr_counters = dict.fromkeys(("events", "opened", "fuzzy", "duplicate", "denied", "unknown", "ambiguous", "failed"), 0)
+
+on_user_change(plate_index.mark_changed)
+
+
+def start_plate_index():
+    plate_index.start()
+
+
+async def stop_plate_index():
+    await plate_index.stop()
+
+
+def plate_stats() -> Dict[str, Any]:
+    return {"index": plate_index.stats(), "events": dict(lpr_counters), "cooldown": plate_cooldown.cooldown}
@@ -0,0 +1,206 @@
+"""
+로그 보관 기간 관리 모듈
+LOG_RETENTION.mode에 따라 오래된 로그를 정리 (로그 저장은 insert만 수행)
+- ttl: expire_at 필드 + TTL 인덱스 (MongoDB가 자동 삭제)
+- capped: capped collection (크기/개수 초과 시 가장 오래된 로그부터 자동 삭제)
+- sweep: 백그라운드에서 오래된 로그를 배치로 삭제
+스냅샷 blob은 모든 모드에서 보관 기간이 지나면 주기적으로 정리
+(capped 모드는 크기로 로그를 지우므로 남아 있는 가장 오래된 로그보다 이전에 쓰인 blob만 정리)
+사용자 목록 동기화의 오래된 tombstone(USER_SYNC.tombstone_days)도 같은 주기로 정리
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any
+
+from config import config_data
+from database import get_database, register_query_pattern
+from services.blob_store import blob_store
+from services.dedup_service import forget_blobs
+from services.user_sync_service import prune_tombstones
+from utils.logger import get_logger
+
+logger = get_logger()
+
+TTL = "ttl"
+CAPPED = "capped"
+SWEEP = "sweep"
+
+register_query_pattern("log.expired", "log", {"timestamp": {"$lt": 0.0}}, sort=[("timestamp", 1)])
+
+_task: Optional[asyncio.Task] = None
+_stats: Dict[str, Any] = {"last_sweep": None, "logs_deleted": 0, "blobs_deleted": 0, "backfilled": 0}
+
+
+def retention_config() -> Dict[str, Any]:
+    retention = config_data.get('LOG_RETENTION', {})
+    return {
+        "mode": retention.get('mode', TTL),
+        "days": retention.get('days', 30),
+        "capped_size_mb": retention.get('capped_size_mb', 2048),
+        "capped_max_docs": retention.get('capped_max_docs'),
+        "sweep_interval": retention.get('sweep_interval', 3600.0),
+        "sweep_batch": retention.get('sweep_batch', 1000),
+        "prune_blobs": retention.get('prune_blobs', True),
+    }
+
+
+def _log_collection():
+    db = get_database()
+    if db is None:
+        raise Exception("데이터베이스 연결이 없습니다")
+    return db[config_data.get('MONGODB', {}).get('tables', {}).get('log', 'gate_log')]
+
+
+def _retention_seconds() -> float:
+    return retention_config()["days"] * 86400
+
+
+def stamp_expiry(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """ttl 모드에서 로그 문서에 만료 시각(expire_at) 추가"""
+    if retention_config()["mode"] == TTL:
+        doc["expire_at"] = datetime.fromtimestamp(doc["timestamp"] + _retention_seconds(), tz=timezone.utc)
+    return doc
+
+
+async def _backfill_expiry() -> int:
+    """expire_at이 없는 기존 로그에 만료 시각 추가 (timestamp 기준)"""
+    collection = _log_collection()
+    result = await collection.update_many(
+        {"expire_at": {"$exists": False}, "timestamp": {"$type": "number"}},
+        [{"$set": {"expire_at": {"$toDate": {"$multiply": [
+            {"$add": ["$timestamp", _retention_seconds()]}, 1000
+        ]}}}}],
+    )
+    _stats["backfilled"] += result.modified_count
+    if result.modified_count:
+        logger.info(f"기존 로그 {result.modified_count}개에 expire_at 추가")
+    return result.modified_count
+
+
+async def ensure_retention():
+    """시작 시 보관 방식에 맞게 인덱스/컬렉션 확인"""
+    settings = retention_config()
+    collection = _log_collection()
+
+    if settings["mode"] == TTL:
+        await collection.create_index("expire_at", expireAfterSeconds=0, name="expire_at_ttl")
+    elif settings["mode"] == CAPPED:
+        options = await collection.options()
+        if not options.get("capped"):
+            logger.warning(
+                f"로그 컬렉션이 capped가 아닙니다: {collection.name} "
+                "(python manage.py convert-log-capped 로 변환, 그 전까지는 sweep 방식으로 정리)"
+            )
+    elif settings["mode"] != SWEEP:
+        logger.warning(f"알 수 없는 LOG_RETENTION.mode: {settings['mode']} (sweep 사용)")
+
+
+async def convert_to_capped() -> Dict[str, Any]:
+    """로그 컬렉션을 capped collection으로 변환 (컬렉션이 잠기므로 점검 시간에 실행)"""
+    settings = retention_config()
+    collection = _log_collection()
+    command = {"convertToCapped": collection.name, "size": int(settings["capped_size_mb"] * 1024 * 1024)}
+    if settings["capped_max_docs"]:
+        command["max"] = settings["capped_max_docs"]
+    await collection.database.command(command)
+    logger.info(f"로그 컬렉션을 capped로 변환: {command}")
+    return command
+
+
+async def _sweep_logs(cutoff: float, batch: int) -> int:
+    """cutoff 이전 로그를 batch개씩 삭제 (한 번에 긴 삭제로 잠금이 길어지지 않도록)"""
+    collection = _log_collection()
+    deleted = 0
+    while True:
+        docs = await collection.find(
+            {"timestamp": {"$lt": cutoff}}, {"_id": 1}
+        ).sort("timestamp", 1).limit(batch).to_list(batch)
+        ids = [doc["_id"] for doc in docs]
+        if not ids:
+            break
+        result = await collection.delete_many({"_id": {"$in": ids}})
+        deleted += result.deleted_count
+        if len(ids) < batch:
+            break
+        await asyncio.sleep(0)
+    return deleted
+
+
+async def _oldest_log_timestamp() -> Optional[float]:
+    collection = _log_collection()
+    doc = await collection.find_one({"timestamp": {"$type": "number"}}, {"timestamp": 1}, sort=[("timestamp", 1)])
+    return doc["timestamp"] if doc else None
+
+
+async def sweep_once() -> Dict[str, int]:
+    """보관 기간이 지난 로그/스냅샷 정리 1회"""
+    settings = retention_config()
+    cutoff = time.time() - _retention_seconds()
+    result = {"logs_deleted": 0, "blobs_deleted": 0, "backfilled": 0, "tombstones_deleted": 0}
+
+    if settings["mode"] == TTL:
+        # TTL 인덱스가 삭제하도록 기존 로그에 expire_at만 채움
+        result["backfilled"] = await _backfill_expiry()
+    elif settings["mode"] == CAPPED:
+        collection = _log_collection()
+        if not (await collection.options()).get("capped"):
+            result["logs_deleted"] = await _sweep_logs(cutoff, settings["sweep_batch"])
+    else:
+        result["logs_deleted"] = await _sweep_logs(cutoff, settings["sweep_batch"])
+
+    if settings["prune_blobs"]:
+        blob_cutoff = cutoff
+        if settings["mode"] == CAPPED:
+            # 크기로 정리되어 보관 기간보다 오래된 로그가 남아 있을 수 있음
+            oldest = await _oldest_log_timestamp()
+            if oldest is not None:
+                blob_cutoff = min(cutoff, oldest)
+        # 같은 이미지를 다시 저장하면 수정 시각이 갱신되므로 blob_cutoff 이후 로그가 참조하는 blob은 남음
+        result["blobs_deleted"] = await blob_store.prune(blob_cutoff)
+        await forget_blobs(blob_cutoff)
+
+    try:
+        result["tombstones_deleted"] = await prune_tombstones()
+    except Exception as e:
+        # 로그 정리와 별개이므로 다음 주기에 다시 시도
+        logger.warning(f"사용자 tombstone 정리 실패: {e!r}")
+
+    _stats["last_sweep"] = time.time()
+    _stats["logs_deleted"] += result["logs_deleted"]
+    _stats["blobs_deleted"] += result["blobs_deleted"]
+    if result["logs_deleted"] or result["blobs_deleted"]:
+        logger.info(f"보관 기간 정리: {result}")
+    return result
+
+
+async def _retention_loop(interval: float):
+    while True:
+        try:
+            await sweep_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"보관 기간 정리 실패: {e}", exc_info=True)
+        await asyncio.sleep(interval)
+
+
+def start_retention():
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_retention_loop(retention_config()["sweep_interval"]))
+
+
+async def stop_retention():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def retention_stats() -> Dict[str, Any]:
+    return {**retention_config(), **_stats}
@@ -0,0 +1,213 @@
+"""
+출입 가능 시간 모듈
+사용자의 유효 기간/출입 시간대를 한 번 계산해 두고(compile) 요청마다 비교만 함
+- 유효 기간: date_from 0시 ~ date_to 24시를 epoch 초 범위로 변환
+- 출입 시간대: 요일 x 시간(168칸) 비트맵. 자정을 넘는 시간대(22시~6시 등)도 표현 가능
+- 휴일: SCHEDULE.holidays의 날짜에는 holiday_access가 deny인 사용자 출입 불가
+시간대는 SCHEDULE.timezone (사용자별 timezone으로 변경 가능)
+"""
+import time
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Optional, Dict, Any, Iterable, Tuple, FrozenSet
+from zoneinfo import ZoneInfo
+
+from config import config_data
+from utils.logger import get_logger
+
+logger = get_logger()
+
+HOURS_PER_WEEK = 168
+ALL_HOURS = (1 << HOURS_PER_WEEK) - 1
+NO_DATE = "0000-00-00"
+# 1970-01-01은 목요일이므로 월요일 0시 기준 시간 번호로 바꿀 때 더하는 값
+_EPOCH_HOUR_OF_WEEK = 3 * 24
+
+# 사용자 문서에서 출입 가능 시간에 영향을 주는 필드
+SCHEDULE_FIELDS = ("date_from", "date_to", "hour_from", "hour_to", "schedule", "timezone", "holiday_access")
+
+
+def _schedule_config() -> Dict[str, Any]:
+    schedule = config_data.get('SCHEDULE', {})
+    return {
+        "timezone": schedule.get('timezone', 'Asia/Seoul'),
+        "holidays": schedule.get('holidays', []),
+        "holiday_access": schedule.get('holiday_access', 'deny'),
+    }
+
+
+def get_timezone(name: Optional[str]) -> tzinfo:
+    """시간대 이름(Asia/Seoul 등) 또는 UTC 오프셋(+09:00)을 tzinfo로 변환 (ValueError)"""
+    name = name or _schedule_config()["timezone"]
+    if name[:1] in "+-":
+        sign = -1 if name[0] == "-" else 1
+        hours, _, minutes = name[1:].partition(":")
+        return timezone(sign * timedelta(hours=int(hours), minutes=int(minutes or 0)))
+    try:
+        return ZoneInfo(name)
+    except Exception as e:
+        raise ValueError(f"Invalid timezone: {name}") from e
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    if not value or value == NO_DATE:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid date: {value}") from e
+
+
+def _local_midnight(day: date, tz: tzinfo) -> float:
+    return datetime(day.year, day.month, day.day, tzinfo=tz).timestamp()
+
+
+def _window_bits(days: Iterable[int], hour_from: int, hour_to: int) -> int:
+    """요일(0=월요일)별 hour_from시 ~ hour_to시 비트 (hour_from > hour_to이면 다음 날 hour_to시까지)"""
+    if not (0 <= hour_from <= 24 and 0 <= hour_to <= 24):
+        raise ValueError(f"Invalid hours: {hour_from}-{hour_to}")
+    length = hour_to - hour_from if hour_from <= hour_to else 24 - hour_from + hour_to
+    bits = 0
+    for day in days:
+        if not 0 <= day <= 6:
+            raise ValueError(f"Invalid day: {day}")
+        start = day * 24 + hour_from
+        for hour in range(start, start + length):
+            bits |= 1 << (hour % HOURS_PER_WEEK)
+    return bits
+
+
+def build_bitmap(user: Dict[str, Any]) -> int:
+    """사용자의 출입 시간대를 요일 x 시간 비트맵으로 변환
+
+    schedule 필드([{"days": [0, 1, ...], "hour_from": 22, "hour_to": 6}, ...])가 있으면 사용하고,
+    없으면 기존 hour_from/hour_to를 매일 적용 (둘 다 0이면 하루 종일)
+    """
+    windows = user.get("schedule")
+    if windows:
+        bitmap = 0
+        for window in windows:
+            bitmap |= _window_bits(window.get("days", range(7)), int(window["hour_from"]), int(window["hour_to"]))
+        return bitmap
+
+    hour_from, hour_to = int(user.get("hour_from") or 0), int(user.get("hour_to") or 0)
+    if hour_from + hour_to == 0:
+        return ALL_HOURS
+    if hour_from == hour_to:
+        # 기존 동작과 같이 출입 가능한 시간 없음
+        return 0
+    return _window_bits(range(7), hour_from, hour_to)
+
+
+class CompiledSchedule:
+    """미리 계산한 출입 가능 시간 (allows()는 비교와 비트 연산만 수행)"""
+
+    __slots__ = ("start", "end", "bitmap", "tz", "holidays", "_offset", "_offset_until")
+
+    def __init__(self, start: float, end: float, bitmap: int, tz: tzinfo, holidays: FrozenSet[int] = frozenset()):
+        self.start = start
+        self.end = end
+        self.bitmap = bitmap
+        self.tz = tz
+        # 출입할 수 없는 휴일 (로컬 날짜의 epoch 일 번호)
+        self.holidays = holidays
+        self._offset = 0.0
+        self._offset_until = float("-inf")
+
+    def _refresh_offset(self, now: float):
+        """UTC 오프셋은 일광 절약 시간 전환이 정시에 일어나므로 다음 정시까지 재사용"""
+        self._offset = datetime.fromtimestamp(now, self.tz).utcoffset().total_seconds()
+        self._offset_until = (now // 3600 + 1) * 3600
+
+    def allows(self, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = time.time()
+        if now < self.start or now >= self.end:
+            return False
+        if now >= self._offset_until:
+            self._refresh_offset(now)
+        local = now + self._offset
+        if self.holidays and int(local // 86400) in self.holidays:
+            return False
+        return bool(self.bitmap >> ((int(local // 3600) + _EPOCH_HOUR_OF_WEEK) % HOURS_PER_WEEK) & 1)
+
+
+# 출입 불가 (설정 오류 등)
+DENY_ALL = CompiledSchedule(0.0, 0.0, 0, timezone.utc)
+
+
+def _holiday_days(holidays: Iterable[str]) -> FrozenSet[int]:
+    days = set()
+    for value in holidays:
+        day = _parse_date(value)
+        if day is not None:
+            days.add(day.toordinal() - date(1970, 1, 1).toordinal())
+    return frozenset(days)
+
+
+def compile_schedule(user: Dict[str, Any]) -> CompiledSchedule:
+    """사용자 문서의 유효 기간/출입 시간대를 계산 (형식 오류는 ValueError)"""
+    settings = _schedule_config()
+    tz = get_timezone(user.get("timezone"))
+    date_from, date_to = _parse_date(user.get("date_from")), _parse_date(user.get("date_to"))
+    start = _local_midnight(date_from, tz) if date_from else float("-inf")
+    end = _local_midnight(date_to + timedelta(days=1), tz) if date_to else float("inf")
+
+    holidays: FrozenSet[int] = frozenset()
+    if (user.get("holiday_access") or settings["holiday_access"]) == "deny":
+        holidays = _holiday_days(settings["holidays"])
+    return CompiledSchedule(start, end, build_bitmap(user), tz, holidays)
+
+
+def _signature(user: Dict[str, Any]) -> Tuple:
+    return tuple(repr(user.get(field)) for field in SCHEDULE_FIELDS)
+
+
+# 같은 설정의 사용자는 같은 결과를 재사용 (사용자 캐시에 없는 경로용)
+_compiled: Dict[Tuple, CompiledSchedule] = {}
+_COMPILED_MAX = 1024
+
+
+def schedule_for(user: Dict[str, Any]) -> CompiledSchedule:
+    """사용자의 계산된 출입 가능 시간 (사용자 캐시에 함께 저장된 것이 있으면 사용)"""
+    compiled = user.get("_schedule")
+    if isinstance(compiled, CompiledSchedule):
+        return compiled
+
+    signature = _signature(user)
+    compiled = _compiled.get(signature)
+    if compiled is None:
+        try:
+            compiled = compile_schedule(user)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.error(f"출입 가능 시간 설정 오류 (user_id: {user.get('user_id')}): {e}")
+            compiled = DENY_ALL
+        if len(_compiled) >= _COMPILED_MAX:
+            _compiled.clear()
+        _compiled[signature] = compiled
+    return compiled
+
+
+def attach_schedule(user: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """사용자 문서에 계산된 출입 가능 시간(_schedule)을 붙임 (사용자 캐시 저장 시)"""
+    if user is not None:
+        user["_schedule"] = schedule_for(user)
+    return user
+
+
+def user_can_access(user: Dict[str, Any], now: Optional[float] = None) -> bool:
+    """지금 출입 가능한 시간인지 확인"""
+    return schedule_for(user).allows(now)
+
+
+def validate_schedule(user: Dict[str, Any]) -> Optional[str]:
+    """사용자 생성/수정 시 출입 가능 시간 설정 확인 (오류 메시지, 정상이면 None)"""
+    try:
+        compile_schedule(user)
+    except (ValueError, TypeError, KeyError) as e:
+        return str(e)
+    return None
+
+
+def clear_compiled_schedules():
+    """휴일/시간대 설정 변경 시 계산 결과 초기화"""
+    _compiled.clear()
@@ -0,0 +1,151 @@
+"""
+스냅샷 캐시 모듈
+카메라별 최근 프레임을 TTL 동안 재사용하고, 동시 요청은 하나의 업스트림 요청으로 합침
+"""
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from functools import cached_property
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+from utils.logger import get_logger
+
+logger = get_logger()
+
+
+@dataclass
+class Frame:
+    """카메라에서 가져온 JPEG 프레임"""
+    cam_name: str
+    data: bytes
+    captured_at: float = field(default_factory=time.time)
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now or time.time()) - self.captured_at
+
+    @cached_property
+    def sha256(self) -> str:
+        return hashlib.sha256(self.data).hexdigest()
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256}"'
+
+    @property
+    def last_modified(self) -> str:
+        return formatdate(self.captured_at, usegmt=True)
+
+
+@dataclass
+class _Entry:
+    frame: Optional[Frame] = None
+    inflight: Optional[asyncio.Future] = None
+    last_access: float = field(default_factory=time.monotonic)
+
+
+class SnapshotCache:
+    """카메라 이름을 키로 하는 single-flight 스냅샷 캐시"""
+
+    def __init__(
+        self,
+        fetcher: Callable[[str], Awaitable[Optional[bytes]]],
+        ttl: float = 1.0,
+        camera_ttl: Optional[Dict[str, float]] = None,
+        idle_timeout: float = 60.0,
+    ):
+        self._fetcher = fetcher
+        self.ttl = ttl
+        self.camera_ttl = camera_ttl or {}
+        self.idle_timeout = idle_timeout
+        self._entries: Dict[str, _Entry] = {}
+        self._last_sweep = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.evictions = 0
+
+    def ttl_for(self, cam_name: str) -> float:
+        return self.camera_ttl.get(cam_name, self.ttl)
+
+    def peek(self, cam_name: str) -> Optional[Frame]:
+        """업스트림 요청 없이 캐시된 프레임 반환"""
+        entry = self._entries.get(cam_name)
+        return entry.frame if entry else None
+
+    def put(self, frame: Frame):
+        """외부에서 가져온 프레임을 캐시에 반영 (더 최신일 때만)"""
+        entry = self._entries.setdefault(frame.cam_name, _Entry())
+        if entry.frame is None or entry.frame.captured_at <= frame.captured_at:
+            entry.frame = frame
+
+    async def get(self, cam_name: str, max_age: Optional[float] = None) -> Optional[Frame]:
+        """신선한 프레임이 있으면 반환, 없으면 업스트림에서 가져옴"""
+        now = time.monotonic()
+        self._sweep(now)
+
+        entry = self._entries.setdefault(cam_name, _Entry())
+        entry.last_access = now
+
+        max_age = self.ttl_for(cam_name) if max_age is None else max_age
+        if entry.frame is not None and entry.frame.age() <= max_age:
+            self.hits += 1
+            return entry.frame
+
+        if entry.inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(entry.inflight)
+
+        # 요청한 클라이언트가 끊겨도 합쳐진 다른 요청이 결과를 받도록 별도 태스크로 실행
+        self.misses += 1
+        entry.inflight = asyncio.ensure_future(self._refresh(cam_name, entry))
+        return await asyncio.shield(entry.inflight)
+
+    async def _refresh(self, cam_name: str, entry: _Entry) -> Optional[Frame]:
+        try:
+            data = await self._fetcher(cam_name)
+        except Exception as e:
+            logger.error(f"[{cam_name}] 스냅샷 캐시 갱신 실패: {e!r}")
+            data = None
+        finally:
+            entry.inflight = None
+
+        if not data:
+            self.errors += 1
+            return None
+
+        frame = Frame(cam_name, data)
+        self.put(frame)
+        return frame
+
+    def _sweep(self, now: float):
+        """오래 조회되지 않은 카메라 항목 제거"""
+        if now - self._last_sweep < self.idle_timeout:
+            return
+        self._last_sweep = now
+        for cam_name in list(self._entries):
+            entry = self._entries[cam_name]
+            if entry.inflight is None and now - entry.last_access > self.idle_timeout:
+                del self._entries[cam_name]
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "evictions": self.evictions,
+            "upstream_saved_ratio": round((self.hits + self.coalesced) / requests, 3) if requests else 0.0,
+            "cameras": {
+                name: {
+                    "ttl": self.ttl_for(name),
+                    "age": round(entry.frame.age(), 3) if entry.frame else None,
+                    "inflight": entry.inflight is not None,
+                }
+                for name, entry in self._entries.items()
+            },
+        }
@@ -0,0 +1,251 @@
+"""
+출입 통계 집계 모듈
+로그를 저장할 때 시간/일 단위 카운터(rollup)를 함께 증가시켜, 통계 조회 시 gate_log를 훑지 않음
+- 문서 하나 = (bucket: hour/day, start: 구간 시작 시각, user_id: None이면 전체)
+- 카운터: open / exit / snapshot / other / total
+구간은 서버 로컬 시각 기준 (regdate 표시와 동일)
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+from pymongo import UpdateOne, ReplaceOne
+
+from config import config_data
+from database import get_database, register_query_pattern
+from utils.logger import get_logger
+
+logger = get_logger()
+
+HOUR = "hour"
+DAY = "day"
+BUCKETS = (HOUR, DAY)
+MODES = ("open", "exit", "snapshot")
+COUNTERS = MODES + ("other", "total")
+
+# 조회 가능한 최대 구간 수 (응답 크기 상한)
+MAX_POINTS = {HOUR: 24 * 62, DAY: 366 * 2}
+
+register_query_pattern(
+    "stats.series", "stats",
+    {"bucket": HOUR, "user_id": None, "start": {"$gte": datetime(1970, 1, 1, tzinfo=timezone.utc)}},
+    sort=[("start", 1)],
+)
+
+# (bucket, start, user_id) -> 카운터 증가량
+Increments = Dict[Tuple[str, datetime, Optional[str]], Dict[str, int]]
+
+
+def _stats_collection():
+    db = get_database()
+    if db is None:
+        raise Exception("데이터베이스 연결이 없습니다")
+    return db[config_data.get('MONGODB', {}).get('tables', {}).get('stats', 'gate_stats')]
+
+
+def bucket_start(value: datetime, bucket: str) -> datetime:
+    """시각이 속한 구간의 시작 (서버 로컬 시각, 시간대 포함)"""
+    local = value.astimezone()
+    if bucket == HOUR:
+        local = local.replace(minute=0, second=0, microsecond=0)
+    else:
+        local = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    # 일광 절약 시간 등으로 오프셋이 바뀐 경우를 위해 다시 계산
+    return local.replace(tzinfo=None).astimezone()
+
+
+def next_bucket(start: datetime, bucket: str) -> datetime:
+    """다음 구간의 시작"""
+    step = timedelta(hours=1) if bucket == HOUR else timedelta(days=1)
+    return (start.astimezone().replace(tzinfo=None) + step).astimezone()
+
+
+def _mode(eventinfo: Optional[dict]) -> str:
+    mode = (eventinfo or {}).get("mode")
+    return mode if mode in MODES else "other"
+
+
+def _event_time(doc: Dict[str, Any]) -> Optional[datetime]:
+    timestamp = doc.get("timestamp")
+    if isinstance(timestamp, (int, float)):
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return None
+
+
+def count_events(docs: Iterable[Dict[str, Any]], increments: Optional[Increments] = None) -> Increments:
+    """로그 문서들을 구간별 카운터 증가량으로 합침"""
+    if increments is None:
+        increments = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for doc in docs:
+        event_time = _event_time(doc)
+        if event_time is None:
+            continue
+        mode = _mode(doc.get("eventinfo"))
+        for bucket in BUCKETS:
+            start = bucket_start(event_time, bucket)
+            for user_id in {None, doc.get("user_id")}:
+                counters = increments[(bucket, start, user_id)]
+                counters[mode] += 1
+                counters["total"] += 1
+    return increments
+
+
+async def record_events(docs: List[Dict[str, Any]]) -> int:
+    """저장된 로그만큼 카운터 증가 (같은 구간은 한 번의 $inc로 합침)"""
+    if not docs:
+        return 0
+    increments = count_events(docs)
+    operations = [
+        UpdateOne(
+            {"bucket": bucket, "start": start, "user_id": user_id},
+            {"$inc": {name: value for name, value in counters.items() if value}},
+            upsert=True,
+        )
+        for (bucket, start, user_id), counters in increments.items()
+    ]
+    await _stats_collection().bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+async def rebuild_stats(
+    batch_size: int = 1000,
+    since: Optional[datetime] = None,
+    include_today: bool = False,
+) -> Dict[str, Any]:
+    """gate_log에서 통계를 다시 계산 (timestamp 순으로 batch_size개씩 읽음)
+
+    기본적으로 오늘 0시 이전만 다시 계산하므로, 실행 중에 들어오는 로그의 카운터와 겹치지 않음
+    include_today면 현재 시각까지 계산 (실행 중 저장된 오늘 로그는 누락될 수 있음)
+    원본 로그가 보관 기간으로 삭제된 구간의 통계는 그대로 둠
+    """
+    db = get_database()
+    if db is None:
+        raise Exception("데이터베이스 연결이 없습니다")
+
+    log_collection = db[config_data.get('MONGODB', {}).get('tables', {}).get('log', 'gate_log')]
+    stats_collection = _stats_collection()
+    now = datetime.now(timezone.utc)
+    cutoff = now if include_today else bucket_start(now, DAY)
+    run_id = uuid.uuid4().hex
+    result = {"scanned": 0, "written": 0, "deleted": 0, "since": None, "cutoff": cutoff}
+
+    query: Dict[str, Any] = {"timestamp": {"$lt": cutoff.timestamp()}}
+    if since is not None:
+        query["timestamp"]["$gte"] = bucket_start(since, DAY).timestamp()
+
+    increments: Increments = count_events([])
+    first_day: Optional[datetime] = None
+    last: Optional[Tuple[float, Any]] = None
+
+    async def flush(before_day: Optional[datetime]):
+        """before_day 이전 구간(더 이상 바뀌지 않음)의 카운터 저장"""
+        done = [key for key in increments if before_day is None or bucket_start(key[1], DAY) < before_day]
+        operations = []
+        for key in done:
+            bucket, start, user_id = key
+            operations.append(ReplaceOne(
+                {"bucket": bucket, "start": start, "user_id": user_id},
+                {"bucket": bucket, "start": start, "user_id": user_id, "rebuild": run_id, **increments.pop(key)},
+                upsert=True,
+            ))
+        if operations:
+            await stats_collection.bulk_write(operations, ordered=False)
+            result["written"] += len(operations)
+
+    while True:
+        batch_query = query
+        if last is not None:
+            # (timestamp, _id) 인덱스로 이어서 읽음
+            batch_query = {"$and": [query, {"$or": [
+                {"timestamp": {"$gt": last[0]}},
+                {"timestamp": last[0], "_id": {"$gt": last[1]}},
+            ]}]}
+        docs = await log_collection.find(
+            batch_query, {"timestamp": 1, "user_id": 1, "eventinfo.mode": 1}
+        ).sort([("timestamp", 1), ("_id", 1)]).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+        last = (docs[-1]["timestamp"], docs[-1]["_id"])
+        result["scanned"] += len(docs)
+
+        if first_day is None and _event_time(docs[0]) is not None:
+            first_day = bucket_start(_event_time(docs[0]), DAY)
+        count_events(docs, increments)
+        # 읽는 순서가 시간순이므로 마지막 문서의 날짜 이전 구간은 완성됨
+        last_time = _event_time(docs[-1])
+        if last_time is not None:
+            await flush(bucket_start(last_time, DAY))
+        logger.info(f"통계 재계산 진행: scanned={result['scanned']} written={result['written']}")
+
+    await flush(None)
+
+    # 다시 계산한 범위에서 이번 실행으로 쓰지 않은 구간(로그가 없어진 구간) 삭제
+    range_start = bucket_start(since, DAY) if since is not None else first_day
+    if range_start is not None:
+        deleted = await stats_collection.delete_many({
+            "start": {"$gte": range_start, "$lt": cutoff},
+            "rebuild": {"$ne": run_id},
+        })
+        result["deleted"] = deleted.deleted_count
+    result["since"] = range_start
+    return result
+
+
+def _empty(start: datetime) -> Dict[str, Any]:
+    return {"start": start, **dict.fromkeys(COUNTERS, 0)}
+
+
+def _exit_ratio(counters: Dict[str, Any]) -> Optional[float]:
+    return round(counters["exit"] / counters["open"], 3) if counters["open"] else None
+
+
+async def get_stats(
+    bucket: str,
+    since: datetime,
+    until: datetime,
+    user_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """구간별 통계 (비어 있는 구간은 0으로 채움, since 이상 until 미만)"""
+    start = bucket_start(since, bucket)
+    cursor = _stats_collection().find(
+        {"bucket": bucket, "user_id": user_id, "start": {"$gte": start, "$lt": until}},
+        {"_id": 0, "start": 1, **dict.fromkeys(COUNTERS, 1)},
+    ).sort("start", 1)
+    found = {}
+    async for doc in cursor:
+        found[doc["start"].replace(tzinfo=timezone.utc)] = doc
+
+    series = []
+    totals = dict.fromkeys(COUNTERS, 0)
+    current = start
+    while current < until:
+        doc = found.get(current.astimezone(timezone.utc)) or {}
+        point = _empty(current)
+        for name in COUNTERS:
+            point[name] = doc.get(name, 0)
+            totals[name] += point[name]
+        series.append(point)
+        current = next_bucket(current, bucket)
+
+    totals["exit_ratio"] = _exit_ratio(totals)
+    return {"series": series, "totals": totals}
+
+
+async def get_user_stats(since: datetime, until: datetime) -> List[Dict[str, Any]]:
+    """기간 내 사용자별 합계 (일 단위 rollup 기준, open 많은 순)"""
+    cursor = _stats_collection().aggregate([
+        {"$match": {"bucket": DAY, "user_id": {"$ne": None}, "start": {"$gte": bucket_start(since, DAY), "$lt": until}}},
+        {"$group": {"_id": "$user_id", **{name: {"$sum": f"${name}"} for name in COUNTERS}}},
+        {"$sort": {"open": -1, "_id": 1}},
+    ])
+    users = []
+    async for doc in cursor:
+        counters = {name: doc.get(name, 0) for name in COUNTERS}
+        users.append({"user_id": doc["_id"], **counters, "exit_ratio": _exit_ratio(counters)})
+    return users
+
+
+def points_between(since: datetime, until: datetime, bucket: str) -> float:
+    step = 3600 if bucket == HOUR else 86400
+    return (until - since).total_seconds() / step
@@ -0,0 +1,210 @@
+"""
+카메라 라이브 스트림 모듈
+카메라별 캡처 루프 하나가 프레임을 가져와 연결된 모든 시청자에게 분배
+"""
+import asyncio
+import time
+from typing import Optional, Dict, Set, AsyncIterator
+
+from config import config_data
+from services.camera_service import get_frame
+from services.snapshot_cache import Frame
+from utils.logger import get_logger
+
+logger = get_logger()
+
+BOUNDARY = "frame"
+# 캡처 오류 시 재시도 대기 시간 상한 (초)
+MAX_RETRY_DELAY = 10.0
+
+
+class _Viewer:
+    """시청자별 프레임 큐 (가득 차면 가장 오래된 프레임을 버림)"""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, frame: Optional[Frame]):
+        """프레임 전달 (None이면 스트림 종료 신호)"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(frame)
+
+
+class CameraStream:
+    """카메라 1대의 공유 캡처 루프"""
+
+    def __init__(self, cam_name: str, capture_fps: float, queue_size: int, idle_timeout: float):
+        self.cam_name = cam_name
+        self.capture_fps = capture_fps
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self._viewers: Set[_Viewer] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.frames_captured = 0
+        self.errors = 0
+
+    @property
+    def viewer_count(self) -> int:
+        return len(self._viewers)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self) -> _Viewer:
+        viewer = _Viewer(self.queue_size)
+        self._viewers.add(viewer)
+        if not self.running:
+            self._task = asyncio.create_task(self._capture_loop())
+        return viewer
+
+    def unsubscribe(self, viewer: _Viewer):
+        self._viewers.discard(viewer)
+
+    async def _capture_loop(self):
+        """시청자가 있는 동안 capture_fps 간격으로 프레임을 가져와 분배
+
+        오류가 나면 시청자가 있는 동안 대기 시간을 늘려 가며 다시 시도하고,
+        어떤 이유로든 루프가 끝나면 남은 시청자에게 종료 신호를 보내 응답을 끝냄
+        """
+        interval = 1.0 / self.capture_fps
+        last_frame_at = 0.0
+        idle_since = None
+        errors = 0
+        logger.info(f"[{self.cam_name}] 스트림 캡처 시작")
+        try:
+            while True:
+                if not self._viewers:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since >= self.idle_timeout:
+                        break
+                    await asyncio.sleep(interval)
+                    continue
+                idle_since = None
+
+                started = time.monotonic()
+                try:
+                    # 스냅샷 캐시를 공유하므로 같은 주기의 폴링 요청과 업스트림 요청이 합쳐짐
+                    frame = await get_frame(self.cam_name, max_age=interval / 2)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    errors += 1
+                    self.errors += 1
+                    delay = min(interval * (2 ** errors), MAX_RETRY_DELAY)
+                    logger.error(f"[{self.cam_name}] 스트림 캡처 오류 ({errors}회 연속, {delay:.1f}초 후 재시도): {e!r}")
+                    await asyncio.sleep(delay)
+                    continue
+                errors = 0
+                if frame is not None and frame.captured_at != last_frame_at:
+                    last_frame_at = frame.captured_at
+                    self.frames_captured += 1
+                    for viewer in list(self._viewers):
+                        viewer.offer(frame)
+
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[{self.cam_name}] 스트림 캡처 오류: {e}", exc_info=True)
+        finally:
+            # 남은 시청자가 프레임을 끝없이 기다리지 않도록 종료 신호
+            for viewer in list(self._viewers):
+                viewer.offer(None)
+            logger.info(f"[{self.cam_name}] 스트림 캡처 종료")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 카메라 이름 -> CameraStream
+_streams: Dict[str, CameraStream] = {}
+
+
+def _stream_config() -> dict:
+    return config_data.get('STREAM', {})
+
+
+def get_stream(cam_name: str) -> CameraStream:
+    """카메라의 공유 스트림 반환 (없으면 생성)"""
+    stream = _streams.get(cam_name)
+    if stream is None:
+        stream_config = _stream_config()
+        camera = config_data.get('CAMERAS', {}).get(cam_name, {})
+        stream = CameraStream(
+            cam_name,
+            capture_fps=camera.get('stream_fps', stream_config.get('capture_fps', 5.0)),
+            queue_size=stream_config.get('queue_size', 2),
+            idle_timeout=stream_config.get('idle_timeout', 10.0),
+        )
+        _streams[cam_name] = stream
+    return stream
+
+
+def viewer_fps(requested: Optional[float]) -> float:
+    """시청자가 요청한 fps를 설정 범위로 제한"""
+    stream_config = _stream_config()
+    max_fps = stream_config.get('max_viewer_fps', 10.0)
+    fps = requested or stream_config.get('default_viewer_fps', 5.0)
+    return max(0.1, min(fps, max_fps))
+
+
+async def mjpeg_frames(cam_name: str, fps: float) -> AsyncIterator[bytes]:
+    """multipart/x-mixed-replace 응답 본문 생성 (시청자별 fps 제한)"""
+    stream = get_stream(cam_name)
+    viewer = stream.subscribe()
+    min_interval = 1.0 / fps
+    last_sent = 0.0
+    try:
+        while True:
+            frame = await viewer.queue.get()
+            wait = min_interval - (time.monotonic() - last_sent)
+            if frame is not None and wait > 0:
+                await asyncio.sleep(wait)
+                # 기다리는 동안 들어온 최신 프레임으로 교체
+                while frame is not None and not viewer.queue.empty():
+                    frame = viewer.queue.get_nowait()
+            if frame is None:
+                # 캡처 루프 종료: 응답을 끝냄
+                break
+            last_sent = time.monotonic()
+            yield (
+                f"--{BOUNDARY}\r\n"
+                f"Content-Type: image/jpeg\r\n"
+                f"Content-Length: {len(frame.data)}\r\n\r\n"
+            ).encode() + frame.data + b"\r\n"
+    finally:
+        stream.unsubscribe(viewer)
+
+
+def stream_stats() -> Dict[str, dict]:
+    return {
+        name: {
+            "viewers": stream.viewer_count,
+            "capture_fps": stream.capture_fps,
+            "frames_captured": stream.frames_captured,
+            "errors": stream.errors,
+            "dropped": sum(viewer.dropped for viewer in stream._viewers),
+            "running": stream.running,
+        }
+        for name, stream in _streams.items()
+    }
+
+
+async def close_streams():
+    """모든 캡처 루프 종료"""
+    for stream in _streams.values():
+        await stream.stop()
+    _streams.clear()
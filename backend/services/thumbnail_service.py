@@ -0,0 +1,82 @@
+"""
+스냅샷 썸네일 모듈
+스냅샷 저장 시 축소 이미지를 만들어 blob 저장소에 넣음 (이미지 처리는 프로세스 풀에서 실행)
+중복 판별용 perceptual hash도 같은 프로세스 풀에서 계산
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any
+
+from config import config_data
+from services.blob_store import store_snapshot
+from utils.image import make_thumbnails, difference_hash
+from utils.logger import get_logger
+
+logger = get_logger()
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _thumbnail_config() -> Dict[str, Any]:
+    return config_data.get('THUMBNAIL', {})
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # 이벤트 루프/스레드가 있는 프로세스를 fork하지 않도록 spawn 사용
+        _executor = ProcessPoolExecutor(
+            max_workers=_thumbnail_config().get('workers', 2),
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _executor
+
+
+async def create_thumbnails(data: bytes) -> Optional[Dict[str, Dict[str, Any]]]:
+    """썸네일을 만들어 저장하고 크기별 참조 반환 (비활성화/실패 시 None)"""
+    thumbnail_config = _thumbnail_config()
+    if not thumbnail_config.get('enabled', True) or not data:
+        return None
+
+    sizes = thumbnail_config.get('sizes', {"small": 160})
+    try:
+        loop = asyncio.get_running_loop()
+        renditions = await loop.run_in_executor(
+            _get_executor(), make_thumbnails, data, sizes, thumbnail_config.get('quality', 75)
+        )
+    except Exception as e:
+        logger.error(f"썸네일 생성 실패: {e!r}")
+        return None
+
+    thumbnails = {}
+    for name, rendition in renditions.items():
+        ref = await store_snapshot(rendition)
+        if ref is not None:
+            thumbnails[name] = ref
+    return thumbnails or None
+
+
+async def perceptual_hash(data: bytes) -> Optional[str]:
+    """스냅샷의 perceptual hash(dHash, 64비트 hex) 계산 (실패 시 None)"""
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), difference_hash, data)
+    except Exception as e:
+        logger.error(f"perceptual hash 계산 실패: {e!r}")
+        return None
+
+
+def pick_thumbnail(thumbnails: Optional[Dict[str, Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """목록에 사용할 썸네일 참조 (THUMBNAIL.list_size, 없으면 가장 작은 것)"""
+    if not thumbnails:
+        return None
+    preferred = thumbnails.get(_thumbnail_config().get('list_size', 'small'))
+    return preferred or min(thumbnails.values(), key=lambda ref: ref.get('size', 0))
+
+
+def shutdown_thumbnail_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,116 @@
+"""
+X-Token 세션 관리 모듈
+api/v1 카메라의 토큰을 메모리에서 관리 (만료 전 백그라운드 갱신, 동시 만료 시 로그인 1회)
+"""
+import asyncio
+import time
+from typing import Optional, Callable, Awaitable, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# 로그인 함수: (token, expires_in) 반환, 실패 시 (None, None)
+LoginFunc = Callable[[], Awaitable[Tuple[Optional[str], Optional[float]]]]
+
+
+class XTokenSession:
+    """카메라 1대의 X-Token 세션"""
+
+    def __init__(
+        self,
+        cam_name: str,
+        login: LoginFunc,
+        token: Optional[str] = None,
+        ttl: float = 3600.0,
+        refresh_margin: float = 60.0,
+        retry_delay: float = 10.0,
+    ):
+        self.cam_name = cam_name
+        self._login = login
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self.token = token
+        # 설정 파일의 토큰은 유효 기간을 알 수 없으므로 ttl만큼 유효하다고 가정 (실패하면 즉시 갱신)
+        self.expires_at = time.monotonic() + ttl if token else 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresher: Optional[asyncio.Task] = None
+        self.logins = 0
+        self.login_failures = 0
+        self.coalesced = 0
+
+    @property
+    def expiring(self) -> bool:
+        return time.monotonic() >= self.expires_at - self.refresh_margin
+
+    async def get_token(self) -> Optional[str]:
+        """유효한 토큰 반환 (만료가 임박했으면 갱신)"""
+        self._ensure_refresher()
+        if self.token and not self.expiring:
+            return self.token
+        return await self.refresh()
+
+    async def refresh(self, stale_token: Optional[str] = None) -> Optional[str]:
+        """토큰 갱신 (진행 중인 로그인이 있으면 그 결과를 공유)"""
+        if stale_token is not None and self.token != stale_token:
+            # 다른 요청이 이미 갱신함
+            return self.token
+        if self._inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(self._inflight)
+
+        self._inflight = asyncio.ensure_future(self._do_login())
+        return await asyncio.shield(self._inflight)
+
+    async def _do_login(self) -> Optional[str]:
+        try:
+            self.logins += 1
+            token, expires_in = await self._login()
+            if not token:
+                self.login_failures += 1
+                return self.token
+            self.token = token
+            self.expires_at = time.monotonic() + (expires_in or self.ttl)
+            logger.info(f"[{self.cam_name}] X-Token 갱신")
+            return token
+        finally:
+            self._inflight = None
+
+    def _ensure_refresher(self):
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        """만료 refresh_margin초 전에 미리 토큰 갱신"""
+        while True:
+            delay = self.expires_at - self.refresh_margin - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[{self.cam_name}] X-Token 백그라운드 갱신 실패: {e!r}")
+            if self.expiring:
+                # 로그인 실패 시 재시도 간격 유지
+                await asyncio.sleep(self.retry_delay)
+
+    async def close(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+    def stats(self) -> dict:
+        return {
+            "has_token": bool(self.token),
+            "expires_in": round(self.expires_at - time.monotonic(), 1) if self.token else None,
+            "logins": self.logins,
+            "login_failures": self.login_failures,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,405 @@
+"""
+사용자 일괄 가져오기/내보내기 모듈
+- 가져오기: JSON(배열 또는 한 줄에 하나씩) / CSV 레코드를 스트림으로 읽어 batch_size개씩 user_id 기준 upsert (순서 없는 bulk_write)
+  batch마다 기존 사용자를 한 번에 조회하여 바뀌는 사용자만 저장 (revision 증가), dry_run이면 차이만 보고
+  레코드별 오류를 모아 보고
+- 내보내기: user_id 순으로 batch_size개씩 읽어 NDJSON / JSON 배열 / CSV로 직렬화
+레코드에 없는 필드는 기존 사용자에서 바꾸지 않고, 새 사용자는 기본값으로 생성 (api_key는 user_id로 생성)
+"""
+import codecs
+import csv
+import io
+import json
+import re
+from datetime import datetime
+from typing import Optional, List, Dict, Any, AsyncIterator, Iterator, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from config import config_data
+from database import get_database
+from services.schedule_service import validate_schedule
+from services.user_service import generate_api_key, invalidate_user_cache
+from services.user_sync_service import user_revisions
+from utils.logger import get_logger
+
+logger = get_logger()
+
+IMPORT_FORMATS = ("json", "csv")
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "json": "application/json", "csv": "text/csv"}
+
+# 내보내기 필드 (CSV 열 순서), 가져오기에서 바꿀 수 있는 필드는 api_key/regdate 제외
+EXPORT_FIELDS = [
+    "user_id", "name", "flag", "date_from", "date_to", "hour_from", "hour_to", "plates",
+    "schedule", "timezone", "holiday_access", "regdate", "api_key",
+]
+# 새 사용자의 기본값 (routers/users.create_user와 동일)
+DEFAULTS = {"name": None, "flag": "y", "date_from": "0000-00-00", "date_to": "0000-00-00", "hour_from": 0, "hour_to": 0, "plates": []}
+
+# CSV에서 plates 구분자
+PLATE_SEPARATOR = ";"
+# 끝나지 않은 JSON 레코드 최대 크기 (넘으면 형식 오류로 처리)
+_MAX_RECORD_CHARS = 1 << 20
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _user_collection():
+    db = get_database()
+    if db is None:
+        raise Exception("데이터베이스 연결이 없습니다")
+    return db[config_data.get('MONGODB', {}).get('tables', {}).get('user', 'user')]
+
+
+def _flag(value: Any) -> str:
+    if isinstance(value, bool):
+        return "y" if value else "n"
+    text = str(value).strip().lower()
+    if text in ("y", "true", "1", "yes"):
+        return "y"
+    if text in ("n", "false", "0", "no"):
+        return "n"
+    raise ValueError(f"Invalid flag: {value}")
+
+
+def _hour(value: Any, name: str) -> int:
+    try:
+        hour = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value}")
+    if not 0 <= hour <= 24:
+        raise ValueError(f"Invalid {name}: {value}")
+    return hour
+
+
+def _date(value: Any, name: str) -> str:
+    if not isinstance(value, str) or not _DATE.match(value.strip()):
+        raise ValueError(f"Invalid {name}: {value}")
+    return value.strip()
+
+
+def _plates(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(PLATE_SEPARATOR)
+    if not isinstance(value, list):
+        raise ValueError(f"Invalid plates: {value}")
+    return [str(plate).strip() for plate in value if str(plate).strip()]
+
+
+def _schedule(value: Any) -> Optional[list]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError(f"Invalid schedule: {value}")
+    if value is not None and not isinstance(value, list):
+        raise ValueError(f"Invalid schedule: {value}")
+    return value
+
+
+_CONVERTERS = {
+    "name": lambda value: str(value),
+    "flag": _flag,
+    "date_from": lambda value: _date(value, "date_from"),
+    "date_to": lambda value: _date(value, "date_to"),
+    "hour_from": lambda value: _hour(value, "hour_from"),
+    "hour_to": lambda value: _hour(value, "hour_to"),
+    "plates": _plates,
+    # 이전 데이터의 plate 필드
+    "plate": _plates,
+    "schedule": _schedule,
+    "timezone": lambda value: str(value),
+    "holiday_access": lambda value: str(value),
+}
+
+
+def parse_record(record: Any) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    """가져올 레코드를 (user_id, $set 필드, 새 사용자일 때만 넣을 필드)로 변환 (형식 오류는 ValueError)
+
+    빈 값(CSV의 빈 칸, null)인 필드는 바꾸지 않음
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Record must be an object")
+    user_id = str(record.get("user_id") or "").strip()
+    if not user_id:
+        raise ValueError("user_id is required")
+
+    fields: Dict[str, Any] = {}
+    for name, convert in _CONVERTERS.items():
+        value = record.get(name)
+        if value is None or value == "":
+            continue
+        fields["plates" if name == "plate" else name] = convert(value)
+
+    fields["api_key"] = generate_api_key(user_id)
+    on_insert = {name: value for name, value in DEFAULTS.items() if name not in fields}
+    on_insert["regdate"] = str(record.get("regdate") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    schedule_error = validate_schedule({**on_insert, **fields})
+    if schedule_error:
+        raise ValueError(f"Invalid schedule: {schedule_error}")
+    return user_id, fields, on_insert
+
+
+class _JsonRecords:
+    """JSON 배열 또는 줄 단위 JSON 객체를 조각(chunk)으로 받아 완성된 레코드부터 꺼냄"""
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self._array = False
+        self._done = False
+
+    def feed(self, text: str, final: bool = False) -> List[Any]:
+        self._buffer += text
+        records = []
+        pos = 0
+        while True:
+            while pos < len(self._buffer) and (self._buffer[pos].isspace() or self._buffer[pos] == ","):
+                pos += 1
+            if pos >= len(self._buffer):
+                break
+            char = self._buffer[pos]
+            if self._done:
+                raise ValueError(f"Unexpected data after JSON array: {self._buffer[pos:pos + 20]!r}")
+            if char == "[" and not self._started:
+                self._array = True
+                pos += 1
+            elif char == "]":
+                self._done = True
+                pos += 1
+            else:
+                try:
+                    record, pos = self._decoder.raw_decode(self._buffer, pos)
+                except json.JSONDecodeError as e:
+                    if final or len(self._buffer) - pos > _MAX_RECORD_CHARS:
+                        near = self._buffer[e.pos:e.pos + 20]
+                        raise ValueError(f"Invalid JSON: {e.msg} " + (f"near {near!r}" if near else "(unexpected end of data)"))
+                    # 레코드가 아직 다 오지 않음
+                    break
+                records.append(record)
+            self._started = True
+        self._buffer = self._buffer[pos:]
+        if final and self._array and not self._done:
+            raise ValueError("Invalid JSON: unterminated array (unexpected end of data)")
+        return records
+
+
+class _CsvRecords:
+    """CSV를 조각으로 받아 완성된 행부터 header 이름의 dict로 꺼냄 (따옴표 안의 줄바꿈 허용)"""
+
+    def __init__(self):
+        self._header: Optional[List[str]] = None
+        self._partial = ""
+        self._pending = ""
+
+    def feed(self, text: str, final: bool = False) -> List[Dict[str, str]]:
+        lines = (self._partial + text).split("\n")
+        self._partial = "" if final else lines.pop()
+        records = []
+        for line in lines:
+            self._pending += line + "\n"
+            # 따옴표가 홀수 개면 필드 안의 줄바꿈이므로 다음 줄과 합침
+            if self._pending.count('"') % 2:
+                continue
+            row = next(csv.reader([self._pending]), [])
+            self._pending = ""
+            if not any(cell.strip() for cell in row):
+                continue
+            if self._header is None:
+                self._header = [cell.strip() for cell in row]
+            else:
+                records.append(dict(zip(self._header, row)))
+        if final and self._pending:
+            raise ValueError("Invalid CSV: unterminated quoted field")
+        return records
+
+
+class UserImport:
+    """레코드를 batch_size개씩 모아 upsert (dry_run이면 기존 사용자와 비교만)"""
+
+    def __init__(self, batch_size: int = 500, dry_run: bool = False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        # (레코드 번호, user_id, $set, $setOnInsert)
+        self._batch: List[Tuple[int, str, Dict[str, Any], Dict[str, Any]]] = []
+        self._user_ids = set()
+        self.result: Dict[str, Any] = {
+            "dry_run": dry_run, "records": 0, "created": 0, "updated": 0, "unchanged": 0, "failed": 0, "errors": [],
+        }
+        if dry_run:
+            self.result["changes"] = []
+
+    def _error(self, index: int, user_id: Optional[str], message: str):
+        self.result["failed"] += 1
+        self.result["errors"].append({"record": index, "user_id": user_id, "error": message})
+
+    async def add(self, record: Any):
+        index = self.result["records"]
+        self.result["records"] += 1
+        try:
+            user_id, fields, on_insert = parse_record(record)
+        except ValueError as e:
+            self._error(index, record.get("user_id") if isinstance(record, dict) else None, str(e))
+            return
+        # 같은 user_id가 다시 나오면 순서대로 반영되도록 앞의 batch를 먼저 저장
+        if user_id in self._user_ids:
+            await self.flush()
+        self._batch.append((index, user_id, fields, on_insert))
+        self._user_ids.add(user_id)
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        batch, self._batch = self._batch, []
+        self._user_ids = set()
+        if not batch:
+            return
+        if self.dry_run:
+            await self._diff(batch)
+        else:
+            await self._write(batch)
+
+    async def _plan(self, batch: List[Tuple[int, str, Dict[str, Any], Dict[str, Any]]]) -> List[Tuple[int, str, Dict[str, Any], Dict[str, Any], Dict[str, Any]]]:
+        """batch의 기존 사용자를 한 번에 조회하여 생성/수정할 레코드와 바뀌는 필드 계산 (바뀌지 않는 레코드는 제외)"""
+        user_ids = [user_id for _, user_id, _, _ in batch]
+        cursor = _user_collection().find({"user_id": {"$in": user_ids}}, {"_id": 0})
+        existing = {doc["user_id"]: doc async for doc in cursor}
+        plan = []
+        for index, user_id, fields, on_insert in batch:
+            current = existing.get(user_id)
+            if current is None:
+                plan.append((index, user_id, fields, on_insert, None))
+                continue
+            if "plates" not in current and "plate" in current:
+                current["plates"] = current["plate"]
+            changed = {name: [current.get(name), value] for name, value in fields.items() if current.get(name) != value}
+            if changed:
+                plan.append((index, user_id, fields, on_insert, changed))
+            else:
+                self.result["unchanged"] += 1
+        return plan
+
+    async def _write(self, batch: List[Tuple[int, str, Dict[str, Any], Dict[str, Any]]]):
+        plan = await self._plan(batch)
+        if not plan:
+            return
+        # 바뀌는 사용자마다 revision 할당 (증분 목록 조회용)
+        async with user_revisions.allocate(len(plan)) as first:
+            operations = [
+                UpdateOne(
+                    {"user_id": user_id},
+                    {"$set": {**fields, "revision": first + i}, "$setOnInsert": on_insert},
+                    upsert=True,
+                )
+                for i, (_, user_id, fields, on_insert, _) in enumerate(plan)
+            ]
+            try:
+                result = await _user_collection().bulk_write(operations, ordered=False)
+                details = result.bulk_api_result
+            except BulkWriteError as e:
+                details = e.details
+                for error in details.get("writeErrors", []):
+                    index, user_id, _, _, _ = plan[error["index"]]
+                    self._error(index, user_id, error.get("errmsg", "write error"))
+        created = details.get("nUpserted", 0)
+        updated = details.get("nModified", 0)
+        self.result["created"] += created
+        self.result["updated"] += updated
+        if created or updated:
+            invalidate_user_cache()
+
+    async def _diff(self, batch: List[Tuple[int, str, Dict[str, Any], Dict[str, Any]]]):
+        for index, user_id, fields, on_insert, changed in await self._plan(batch):
+            if changed is None:
+                self.result["created"] += 1
+                self.result["changes"].append({"record": index, "user_id": user_id, "action": "create", "fields": {**on_insert, **fields}})
+            else:
+                self.result["updated"] += 1
+                self.result["changes"].append({"record": index, "user_id": user_id, "action": "update", "fields": changed})
+
+
+async def import_users(
+    chunks: AsyncIterator[bytes],
+    format: str = "json",
+    dry_run: bool = False,
+    batch_size: int = 500,
+) -> Dict[str, Any]:
+    """스트림의 사용자 레코드를 가져옴 (형식 오류로 중단되면 result["aborted"]에 사유, 그 전 batch는 반영됨)"""
+    if format not in IMPORT_FORMATS:
+        raise ValueError(f"Invalid format: {format}. Supported: {', '.join(IMPORT_FORMATS)}")
+    parser = _CsvRecords() if format == "csv" else _JsonRecords()
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    importer = UserImport(batch_size=batch_size, dry_run=dry_run)
+    try:
+        async for chunk in chunks:
+            for record in parser.feed(decoder.decode(chunk)):
+                await importer.add(record)
+        for record in parser.feed(decoder.decode(b"", final=True), final=True):
+            await importer.add(record)
+    except ValueError as e:
+        importer.result["aborted"] = str(e)
+    await importer.flush()
+    logger.info(
+        f"사용자 가져오기{' (dry-run)' if dry_run else ''}: records={importer.result['records']} "
+        f"created={importer.result['created']} updated={importer.result['updated']} failed={importer.result['failed']}"
+    )
+    return importer.result
+
+
+def export_record(user: Dict[str, Any]) -> Dict[str, Any]:
+    record = {name: user.get(name) for name in EXPORT_FIELDS}
+    record["plates"] = user.get("plates") or user.get("plate") or []
+    if isinstance(record["regdate"], datetime):
+        record["regdate"] = record["regdate"].strftime("%Y-%m-%d %H:%M:%S")
+    return record
+
+
+async def iter_users(batch_size: int = 500) -> AsyncIterator[List[Dict[str, Any]]]:
+    """user_id 순으로 batch_size개씩 내보내기 레코드 반환"""
+    cursor = _user_collection().find({}, {"_id": 0}).sort("user_id", 1).batch_size(batch_size)
+    try:
+        while True:
+            docs = await cursor.to_list(batch_size)
+            if not docs:
+                break
+            yield [export_record(doc) for doc in docs]
+    finally:
+        await cursor.close()
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return PLATE_SEPARATOR.join(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _csv_text(rows: Iterator[list]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def export_users(format: str = "ndjson", batch_size: int = 500) -> AsyncIterator[str]:
+    """사용자 전체를 batch 단위로 직렬화 (가져오기에서 그대로 읽을 수 있는 형식)"""
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format: {format}. Supported: {', '.join(EXPORT_FORMATS)}")
+    first = True
+    if format == "csv":
+        # Excel에서 한글이 깨지지 않도록 BOM 추가
+        yield "\ufeff" + _csv_text([EXPORT_FIELDS])
+    elif format == "json":
+        yield "["
+    async for records in iter_users(batch_size):
+        if format == "csv":
+            yield _csv_text([_csv_cell(record[name]) for name in EXPORT_FIELDS] for record in records)
+        elif format == "json":
+            yield ("\n" if first else ",\n") + ",\n".join(json.dumps(record, ensure_ascii=False) for record in records)
+            first = False
+        else:
+            yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    if format == "json":
+        yield "\n]\n"
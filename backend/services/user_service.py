@@ -1,15 +1,248 @@
+import asyncio
 import hashlib
-from typing import Optional, List
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Iterable, Callable, Tuple, Any
 from datetime import datetime
-from database import get_database
+from database import get_database, register_query_pattern
 from models import User, UserCreate, UserUpdate
 from config import config_data
 from bson import ObjectId
+from services.schedule_service import attach_schedule
+from services.user_sync_service import user_revisions
 from utils.logger import get_logger
 
 logger = get_logger()
 
 
+register_query_pattern("user.by_api_key", "user", {"api_key": ""})
+register_query_pattern("user.by_user_id", "user", {"user_id": ""})
+register_query_pattern("user.names", "user", {"user_id": {"$in": [""]}})
+
+
+# user_id -> 이름 (로그 목록 표시용, 사용자 생성/수정/삭제 시 초기화)
+# 없는 사용자는 "-"로 저장하여 매번 다시 조회하지 않음
+_user_names: Dict[str, Optional[str]] = {}
+
+# 사용자 변경 시 호출할 함수 (다른 모듈의 사용자 기반 캐시 갱신용)
+# 바뀐 사용자 문서의 _id를 받음 (None이면 전체가 바뀌었을 수 있음)
+_change_listeners: List[Callable[[Optional[ObjectId]], None]] = []
+
+
+def _user_collection():
+    db = get_database()
+    if db is None:
+        return None
+    return db[config_data.get('MONGODB', {}).get('tables', {}).get('user', 'user')]
+
+
+class UserCache:
+    """api_key/user_id로 찾는 사용자 문서 캐시 (LRU, 없는 api_key도 캐시)
+
+    MongoDB change stream으로 변경을 받으면 전체 초기화하고,
+    change stream을 쓸 수 없으면(단일 서버 등) ttl초가 지난 항목을 다시 조회
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_size: int = 1000,
+        ttl: float = 60.0,
+        negative_ttl: float = 10.0,
+        max_age: float = 3600.0,
+        retry_interval: float = 60.0,
+    ):
+        self.enabled = enabled
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        # api_key -> (사용자 문서 또는 None, 저장 시각)
+        self._by_key: "OrderedDict[str, Tuple[Optional[dict], float]]" = OrderedDict()
+        # user_id -> api_key
+        self._by_id: Dict[str, str] = {}
+        # 조회 중에 변경이 있었으면 조회 결과를 캐시에 넣지 않기 위한 세대 번호
+        self._generation = 0
+        self._task: Optional[asyncio.Task] = None
+        self.watching = False
+        self.watch_errors = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.changes = 0
+
+    @classmethod
+    def from_config(cls) -> "UserCache":
+        cache_config = config_data.get('USER_CACHE', {})
+        return cls(
+            enabled=cache_config.get('enabled', True),
+            max_size=cache_config.get('max_size', 1000),
+            ttl=cache_config.get('ttl', 60.0),
+            negative_ttl=cache_config.get('negative_ttl', 10.0),
+            max_age=cache_config.get('max_age', 3600.0),
+            retry_interval=cache_config.get('retry_interval', 60.0),
+        )
+
+    def _fresh(self, user: Optional[dict], stored_at: float) -> bool:
+        age = time.monotonic() - stored_at
+        if user is None:
+            return age < self.negative_ttl
+        # change stream이 동작 중이면 변경 시 초기화되므로 오래 보관
+        return age < (self.max_age if self.watching else self.ttl)
+
+    def get(self, api_key: str) -> Tuple[bool, Optional[dict]]:
+        """(캐시 적중 여부, 사용자 문서 또는 None)"""
+        entry = self._by_key.get(api_key)
+        if entry is None or not self._fresh(*entry):
+            return False, None
+        self._by_key.move_to_end(api_key)
+        user = entry[0]
+        if user is None:
+            self.negative_hits += 1
+            return True, None
+        self.hits += 1
+        return True, dict(user)
+
+    def get_key_for(self, user_id: str) -> Optional[str]:
+        return self._by_id.get(user_id)
+
+    def put(self, api_key: str, user: Optional[dict], generation: int):
+        if not self.enabled or generation != self._generation:
+            return
+        # 출입 가능 시간은 캐시에 넣을 때 한 번 계산해 둠
+        self._by_key[api_key] = (attach_schedule(dict(user)) if user else None, time.monotonic())
+        self._by_key.move_to_end(api_key)
+        if user and user.get("user_id"):
+            self._by_id[user["user_id"]] = api_key
+        while len(self._by_key) > self.max_size:
+            old_key, (old_user, _) = self._by_key.popitem(last=False)
+            if old_user and self._by_id.get(old_user.get("user_id")) == old_key:
+                del self._by_id[old_user["user_id"]]
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def clear(self):
+        self._generation += 1
+        self._by_key.clear()
+        self._by_id.clear()
+        self.invalidations += 1
+
+    async def _watch(self):
+        """user 컬렉션 change stream 감시 (실패하면 retry_interval 뒤 다시 시도, 그동안은 ttl로 동작)"""
+        resume_token = None
+        while True:
+            collection = _user_collection()
+            try:
+                if collection is None:
+                    raise RuntimeError("데이터베이스 연결이 없습니다")
+                async with collection.watch(resume_after=resume_token) as stream:
+                    if not self.watching:
+                        logger.info(f"사용자 캐시: change stream 감시 시작 ({collection.name})")
+                        self.watching = True
+                        # ttl로 동작하던 동안의 캐시는 변경을 받지 못했으므로 한 번 초기화
+                        invalidate_user_cache()
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self.changes += 1
+                        # drop/rename 등 문서가 없는 이벤트는 전체 변경으로 처리
+                        invalidate_user_cache((change.get("documentKey") or {}).get("_id"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.watching or not self.watch_errors:
+                    logger.warning(f"사용자 캐시: change stream 사용 불가, ttl {self.ttl}초로 동작 ({e})")
+                self.watch_errors += 1
+                resume_token = None
+                if self.watching:
+                    # 감시가 끊긴 동안 놓친 변경이 있을 수 있으므로 전환 시 한 번만 초기화 (이후에는 ttl로 만료)
+                    self.watching = False
+                    invalidate_user_cache()
+            await asyncio.sleep(self.retry_interval)
+
+    def start(self):
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.watching = False
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "mode": "change_stream" if self.watching else "ttl",
+            "watch_errors": self.watch_errors,
+            "size": len(self._by_key),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 3) if lookups else None,
+            "invalidations": self.invalidations,
+            "changes": self.changes,
+        }
+
+
+user_cache = UserCache.from_config()
+
+
+def on_user_change(listener: Callable[[Optional[ObjectId]], None]):
+    """사용자 생성/수정/삭제 시 호출할 함수 등록 (바뀐 사용자 _id, 알 수 없으면 None)"""
+    _change_listeners.append(listener)
+
+
+def invalidate_user_cache(user_oid: Optional[ObjectId] = None):
+    """사용자 캐시(api_key/user_id, 이름) 초기화 및 등록된 함수 호출
+
+    user_oid: 바뀐 사용자 문서의 _id (등록된 함수가 해당 사용자만 갱신할 수 있음)
+    """
+    _user_names.clear()
+    user_cache.clear()
+    for listener in _change_listeners:
+        try:
+            listener(user_oid)
+        except Exception as e:
+            logger.warning(f"사용자 변경 처리 실패: {e}")
+
+
+def start_user_cache():
+    user_cache.start()
+
+
+async def stop_user_cache():
+    await user_cache.stop()
+
+
+def user_cache_stats() -> Dict[str, Any]:
+    return user_cache.stats()
+
+
+async def get_user_names(user_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+    """user_id 목록의 이름을 한 번의 $in 쿼리로 조회 (캐시에 없는 것만)"""
+    user_ids = set(uid for uid in user_ids if uid is not None)
+    missing = [uid for uid in user_ids if uid not in _user_names]
+    if missing:
+        db = get_database()
+        if db is not None:
+            collection_name = config_data.get('MONGODB', {}).get('tables', {}).get('user', 'user')
+            cursor = db[collection_name].find({"user_id": {"$in": missing}}, {"user_id": 1, "name": 1})
+            found = {doc["user_id"]: doc.get("name") async for doc in cursor}
+            for uid in missing:
+                _user_names[uid] = found[uid] if uid in found else "-"
+    return {uid: _user_names.get(uid, "-") for uid in user_ids}
+
+
 def generate_api_key(user_id: str) -> str:
     """사용자 ID로부터 API 키 생성 (MD5)"""
     return hashlib.md5(user_id.encode()).hexdigest()
@@ -40,7 +273,13 @@ async def authenticate_user(user_id: str, password: str) -> Optional[str]:
 
 
 async def get_user_by_api_key(api_key: str) -> Optional[dict]:
-    """API 키로 사용자 조회 (dict 반환)"""
+    """API 키로 사용자 조회 (dict 반환, 캐시 우선)"""
+    if not api_key:
+        return None
+    hit, user_doc = user_cache.get(api_key)
+    if hit:
+        return user_doc
+
     db = get_database()
     if db is None:
         return None
@@ -48,7 +287,10 @@ async def get_user_by_api_key(api_key: str) -> Optional[dict]:
     collection_name = config_data.get('MONGODB', {}).get('tables', {}).get('user', 'user')
     collection = db[collection_name]
     
+    user_cache.misses += 1
+    generation = user_cache.generation
     user_doc = await collection.find_one({"api_key": api_key})
+    user_cache.put(api_key, user_doc, generation)
     return user_doc
 
 
@@ -61,8 +303,15 @@ async def get_user_by_id(user_id: str) -> Optional[dict]:
     collection_name = config_data.get('MONGODB', {}).get('tables', {}).get('user', 'user')
     collection = db[collection_name]
     
-    # MongoDB에는 "user_id" 필드로 저장되어 있음
-    user_doc = await collection.find_one({"user_id": user_id})
+    api_key = user_cache.get_key_for(user_id)
+    hit, user_doc = user_cache.get(api_key) if api_key else (False, None)
+    if not hit or user_doc is None or user_doc.get("user_id") != user_id:
+        # MongoDB에는 "user_id" 필드로 저장되어 있음
+        user_cache.misses += 1
+        generation = user_cache.generation
+        user_doc = await collection.find_one({"user_id": user_id})
+        if user_doc and user_doc.get("api_key"):
+            user_cache.put(user_doc["api_key"], user_doc, generation)
     if user_doc:
         # plate와 plates 필드 통합 처리
         if "plate" in user_doc and "plates" not in user_doc:
@@ -102,7 +351,10 @@ async def create_user(user_data: UserCreate) -> dict:
         "plates": []  # 기본값
     }
     
-    result = await collection.insert_one(user_doc)
+    async with user_revisions.allocate() as revision:
+        user_doc["revision"] = revision
+        result = await collection.insert_one(user_doc)
+    invalidate_user_cache(result.inserted_id)
     user_doc["_id"] = result.inserted_id
     # plate 필드도 추가 (일부 데이터와의 호환성)
     user_doc["plate"] = user_doc.get("plates", [])
@@ -140,11 +392,13 @@ async def update_user(user_id: str, user_data: UserUpdate) -> Optional[dict]:
         return None
     
     # MongoDB에는 "user_id" 필드로 저장되어 있음
-    result = await collection.find_one_and_update(
-        {"user_id": user_id},
-        {"$set": update_data},
-        return_document=True
-    )
+    async with user_revisions.allocate() as revision:
+        result = await collection.find_one_and_update(
+            {"user_id": user_id},
+            {"$set": {**update_data, "revision": revision}},
+            return_document=True
+        )
+    invalidate_user_cache(result["_id"] if result else None)
     
     if result:
         # plate와 plates 필드 통합 처리
@@ -173,43 +427,3 @@ async def get_all_users() -> List[dict]:
     async for doc in cursor:
         users.append(doc)
     return users
-
-
-def valid_datetime(date_from: str, date_to: str, hour_from: int, hour_to: int) -> bool:
-    """날짜/시간 유효성 검사"""
-    from datetime import datetime, timezone, timedelta
-    
-    # 한국 시간대 (UTC+9)
-    kst = timezone(timedelta(hours=9))
-    now = datetime.now(kst)
-    print(now)
-    
-    try:
-        if date_from != "0000-00-00":
-            dt_from = datetime.strptime(f"{date_from} 00:00:00", "%Y-%m-%d %H:%M:%S")
-            dt_from = dt_from.replace(tzinfo=kst)
-            # print ("dt_from", dt_from)
-            if now < dt_from:
-                return False
-        
-        if date_to != "0000-00-00":
-            dt_to = datetime.strptime(f"{date_to} 23:59:59", "%Y-%m-%d %H:%M:%S")
-            dt_to = dt_to.replace(tzinfo=kst)
-            # print ("dt_to", dt_to)
-            if now > dt_to:
-                return False
-        
-        # print ("hour_from", hour_from)
-        # print ("hour_to", hour_to)
-
-        if hour_from + hour_to != 0:
-            current_hour = now.hour
-            print ("current_hour", current_hour)
-            if current_hour < hour_from or current_hour >= hour_to:
-                return False
-
-        return True
-    except Exception as e:
-        logger.error(f"날짜/시간 검증 실패: {e}", exc_info=True)
-        return False
-
@@ -0,0 +1,212 @@
+"""
+사용자 목록 증분 동기화 모듈
+- 사용자 문서마다 revision 저장 (counters 컬렉션의 카운터를 $inc로 할당, 문서마다 고유하고 단조 증가)
+- 삭제한 사용자는 tombstone(MONGODB.tables.tombstones)에 삭제 시점 revision과 함께 남김
+- 목록: since 이후 revision의 사용자/삭제를 revision 순으로 limit개씩, 응답의 revision을 다음 since로 사용
+- tombstone은 USER_SYNC.tombstone_days가 지나면 삭제하고, 삭제한 가장 큰 revision(horizon)보다 이전 since는
+  삭제를 놓칠 수 있으므로 reset (since=0부터 다시)
+기준 revision(watermark)은 할당했지만 아직 저장 중인 revision 바로 앞까지로 제한하여,
+먼저 할당되고 늦게 저장된 변경을 클라이언트가 건너뛰지 않게 함 (이 프로세스에서 저장한 변경 기준)
+"""
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, AsyncIterator, Set
+
+from pymongo import ReturnDocument, UpdateOne
+
+from config import config_data
+from database import get_database, get_collection, register_query_pattern
+from utils.logger import get_logger
+
+logger = get_logger()
+
+USER_REVISION = "user_revision"
+# 삭제한 tombstone의 가장 큰 revision (counters 컬렉션)
+TOMBSTONE_HORIZON = "user_tombstone_horizon"
+
+# 목록 응답 필드 (fields로 일부만 요청 가능, _id/revision은 항상 포함)
+LIST_FIELDS = (
+    "user_id", "regdate", "api_key", "date_from", "hour_from", "date_to", "hour_to", "flag", "name", "plates",
+    "schedule", "timezone", "holiday_access",
+)
+# 필드가 없을 때 목록에 표시할 값
+_LIST_DEFAULTS = {"date_from": "0000-00-00", "hour_from": 0, "date_to": "0000-00-00", "hour_to": 0, "flag": "y"}
+
+register_query_pattern("user.sync", "user", {"revision": {"$gt": 0, "$lte": 0}}, sort=[("revision", 1)])
+register_query_pattern("tombstones.sync", "tombstones", {"revision": {"$gt": 0, "$lte": 0}}, sort=[("revision", 1)])
+
+
+class RevisionClock:
+    """counters 컬렉션의 카운터로 revision 할당 (저장 중인 revision을 추적하여 watermark 계산)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        # 카운터 증가와 저장 중 목록 등록을 watermark 계산과 겹치지 않게 함
+        self._lock = asyncio.Lock()
+        # 할당했지만 저장이 끝나지 않은 블록의 첫 revision
+        self._inflight: Set[int] = set()
+
+    @asynccontextmanager
+    async def allocate(self, count: int = 1) -> AsyncIterator[int]:
+        """revision count개를 할당하고 첫 값 반환 (블록을 빠져나갈 때까지 저장 중으로 간주)"""
+        async with self._lock:
+            doc = await get_collection("counters").find_one_and_update(
+                {"_id": self.name}, {"$inc": {"value": count}}, upsert=True, return_document=ReturnDocument.AFTER
+            )
+            first = doc["value"] - count + 1
+            self._inflight.add(first)
+        try:
+            yield first
+        finally:
+            self._inflight.discard(first)
+
+    async def watermark(self) -> int:
+        """이 값 이하의 revision은 모두 저장 완료 (이후 변경은 더 큰 revision을 받음)"""
+        async with self._lock:
+            doc = await get_collection("counters").find_one({"_id": self.name})
+            value = doc["value"] if doc else 0
+            if self._inflight:
+                value = min(value, min(self._inflight) - 1)
+        return value
+
+
+user_revisions = RevisionClock(USER_REVISION)
+
+
+async def ensure_user_revisions() -> int:
+    """revision이 없는 사용자(이전 데이터)에 revision 부여 (시작 시 1회)"""
+    if get_database() is None:
+        return 0
+    collection = get_collection("user")
+    try:
+        ids = [doc["_id"] async for doc in collection.find({"revision": {"$exists": False}}, {"_id": 1})]
+        if not ids:
+            return 0
+        async with user_revisions.allocate(len(ids)) as first:
+            await collection.bulk_write([
+                UpdateOne({"_id": oid, "revision": {"$exists": False}}, {"$set": {"revision": first + i}})
+                for i, oid in enumerate(ids)
+            ], ordered=False)
+    except Exception as e:
+        logger.warning(f"사용자 revision 부여 실패: {e!r}")
+        return 0
+    logger.info(f"사용자 revision 부여: {len(ids)}명")
+    return len(ids)
+
+
+async def add_tombstone(user: Dict[str, Any], revision: int):
+    """삭제한 사용자 기록 (증분 목록에서 삭제로 전달)"""
+    await get_collection("tombstones").replace_one(
+        {"_id": user["_id"]},
+        {"user_id": user.get("user_id"), "revision": revision, "deleted_at": datetime.now(timezone.utc)},
+        upsert=True,
+    )
+
+
+async def tombstone_horizon() -> int:
+    """이 revision 이하의 tombstone은 삭제되었음 (0이면 삭제한 적 없음)"""
+    doc = await get_collection("counters").find_one({"_id": TOMBSTONE_HORIZON})
+    return doc["value"] if doc else 0
+
+
+async def prune_tombstones(days: Optional[float] = None) -> int:
+    """USER_SYNC.tombstone_days보다 오래된 tombstone 삭제 (horizon을 먼저 올려 그 이전 since는 reset)"""
+    if get_database() is None:
+        return 0
+    if days is None:
+        days = config_data.get('USER_SYNC', {}).get('tombstone_days', 90)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    collection = get_collection("tombstones")
+    newest = await collection.find_one(
+        {"deleted_at": {"$lt": cutoff}}, {"revision": 1}, sort=[("revision", -1)]
+    )
+    if newest is None:
+        return 0
+    await get_collection("counters").update_one(
+        {"_id": TOMBSTONE_HORIZON}, {"$max": {"value": newest["revision"]}}, upsert=True
+    )
+    result = await collection.delete_many({"revision": {"$lte": newest["revision"]}})
+    if result.deleted_count:
+        logger.info(f"사용자 tombstone 정리: {result.deleted_count}개 (revision {newest['revision']} 이하)")
+    return result.deleted_count
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """쉼표로 구분한 필드 목록 (없으면 전체, 알 수 없는 필드는 ValueError)"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Invalid fields: {', '.join(unknown)}. Supported: {', '.join(LIST_FIELDS)}")
+    return names
+
+
+def user_list_item(user: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """사용자 목록 응답 항목 (plates가 없으면 이전 plate 필드)"""
+    item = {"_id": str(user.get("_id")), "revision": user.get("revision")}
+    for name in fields or LIST_FIELDS:
+        if name == "plates":
+            item[name] = user.get("plates") or user.get("plate") or []
+        else:
+            item[name] = user.get(name, _LIST_DEFAULTS.get(name))
+    return item
+
+
+def list_etag(watermark: int, since: int, limit: int, fields: Optional[List[str]], horizon: int = 0) -> str:
+    """같은 watermark/horizon/조건의 응답은 항상 같으므로 조건과 watermark로 ETag 생성"""
+    key = f"{since}:{limit}:{','.join(fields or [])}:{horizon}"
+    return f'"u{watermark}-{hashlib.sha1(key.encode()).hexdigest()[:12]}"'
+
+
+async def list_user_changes(
+    since: int = 0,
+    limit: int = 200,
+    fields: Optional[List[str]] = None,
+    watermark: Optional[int] = None,
+    horizon: Optional[int] = None,
+) -> Dict[str, Any]:
+    """since 이후 바뀐 사용자와 삭제된 사용자를 revision 순으로 limit개까지 (since=0이면 전체 목록, 삭제 없음)
+
+    revision: 다음 요청의 since (더 없으면 watermark)
+    reset: since가 서버 revision보다 크거나(DB 복원 등) 삭제된 tombstone 범위(horizon)보다 작으면 True,
+    클라이언트는 since=0부터 다시 받아야 함
+    """
+    if watermark is None:
+        watermark = await user_revisions.watermark()
+    if horizon is None:
+        horizon = await tombstone_horizon()
+    if since > watermark or 0 < since < horizon:
+        return {"users": [], "deleted": [], "revision": watermark, "has_more": False, "reset": True}
+
+    query = {"revision": {"$gt": since, "$lte": watermark}}
+    projection = None
+    if fields is not None:
+        projection = {**dict.fromkeys(fields, 1), "revision": 1}
+        if "plates" in fields:
+            projection["plate"] = 1
+    users = await get_collection("user").find(query, projection).sort("revision", 1).limit(limit).to_list(limit)
+    deleted = []
+    if since > 0:
+        deleted = await get_collection("tombstones").find(
+            query, {"user_id": 1, "revision": 1}
+        ).sort("revision", 1).limit(limit).to_list(limit)
+
+    # 두 목록을 revision 순으로 합쳐 limit개까지
+    changes = sorted(
+        [(user["revision"], user, None) for user in users] + [(doc["revision"], None, doc) for doc in deleted],
+        key=lambda change: change[0],
+    )[:limit]
+    has_more = len(changes) == limit
+    return {
+        "users": [user_list_item(user, fields) for _, user, _ in changes if user is not None],
+        "deleted": [
+            {"_id": str(doc["_id"]), "user_id": doc.get("user_id"), "revision": doc["revision"]}
+            for _, _, doc in changes if doc is not None
+        ],
+        "revision": changes[-1][0] if has_more else watermark,
+        "has_more": has_more,
+        "reset": False,
+    }
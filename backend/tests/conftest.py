@@ -0,0 +1,10 @@
+"""
+pytest 공통 설정
+backend 디렉터리에서 python -m pytest -q 로 실행 (MongoDB/카메라 없이 동작하는 단위 테스트)
+"""
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,119 @@
+"""
+카메라 상태 / circuit breaker (camera_health) 테스트
+"""
+import asyncio
+
+import httpx
+
+from services.camera_client import CameraClient
+from services.camera_health import CLOSED, HALF_OPEN, OPEN, CameraHealth
+
+
+def _open(health: CameraHealth):
+    for _ in range(health.failure_threshold):
+        assert health.allow_request()
+        health.record(False, 0.1, error="timeout")
+
+
+def _expire(health: CameraHealth):
+    """open_timeout이 지난 것으로 만듦"""
+    health.opened_at -= health.open_timeout + 1
+
+
+def test_opens_after_consecutive_failures():
+    health = CameraHealth("main", failure_threshold=3)
+    health.record(False, 0.1)
+    health.record(False, 0.1)
+    assert health.state == CLOSED
+    # 성공하면 연속 실패 횟수 초기화
+    health.record(True, 0.05)
+    health.record(False, 0.1)
+    health.record(False, 0.1)
+    assert health.state == CLOSED
+    health.record(False, 0.1, error="HTTP 503")
+    assert health.state == OPEN
+    assert not health.available
+    assert health.last_error == "HTTP 503"
+
+
+def test_open_rejects_until_timeout():
+    health = CameraHealth("main", failure_threshold=2, open_timeout=30.0)
+    _open(health)
+    assert not health.probe_due
+    assert not health.allow_request()
+    assert not health.allow_request()
+    assert health.rejected == 2
+
+
+def test_half_open_allows_single_probe():
+    health = CameraHealth("main", failure_threshold=2)
+    _open(health)
+    _expire(health)
+    assert health.probe_due
+    assert health.allow_request()
+    assert health.state == HALF_OPEN
+    # probe가 끝나기 전의 다른 요청은 거부
+    assert not health.allow_request()
+    health.record(True, 0.05)
+    assert health.state == CLOSED
+    assert health.allow_request() and health.allow_request()
+
+
+def test_failed_probe_reopens():
+    health = CameraHealth("main", failure_threshold=5)
+    _open(health)
+    _expire(health)
+    assert health.allow_request()
+    health.record(False, 0.1)
+    assert health.state == OPEN
+    assert not health.probe_due
+    assert not health.allow_request()
+
+
+def test_released_probe_can_be_retried():
+    health = CameraHealth("main", failure_threshold=1)
+    _open(health)
+    _expire(health)
+    assert health.allow_request()
+    health.release()
+    assert health.state == HALF_OPEN
+    assert health.allow_request()
+
+
+def test_stats_success_rate_and_latency():
+    health = CameraHealth("main", window=4)
+    for ok, latency in [(False, 9.0), (True, 0.1), (True, 0.2), (True, 0.3), (True, 0.4)]:
+        health.record(ok, latency)
+    stats = health.stats()
+    # window 밖의 오래된 실패는 제외
+    assert stats["success_rate"] == 1.0
+    assert stats["latency_ms"]["p50"] in (200.0, 300.0)
+    assert stats["total_failures"] == 1 and stats["open_for"] is None
+
+
+def test_client_opens_circuit_on_server_errors():
+    async def scenario():
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request.url.path)
+            if request.url.path.startswith("/ok"):
+                return httpx.Response(404, text="not found")
+            return httpx.Response(503, text="<html>busy</html>")
+
+        client = CameraClient("main", {"address": "camera", "port": 80}, {}, {"failure_threshold": 2})
+        client._client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+        try:
+            # 4xx는 카메라가 응답한 것이므로 실패로 세지 않음
+            assert await client.request("/ok") is None
+            assert client.health.state == CLOSED
+            assert await client.request("/cgi") is None
+            assert await client.request("/cgi") is None
+            assert client.health.state == OPEN
+            # circuit이 열리면 요청을 보내지 않음
+            assert await client.request("/cgi") is None
+            assert requests == ["/ok", "/cgi", "/cgi"]
+        finally:
+            await client.close()
+
+    asyncio.run(scenario())
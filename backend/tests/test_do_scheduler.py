@@ -0,0 +1,112 @@
+"""
+DO 명령 스케줄러 (do_scheduler) 테스트
+"""
+import asyncio
+
+import pytest
+
+from services import do_scheduler
+from services.do_scheduler import DOScheduler
+
+
+class _Client:
+    """trigger_do 호출을 기록하고 release()까지 응답을 미루는 카메라"""
+
+    def __init__(self, ok: bool = True):
+        self.ok = ok
+        self.calls = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def trigger_do(self, secs: int) -> bool:
+        self.calls.append(secs)
+        await self.gate.wait()
+        return self.ok
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = _Client()
+    monkeypatch.setattr(do_scheduler, "get_camera_client", lambda cam_name: fake)
+    return fake
+
+
+def test_triggers_during_pulse_share_one_command(client):
+    async def scenario():
+        client.gate.clear()
+        scheduler = DOScheduler("main")
+        first = asyncio.create_task(scheduler.trigger(3, requester="kim"))
+        await asyncio.sleep(0)
+        others = [asyncio.create_task(scheduler.trigger(3, requester=name)) for name in ("lee", "park")]
+        await asyncio.sleep(0)
+        client.gate.set()
+        results = [await first] + await asyncio.gather(*others)
+
+        assert client.calls == [3]
+        assert [result.coalesced for result in results] == [False, True, True]
+        # 합쳐진 요청도 실제 명령을 보낸 요청자를 받음
+        assert {result.requester for result in results} == {"kim"}
+        assert all(results)
+        assert scheduler.stats()["coalesced"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_trigger_within_pulse_window_is_coalesced(client):
+    async def scenario():
+        scheduler = DOScheduler("main", pulse_margin=0.5)
+        await scheduler.trigger(1, requester="kim")
+        assert scheduler.pulse_active
+        assert (await scheduler.trigger(1, requester="lee")).coalesced
+        assert client.calls == [1]
+
+    asyncio.run(scenario())
+
+
+def test_trigger_after_pulse_window_sends_again(client):
+    async def scenario():
+        scheduler = DOScheduler("main")
+        await scheduler.trigger(1, requester="kim")
+        # 펄스 창이 끝난 상태로 만듦
+        scheduler._pulse_until = 0.0
+        assert not scheduler.pulse_active
+        result = await scheduler.trigger(1, requester="lee")
+        assert not result.coalesced and result.requester == "lee"
+        assert client.calls == [1, 1]
+
+    asyncio.run(scenario())
+
+
+def test_failed_pulse_is_not_reused(client):
+    async def scenario():
+        client.ok = False
+        scheduler = DOScheduler("main")
+        assert not await scheduler.trigger(1)
+        assert not scheduler.pulse_active
+        client.ok = True
+        assert await scheduler.trigger(1)
+        assert client.calls == [1, 1]
+        assert scheduler.stats()["failed"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_on_off_are_not_coalesced_and_end_pulse(client):
+    async def scenario():
+        scheduler = DOScheduler("main")
+        await scheduler.trigger(5)
+        assert scheduler.pulse_active
+        await scheduler.command(-1)
+        assert not scheduler.pulse_active
+        await scheduler.command(0)
+        await scheduler.command(0)
+        assert client.calls == [5, -1, 0, 0]
+        assert scheduler.stats()["sent"] == 4
+
+    asyncio.run(scenario())
+
+
+def test_missing_camera_fails(monkeypatch):
+    monkeypatch.setattr(do_scheduler, "get_camera_client", lambda cam_name: None)
+    result = asyncio.run(DOScheduler("none").trigger(1))
+    assert not result and not result.coalesced
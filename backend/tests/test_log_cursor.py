@@ -0,0 +1,63 @@
+"""
+로그 목록/검색 페이지 커서 (log_service) 테스트
+"""
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+from services.log_service import decode_cursor, decode_search_cursor, encode_cursor, encode_search_cursor
+
+
+def _b64(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("timestamp", [0.0, 1760000000.123456, 1760000000])
+def test_cursor_round_trip(timestamp):
+    log_id = ObjectId()
+    cursor = encode_cursor({"timestamp": timestamp, "_id": log_id})
+    assert decode_cursor(cursor) == (float(timestamp), log_id)
+    # URL에 그대로 넣을 수 있는 형식
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "!!!not-base64",
+    _b64("not json"),
+    _b64("[1760000000.0]"),
+    _b64('[1760000000.0, "not-an-object-id"]'),
+    _b64('["yesterday", "%s"]' % ObjectId()),
+    _b64('{"timestamp": 1, "_id": "x"}'),
+])
+def test_tampered_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_truncated_cursor_raises_value_error():
+    cursor = encode_cursor({"timestamp": 1760000000.5, "_id": ObjectId()})
+    with pytest.raises(ValueError):
+        decode_cursor(cursor[:-5])
+
+
+def test_search_cursor_round_trip_truncates_to_milliseconds():
+    log_id = ObjectId()
+    regdate = datetime(2026, 10, 18, 9, 30, 15, 123456, tzinfo=timezone.utc)
+    decoded, decoded_id = decode_search_cursor(encode_search_cursor({"regdate": regdate, "_id": log_id}))
+    assert decoded == regdate.replace(microsecond=123000)
+    assert decoded_id == log_id
+
+
+def test_search_cursor_treats_naive_regdate_as_utc():
+    regdate = datetime(2026, 10, 18, 9, 30, 15)
+    decoded, _ = decode_search_cursor(encode_search_cursor({"regdate": regdate, "_id": ObjectId()}))
+    assert decoded == regdate.replace(tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("cursor", ["", "%%%", _b64('["soon", "%s"]' % ObjectId()), _b64("[1]")])
+def test_tampered_search_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_search_cursor(cursor)
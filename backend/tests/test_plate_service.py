@@ -0,0 +1,151 @@
+"""
+차량번호 색인 (plate_service) 테스트
+"""
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from config import config_data
+from routers import gate
+from services.do_scheduler import DOResult
+from services.plate_service import PlateIndex, PlateCooldown, edit_distance, normalize_plate
+
+
+def _index(users, **options) -> PlateIndex:
+    index = PlateIndex(**options)
+    for user in users:
+        index._add(ObjectId(), user)
+    return index
+
+
+KIM = {"user_id": "kim", "flag": "y", "plates": ["12가 3456"]}
+LEE = {"user_id": "lee", "flag": "y", "plate": "AB-1234"}
+
+
+def test_normalize_plate():
+    assert normalize_plate(" 12가-3456 ") == "12가3456"
+    assert normalize_plate("ab 12") == "AB12"
+    # 전각 문자는 NFKC로 변환
+    assert normalize_plate("ＡＢ１２") == "AB12"
+    assert normalize_plate(None) == ""
+
+
+def test_exact_match_uses_legacy_plate_field():
+    result = _index([KIM, LEE]).match("ab1234")
+    assert result
+    assert result.user["user_id"] == "lee"
+    assert result.matched == "AB1234"
+    assert result.distance == 0
+
+
+def test_ocr_confusions_fold_to_same_plate():
+    index = _index([{"user_id": "park", "plates": ["SB0I23"]}])
+    for read in ("5801Z3", "S8OL23", "sbdi23"):
+        result = index.match(read)
+        assert result.user["user_id"] == "park", read
+        assert result.distance == 0
+        # 응답에는 등록된 번호를 그대로 사용
+        assert result.matched == "SB0I23"
+
+
+def test_custom_confusions_extend_defaults():
+    index = _index([{"user_id": "choi", "plates": ["7777A"]}], confusions={"T": "7"})
+    assert index.match("TT77A").user["user_id"] == "choi"
+    assert not _index([{"user_id": "choi", "plates": ["7777A"]}]).match("TT77A")
+
+
+def test_fuzzy_disabled_by_default():
+    assert not _index([KIM]).match("12가3457")
+
+
+def test_deletion_neighborhood_finds_one_edit():
+    index = _index([KIM], fuzzy=True, max_distance=1)
+    for read in ("12가3457", "12가345", "12가34567", "1가3456"):
+        result = index.match(read)
+        assert result.user["user_id"] == "kim", read
+        assert result.distance == 1
+    assert not index.match("12가3478")
+
+
+def test_fuzzy_respects_min_length():
+    index = _index([{"user_id": "short", "plates": ["A12"]}], fuzzy=True, max_distance=1, min_fuzzy_length=6)
+    assert index.match("A12")
+    assert not index.match("A13")
+
+
+def test_ambiguous_when_closest_plates_belong_to_different_users():
+    index = _index(
+        [{"user_id": "a", "plates": ["123456"]}, {"user_id": "b", "plates": ["123458"]}],
+        fuzzy=True, max_distance=1,
+    )
+    result = index.match("123457")
+    assert not result
+    assert result.ambiguous
+    assert index.match("123456").user["user_id"] == "a"
+
+
+def test_remove_cleans_up_neighbors():
+    index = PlateIndex(fuzzy=True, max_distance=1)
+    oid = ObjectId()
+    index._add(oid, dict(KIM))
+    index._remove(oid)
+    assert not index.match("12가3456")
+    assert not index.match("12가3457")
+    assert index._exact == {} and index._neighbors == {}
+
+
+def test_edit_distance_limit():
+    assert edit_distance("123456", "123456", 1) == 0
+    assert edit_distance("123456", "124356", 2) == 2
+    assert edit_distance("123456", "654321", 1) == 2
+    assert edit_distance("1", "1234", 1) == 2
+
+
+def test_cooldown():
+    cooldown = PlateCooldown(cooldown=10.0)
+    assert cooldown.acquire("kim", now=100.0)
+    assert not cooldown.acquire("kim", now=105.0)
+    assert cooldown.acquire("kim", now=110.0)
+    cooldown.release("kim")
+    assert cooldown.acquire("kim", now=111.0)
+
+
+@pytest.fixture
+def lpr_client(monkeypatch):
+    """퍼지 매칭을 켠 색인과 DO 호출 기록으로 /lpr 호출"""
+    calls = []
+
+    async def fake_put_do(**kwargs):
+        calls.append(kwargs)
+        return DOResult(ok=True, requester=kwargs.get("requester"))
+
+    monkeypatch.setitem(config_data, "LPR", {"token": "secret", "snapshot_camera": "main", "gate_camera": "main"})
+    monkeypatch.setitem(config_data, "CAMERAS", {"main": {}})
+    monkeypatch.setattr(gate, "plate_index", _index([KIM], fuzzy=True, max_distance=1))
+    monkeypatch.setattr(gate, "plate_cooldown", PlateCooldown())
+    monkeypatch.setattr(gate, "put_do", fake_put_do)
+    monkeypatch.setattr(gate, "submit_event", lambda **kwargs: None)
+    monkeypatch.setattr(gate, "user_can_access", lambda user, now=None: True)
+
+    app = FastAPI()
+    app.include_router(gate.router)
+    return TestClient(app), calls
+
+
+def test_fuzzy_match_never_opens(lpr_client):
+    client, calls = lpr_client
+    response = client.post("/lpr", params={"plate": "12가3457", "token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["result"] == "fuzzy"
+    assert response.json()["user_id"] == "kim"
+    assert calls == []
+
+
+def test_exact_match_opens(lpr_client):
+    client, calls = lpr_client
+    response = client.post("/lpr", params={"plate": "12가3456", "token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["result"] == "opened"
+    assert len(calls) == 1
+    assert calls[0]["requester"] == "kim"
@@ -0,0 +1,126 @@
+"""
+출입 가능 시간 (schedule_service) 테스트
+"""
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from config import config_data
+from services import schedule_service
+from services.schedule_service import (
+    ALL_HOURS,
+    DENY_ALL,
+    build_bitmap,
+    compile_schedule,
+    schedule_for,
+    user_can_access,
+    validate_schedule,
+)
+
+SEOUL = ZoneInfo("Asia/Seoul")
+
+
+def _at(year, month, day, hour, minute=0, tz=SEOUL) -> float:
+    return datetime(year, month, day, hour, minute, tzinfo=tz).timestamp()
+
+
+@pytest.fixture(autouse=True)
+def schedule_config(monkeypatch):
+    monkeypatch.setitem(config_data, "SCHEDULE", {"timezone": "Asia/Seoul", "holidays": [], "holiday_access": "deny"})
+    schedule_service.clear_compiled_schedules()
+    yield
+    schedule_service.clear_compiled_schedules()
+
+
+def test_all_day_when_hours_are_zero():
+    assert build_bitmap({"hour_from": 0, "hour_to": 0}) == ALL_HOURS
+
+
+def test_same_hour_allows_nothing():
+    assert build_bitmap({"hour_from": 9, "hour_to": 9}) == 0
+
+
+def test_daily_window_sets_hour_of_week_bits():
+    bitmap = build_bitmap({"hour_from": 9, "hour_to": 18})
+    assert bin(bitmap).count("1") == 9 * 7
+    # 월요일(0) 9시 ~ 17시만 켜짐
+    assert [hour for hour in range(24) if bitmap >> hour & 1] == list(range(9, 18))
+    # 일요일(6) 17시
+    assert bitmap >> (6 * 24 + 17) & 1
+
+
+def test_window_crossing_midnight():
+    # 2026-10-16은 금요일
+    user = {"schedule": [{"days": [4], "hour_from": 22, "hour_to": 6}]}
+    compiled = compile_schedule(user)
+    assert compiled.allows(_at(2026, 10, 16, 23))
+    assert compiled.allows(_at(2026, 10, 17, 5, 59))
+    assert not compiled.allows(_at(2026, 10, 17, 6))
+    assert not compiled.allows(_at(2026, 10, 16, 21, 59))
+    # 목요일 밤은 포함하지 않음
+    assert not compiled.allows(_at(2026, 10, 15, 23))
+
+
+def test_sunday_window_wraps_to_monday():
+    bitmap = build_bitmap({"schedule": [{"days": [6], "hour_from": 23, "hour_to": 2}]})
+    assert bitmap >> (6 * 24 + 23) & 1
+    assert bitmap & 0b11 == 0b11
+    assert not bitmap >> 2 & 1
+
+
+def test_date_range_is_inclusive_in_local_time():
+    compiled = compile_schedule({"date_from": "2026-10-01", "date_to": "2026-10-31"})
+    assert not compiled.allows(_at(2026, 9, 30, 23, 59))
+    assert compiled.allows(_at(2026, 10, 1, 0))
+    assert compiled.allows(_at(2026, 10, 31, 23, 59))
+    assert not compiled.allows(_at(2026, 11, 1, 0))
+
+
+def test_holidays_deny_unless_user_allows(monkeypatch):
+    monkeypatch.setitem(config_data["SCHEDULE"], "holidays", ["2026-10-09"])
+    now = _at(2026, 10, 9, 12)
+    assert not compile_schedule({}).allows(now)
+    assert compile_schedule({}).allows(now + 86400)
+    assert compile_schedule({"holiday_access": "allow"}).allows(now)
+
+
+def test_user_timezone_overrides_default():
+    # 9시 ~ 18시를 UTC 기준으로 적용하면 서울 19시(UTC 10시)에도 허용
+    now = _at(2026, 10, 16, 19)
+    assert not compile_schedule({"hour_from": 9, "hour_to": 18}).allows(now)
+    assert compile_schedule({"hour_from": 9, "hour_to": 18, "timezone": "UTC"}).allows(now)
+    assert compile_schedule({"hour_from": 9, "hour_to": 18, "timezone": "+00:00"}).allows(now)
+
+
+def test_offset_refresh_across_dst_change():
+    # 2026-03-08 02:00 (America/New_York) 일광 절약 시간 시작
+    tz = ZoneInfo("America/New_York")
+    compiled = compile_schedule({"hour_from": 8, "hour_to": 9, "timezone": "America/New_York"})
+    assert not compiled.allows(_at(2026, 3, 7, 23, tz=tz))
+    assert compiled.allows(_at(2026, 3, 8, 8, 30, tz=tz))
+    assert not compiled.allows(_at(2026, 3, 8, 9, 30, tz=tz))
+
+
+def test_invalid_settings_deny_all():
+    user = {"user_id": "bad", "timezone": "Mars/Base"}
+    assert validate_schedule(user) is not None
+    assert schedule_for(user) is DENY_ALL
+    assert not user_can_access(user, _at(2026, 10, 16, 12))
+    assert not DENY_ALL.allows(datetime.now(timezone.utc).timestamp())
+
+
+@pytest.mark.parametrize("user", [
+    {"schedule": [{"days": [7], "hour_from": 1, "hour_to": 2}]},
+    {"schedule": [{"hour_from": 25, "hour_to": 2}]},
+    {"date_from": "2026-13-01"},
+])
+def test_validate_schedule_reports_errors(user):
+    assert validate_schedule(user)
+
+
+def test_compiled_schedule_is_shared_by_signature():
+    first = schedule_for({"user_id": "a", "hour_from": 9, "hour_to": 18})
+    second = schedule_for({"user_id": "b", "hour_from": 9, "hour_to": 18})
+    assert first is second
+    assert schedule_for({"_schedule": DENY_ALL}) is DENY_ALL
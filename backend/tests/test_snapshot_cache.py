@@ -0,0 +1,114 @@
+"""
+스냅샷 캐시 (snapshot_cache) 테스트
+"""
+import asyncio
+
+from services.snapshot_cache import Frame, SnapshotCache
+
+
+class _Fetcher:
+    """호출 횟수를 세고 release()까지 응답을 미루는 업스트림"""
+
+    def __init__(self, data: bytes = b"jpeg"):
+        self.data = data
+        self.calls = 0
+        self.gate = asyncio.Event()
+
+    def release(self):
+        self.gate.set()
+
+    async def __call__(self, cam_name: str):
+        self.calls += 1
+        await self.gate.wait()
+        return self.data
+
+
+def test_concurrent_requests_share_one_fetch():
+    async def scenario():
+        fetcher = _Fetcher()
+        cache = SnapshotCache(fetcher, ttl=10.0)
+        waiters = [asyncio.create_task(cache.get("main")) for _ in range(5)]
+        await asyncio.sleep(0)
+        fetcher.release()
+        frames = await asyncio.gather(*waiters)
+        assert fetcher.calls == 1
+        assert all(frame is frames[0] for frame in frames)
+        assert (cache.misses, cache.coalesced) == (1, 4)
+
+    asyncio.run(scenario())
+
+
+def test_fresh_frame_is_reused_within_ttl():
+    async def scenario():
+        fetcher = _Fetcher()
+        fetcher.release()
+        cache = SnapshotCache(fetcher, ttl=10.0)
+        first = await cache.get("main")
+        assert await cache.get("main") is first
+        assert fetcher.calls == 1 and cache.hits == 1
+
+    asyncio.run(scenario())
+
+
+def test_expired_frame_is_fetched_again():
+    async def scenario():
+        fetcher = _Fetcher()
+        fetcher.release()
+        cache = SnapshotCache(fetcher, ttl=1.0, camera_ttl={"slow": 30.0})
+        first = await cache.get("main")
+        first.captured_at -= 2.0
+        assert await cache.get("main") is not first
+        assert fetcher.calls == 2
+
+        slow = await cache.get("slow")
+        slow.captured_at -= 2.0
+        # 카메라별 TTL이 더 길면 그대로 사용
+        assert await cache.get("slow") is slow
+        # 요청별 max_age가 우선
+        assert await cache.get("slow", max_age=1.0) is not slow
+        assert fetcher.calls == 4
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_shared_fetch():
+    async def scenario():
+        fetcher = _Fetcher()
+        cache = SnapshotCache(fetcher, ttl=10.0)
+        leader = asyncio.create_task(cache.get("main"))
+        follower = asyncio.create_task(cache.get("main"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        fetcher.release()
+        frame = await follower
+        assert frame is not None and frame.data == b"jpeg"
+        assert fetcher.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_fetch_is_not_cached():
+    async def scenario():
+        calls = []
+
+        async def failing(cam_name):
+            calls.append(cam_name)
+            raise OSError("camera offline")
+
+        cache = SnapshotCache(failing, ttl=10.0)
+        assert await cache.get("main") is None
+        assert await cache.get("main") is None
+        assert len(calls) == 2 and cache.errors == 2
+        assert cache.stats()["cameras"]["main"]["inflight"] is False
+
+    asyncio.run(scenario())
+
+
+def test_put_keeps_newest_frame():
+    cache = SnapshotCache(_Fetcher(), ttl=10.0)
+    newer = Frame("main", b"new", captured_at=200.0)
+    cache.put(newer)
+    cache.put(Frame("main", b"old", captured_at=100.0))
+    assert cache.peek("main") is newer
+    assert newer.etag == f'"{newer.sha256}"'
@@ -0,0 +1,141 @@
+"""
+사용자 일괄 가져오기 파서 (user_bulk_service) 테스트
+"""
+import asyncio
+
+import pytest
+
+from services import user_bulk_service
+from services.user_bulk_service import _CsvRecords, _JsonRecords, import_users, parse_record
+
+
+def _feed_all(parser, text: str, size: int):
+    """text를 size 글자씩 나눠 넣고 전체 레코드 반환"""
+    records = []
+    for i in range(0, len(text), size):
+        records += parser.feed(text[i:i + size])
+    return records + parser.feed("", final=True)
+
+
+CSV = (
+    'user_id,name,plates,hour_from\r\n'
+    'kim,"Kim, Minsu",12가3456;34나5678,9\r\n'
+    '\r\n'
+    'lee,"첫 줄\r\n둘째 줄 ""인용""",,\r\n'
+)
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, len(CSV)])
+def test_csv_quoted_newlines_and_crlf(size):
+    records = _feed_all(_CsvRecords(), CSV, size)
+    assert records == [
+        {"user_id": "kim", "name": "Kim, Minsu", "plates": "12가3456;34나5678", "hour_from": "9"},
+        {"user_id": "lee", "name": '첫 줄\r\n둘째 줄 "인용"', "plates": "", "hour_from": ""},
+    ]
+
+
+def test_csv_last_row_without_newline():
+    assert _feed_all(_CsvRecords(), "user_id,name\nkim,Kim", 4) == [{"user_id": "kim", "name": "Kim"}]
+
+
+def test_csv_unterminated_quote_is_error():
+    parser = _CsvRecords()
+    parser.feed('user_id,name\nkim,"Kim\n')
+    with pytest.raises(ValueError):
+        parser.feed("", final=True)
+
+
+JSON_ARRAY = '[\n  {"user_id": "kim", "name": "김민수"},\n  {"user_id": "lee", "plates": ["AB1234"]}\n]\n'
+NDJSON = '{"user_id": "kim", "name": "김민수"}\n{"user_id": "lee", "plates": ["AB1234"]}\n'
+
+
+@pytest.mark.parametrize("text", [JSON_ARRAY, NDJSON])
+@pytest.mark.parametrize("size", [1, 5, 1000])
+def test_json_array_and_lines(text, size):
+    records = _feed_all(_JsonRecords(), text, size)
+    assert [record["user_id"] for record in records] == ["kim", "lee"]
+    assert records[0]["name"] == "김민수"
+
+
+@pytest.mark.parametrize("text", [
+    '[{"user_id": "kim"},',
+    '[{"user_id": "kim"}] {"user_id": "lee"}',
+    '{"user_id": "kim"}\n{"user_id": ',
+    '{"user_id": kim}',
+])
+def test_json_malformed_is_error(text):
+    parser = _JsonRecords()
+    with pytest.raises(ValueError):
+        parser.feed(text)
+        parser.feed("", final=True)
+
+
+def test_parse_record_converts_and_keeps_empty_fields():
+    user_id, fields, on_insert = parse_record({"user_id": " kim ", "flag": "false", "plate": "12가3456; 34나5678", "name": ""})
+    assert user_id == "kim"
+    assert fields["flag"] == "n"
+    assert fields["plates"] == ["12가3456", "34나5678"]
+    assert "name" not in fields and on_insert["name"] is None
+    assert fields["api_key"]
+
+
+@pytest.mark.parametrize("record", [
+    {"name": "no id"},
+    {"user_id": "kim", "hour_from": 25},
+    {"user_id": "kim", "date_from": "2026/10/01"},
+    {"user_id": "kim", "schedule": "not json"},
+    {"user_id": "kim", "flag": "maybe"},
+    "kim",
+])
+def test_parse_record_rejects_bad_records(record):
+    with pytest.raises(ValueError):
+        parse_record(record)
+
+
+class _EmptyCursor:
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise StopAsyncIteration
+
+
+class _FakeCollection:
+    def find(self, *args, **kwargs):
+        return _EmptyCursor()
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _dry_run(data: bytes, format: str, size: int = 4):
+    return asyncio.run(import_users(_chunks(data, size), format=format, dry_run=True))
+
+
+@pytest.fixture(autouse=True)
+def no_database(monkeypatch):
+    monkeypatch.setattr(user_bulk_service, "_user_collection", lambda: _FakeCollection())
+
+
+def test_import_strips_bom_and_splits_multibyte_chunks():
+    data = "﻿user_id,name\r\nkim,김민수\r\n".encode("utf-8")
+    result = _dry_run(data, "csv", size=1)
+    assert result["records"] == 1 and result["created"] == 1 and result["failed"] == 0
+    assert result["changes"][0]["fields"]["name"] == "김민수"
+
+
+def test_import_reports_malformed_rows_and_continues():
+    data = b"user_id,hour_from\nkim,9\nlee,99\n,1\npark,3\n"
+    result = _dry_run(data, "csv")
+    assert result["records"] == 4
+    assert result["created"] == 2
+    assert [error["record"] for error in result["errors"]] == [1, 2]
+    assert "aborted" not in result
+
+
+def test_import_aborts_on_broken_json():
+    result = _dry_run(b'[{"user_id": "kim"}, {"user_id": ', "json")
+    assert result["created"] == 1
+    assert "Invalid JSON" in result["aborted"]
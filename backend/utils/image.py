@@ -0,0 +1,41 @@
+"""
+이미지 처리 유틸리티
+프로세스 풀에서 실행되므로 이 모듈은 Pillow 외의 서버 모듈을 import하지 않음
+"""
+import io
+from typing import Dict
+
+from PIL import Image
+
+
+def make_thumbnails(data: bytes, sizes: Dict[str, int], quality: int = 75) -> Dict[str, bytes]:
+    """JPEG 바이트에서 긴 변 기준 크기별 썸네일 JPEG 생성 (원본보다 큰 크기는 건너뜀)"""
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB")
+        renditions = {}
+        for name, max_side in sorted(sizes.items(), key=lambda item: -item[1]):
+            if max(image.size) <= max_side:
+                continue
+            # 큰 크기부터 줄여가며 다음 크기의 원본으로 재사용
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=quality, optimize=True)
+            renditions[name] = buffer.getvalue()
+        return renditions
+
+
+def difference_hash(data: bytes, size: int = 8) -> str:
+    """dHash: (size+1) x size 회색조로 줄인 뒤 가로로 이웃한 픽셀의 밝기를 비교한 비트열 (hex)
+
+    밝기/압축률이 조금 달라도 같은 장면이면 대부분의 비트가 같음
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEG는 축소된 크기로 디코딩하여 전체 해상도 디코딩을 피함
+        image.draft("L", (size * 8, size * 8))
+        pixels = list(image.convert("L").resize((size + 1, size), Image.BILINEAR).getdata())
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{value:0{size * size // 4}x}"
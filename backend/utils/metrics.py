@@ -0,0 +1,90 @@
+"""
+쿼리 수 측정 유틸리티
+MongoDB 명령을 CommandListener로 세어 API 호출별 쿼리 수를 기록 (N+1 쿼리 회귀 감지용)
+지연 시간 통계용 percentile도 여기에 둠
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Iterator
+
+from pymongo import monitoring
+
+
+def percentile(sorted_values, pct: float) -> Optional[float]:
+    """정렬된 값에서 pct 백분위 값 (nearest-rank, 값이 없으면 None)"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class QueryCounter:
+    """한 범위(API 호출 등)에서 실행된 MongoDB 명령 수"""
+
+    def __init__(self):
+        self.count = 0
+        self.commands: Dict[str, int] = {}
+
+    def add(self, command_name: str):
+        self.count += 1
+        self.commands[command_name] = self.commands.get(command_name, 0) + 1
+
+
+_current: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+# 범위 이름 -> 누적 통계
+_scope_stats: Dict[str, Dict[str, Any]] = {}
+_total_commands = 0
+
+
+class MongoCommandCounter(monitoring.CommandListener):
+    """명령 시작 시 현재 범위의 카운터 증가 (Motor는 executor 실행 시 context를 복사하므로 범위가 유지됨)"""
+
+    def started(self, event):
+        global _total_commands
+        _total_commands += 1
+        counter = _current.get()
+        if counter is not None:
+            counter.add(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+mongo_command_counter = MongoCommandCounter()
+
+
+@contextmanager
+def track_queries(name: str) -> Iterator[QueryCounter]:
+    """with 블록 안에서 실행된 MongoDB 명령 수를 name 범위로 기록"""
+    counter = QueryCounter()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+        stats = _scope_stats.setdefault(name, {"calls": 0, "queries": 0, "last": 0, "max": 0, "last_commands": {}})
+        stats["calls"] += 1
+        stats["queries"] += counter.count
+        stats["last"] = counter.count
+        stats["max"] = max(stats["max"], counter.count)
+        stats["last_commands"] = counter.commands
+
+
+def query_metrics() -> Dict[str, Any]:
+    return {
+        "total_commands": _total_commands,
+        "scopes": {
+            name: {
+                "calls": stats["calls"],
+                "queries_per_call": round(stats["queries"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                "last": stats["last"],
+                "max": stats["max"],
+                "last_commands": stats["last_commands"],
+            }
+            for name, stats in _scope_stats.items()
+        },
+    }
@@ -36,12 +36,18 @@ class ApiService {
   }
 
   // 로그 목록 조회 (웹 관리용 - cookie에서 api_key 사용)
-  async listLogs(page = 1, offset = 20) {
+  // cursor: { before } 다음(오래된) 페이지, { after } 이전(최근) 페이지
+  async listLogs(page = 1, offset = 20, cursor = {}) {
     const apiKey = this.getApiKey()
     if (!apiKey) {
       throw new Error('로그인이 필요합니다')
     }
-    const url = `/logs?page=${page}&offset=${offset}&api_key=${encodeURIComponent(apiKey)}`
+    let url = `/logs?page=${page}&offset=${offset}&api_key=${encodeURIComponent(apiKey)}`
+    if (cursor.before) {
+      url += `&before=${encodeURIComponent(cursor.before)}`
+    } else if (cursor.after) {
+      url += `&after=${encodeURIComponent(cursor.after)}`
+    }
     return this.request(url)
   }
 }
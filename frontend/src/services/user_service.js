@@ -64,6 +64,52 @@ class UserService {
     })
   }
 
+  /**
+   * 사용자 목록 동기화 (GET /users?since=)
+   * 처음에는 전체 목록을, 이후에는 마지막 revision 이후 바뀐/삭제된 사용자만 받아 캐시에 반영
+   * 바뀐 것이 없으면 서버가 304를 보내므로 응답 본문을 받지 않음
+   */
+  async syncUsers() {
+    const apiKey = this.getApiKey()
+    if (!apiKey) {
+      throw new Error('로그인이 필요합니다')
+    }
+    const cache = this.userCache || (this.userCache = { revision: 0, users: new Map(), etag: null, etagSince: null })
+
+    for (;;) {
+      const since = cache.revision
+      const params = new URLSearchParams({ api_key: apiKey, since, limit: 500 })
+      // ETag는 같은 since 요청에만 유효 (바뀐 것이 없어 revision이 그대로일 때 304)
+      const headers = cache.etag && cache.etagSince === since ? { 'If-None-Match': cache.etag } : {}
+      const response = await fetch(`${API_BASE_URL}/users?${params}`, { headers })
+      if (response.status === 304) {
+        break
+      }
+      const data = await response.json()
+      if (!response.ok) {
+        throw new Error(data.detail || 'API 요청 실패')
+      }
+      if (data.reset) {
+        // 서버 revision이 캐시보다 작으면(DB 복원 등) 처음부터 다시
+        this.userCache = null
+        return this.syncUsers()
+      }
+      for (const user of data.users) {
+        cache.users.set(user._id, user)
+      }
+      for (const user of data.deleted) {
+        cache.users.delete(user._id)
+      }
+      cache.revision = data.revision
+      cache.etag = response.headers.get('ETag')
+      cache.etagSince = since
+      if (!data.has_more) {
+        break
+      }
+    }
+    return [...cache.users.values()].sort((a, b) => String(a.regdate).localeCompare(String(b.regdate)))
+  }
+
   /**
    * 사용자 생성/수정
    */